@@ -0,0 +1,161 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import tempfile
+from typing import Dict, Optional
+
+try:
+    import brotli
+except ImportError:  # Optional: .br files are only written when brotli is installed
+    brotli = None
+
+# Static subdirectories that are fingerprinted; everything is served as-is otherwise
+ASSET_DIRS = ('js', 'css')
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+
+# Fingerprinted files never change, so browsers may keep them for a year
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# Dynamic responses smaller than this are not worth compressing
+COMPRESS_MIN_SIZE = 500
+COMPRESSIBLE_TYPES = ('text/html', 'application/json', 'text/plain', 'text/css', 'application/javascript')
+
+# Precompressed variants in order of preference
+_ENCODING_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+
+def build_assets(static_dir: str) -> Dict[str, str]:
+    """Copy JS/CSS to content-hashed names under static/dist with .gz (and .br) siblings.
+
+    Returns the manifest mapping each source path (as passed to
+    url_for('static', filename=...)) to its fingerprinted path.
+    """
+    manifest = {}
+    for asset_dir in ASSET_DIRS:
+        source_dir = os.path.join(static_dir, asset_dir)
+        if not os.path.isdir(source_dir):
+            continue
+        for root, _, files in os.walk(source_dir):
+            for filename in sorted(files):
+                source = os.path.join(root, filename)
+                logical = os.path.relpath(source, static_dir).replace(os.sep, '/')
+                with open(source, 'rb') as f:
+                    content = f.read()
+
+                stem, ext = os.path.splitext(logical)
+                fingerprinted = f"{DIST_DIR}/{stem}.{hashlib.sha256(content).hexdigest()[:12]}{ext}"
+                target = os.path.join(static_dir, *fingerprinted.split('/'))
+                if not os.path.exists(target):
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    _write(target, content)
+                    _write(target + '.gz', gzip.compress(content, 9, mtime=0))
+                    if brotli is not None:
+                        _write(target + '.br', brotli.compress(content))
+                manifest[logical] = fingerprinted
+
+    _write(os.path.join(static_dir, DIST_DIR, MANIFEST_NAME), json.dumps(manifest, indent=2).encode('utf-8'))
+    return manifest
+
+
+def _write(path: str, content: bytes):
+    """Write atomically through a temp file of our own, since every server worker may build at once"""
+    handle, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.tmp',
+                                        dir=os.path.dirname(path))
+    try:
+        with os.fdopen(handle, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def load_manifest(static_dir: str) -> Dict[str, str]:
+    path = os.path.join(static_dir, DIST_DIR, MANIFEST_NAME)
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}  # Not built: templates get the plain static files
+
+
+def install_assets(app, build: bool = True, compress: bool = True,
+                   compress_min_size: int = COMPRESS_MIN_SIZE) -> Dict[str, str]:
+    """Serve fingerprinted, precompressed static files and gzip dynamic HTML/JSON responses.
+
+    url_for('static', filename='js/sales.js') keeps working in templates and
+    resolves to the fingerprinted copy when one exists. With build=False
+    the manifest built at deploy time (python assets.py) is used; if
+    building fails, e.g. on a read-only filesystem, so is whatever was built
+    before, or failing that the plain files.
+    """
+    from flask import request, send_file
+
+    static_dir = app.static_folder
+    manifest = None
+    if build and os.path.isdir(static_dir):
+        try:
+            manifest = build_assets(static_dir)
+        except OSError as e:
+            print(f"Could not build static assets, serving the existing build: {e}")
+    if manifest is None:
+        manifest = load_manifest(static_dir)
+    dist_prefix = f"{app.static_url_path}/{DIST_DIR}/"
+
+    @app.url_defaults
+    def _fingerprint_static(endpoint: str, values: Dict):
+        if endpoint == 'static' and values.get('filename') in manifest:
+            values['filename'] = manifest[values['filename']]
+
+    @app.before_request
+    def _serve_fingerprinted():
+        if not request.path.startswith(dist_prefix):
+            return None
+        relative = request.path[len(app.static_url_path) + 1:]
+        path = os.path.normpath(os.path.join(static_dir, *relative.split('/')))
+        if not path.startswith(os.path.join(static_dir, DIST_DIR) + os.sep) or not os.path.isfile(path):
+            return None  # Fall through to the normal static view (and its 404)
+
+        encoding = _precompressed_encoding(request, path)
+        response = send_file(path + _ENCODING_SUFFIXES[encoding] if encoding else path,
+                             mimetype=mimetypes.guess_type(path)[0], max_age=IMMUTABLE_MAX_AGE)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        response.cache_control.immutable = True
+        return response
+
+    if compress:
+        @app.after_request
+        def _compress_response(response):
+            if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+                    or 'Content-Encoding' in response.headers
+                    or response.mimetype not in COMPRESSIBLE_TYPES
+                    or 'gzip' not in request.accept_encodings):
+                return response
+            data = response.get_data()
+            if len(data) < compress_min_size:
+                return response
+            response.set_data(gzip.compress(data, 6))
+            response.headers['Content-Encoding'] = 'gzip'
+            response.vary.add('Accept-Encoding')
+            return response
+
+    return manifest
+
+
+def _precompressed_encoding(request, path: str) -> Optional[str]:
+    """Pick the best precompressed variant the client accepts and we have on disk"""
+    for encoding, suffix in _ENCODING_SUFFIXES.items():
+        if encoding in request.accept_encodings and os.path.exists(path + suffix):
+            return encoding
+    return None
+
+
+if __name__ == '__main__':
+    static_root = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+    for source, target in build_assets(static_root).items():
+        print(f"{source} -> {target}")
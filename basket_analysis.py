@@ -0,0 +1,142 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, Hashable, List, Optional, Set, Tuple
+
+from records import Sale
+from sales_rollups import floor_day
+
+# Sales from one till this close together are treated as one basket
+BASKET_GAP = 120  # Seconds
+
+# Distinct items counted per basket; the pair work per sale is bounded by this
+MAX_BASKET_ITEMS = 50
+
+# Item pairs kept per day once the day is over (twice this while it is current)
+PAIR_CAPACITY = 1000
+
+
+class TopKCounter:
+    """Counts of the most frequent keys in bounded memory.
+
+    Keys are counted exactly until there are twice `capacity` of them; then
+    only the `capacity` largest are kept. A dropped key that comes back
+    starts again from zero, so every kept count may be short by at most
+    `error`, the largest count ever dropped.
+    """
+
+    __slots__ = ('capacity', 'counts', 'error')
+
+    def __init__(self, capacity: int = PAIR_CAPACITY):
+        self.capacity = capacity
+        self.counts: Dict[Hashable, int] = {}
+        self.error = 0
+
+    def add(self, key: Hashable, count: int = 1):
+        if key in self.counts:
+            self.counts[key] += count
+        else:
+            self.counts[key] = count
+            if len(self.counts) > 2 * self.capacity:
+                self.prune()
+
+    def prune(self):
+        if len(self.counts) <= self.capacity:
+            return
+        ranked = sorted(self.counts.items(), key=lambda entry: entry[1], reverse=True)
+        self.error = max(self.error, ranked[self.capacity][1])
+        self.counts = dict(ranked[:self.capacity])
+
+
+class BasketDay:
+    """Basket, per-item and per-pair counts for baskets started on one day"""
+
+    __slots__ = ('baskets', 'items', 'pairs')
+
+    def __init__(self):
+        self.baskets = 0
+        self.items: Dict[int, int] = {}
+        self.pairs = TopKCounter()
+
+
+class _OpenBasket:
+    __slots__ = ('day', 'last_ts', 'items')
+
+    def __init__(self, day: datetime, last_ts: float):
+        self.day = day
+        self.last_ts = last_ts
+        self.items: Set[int] = set()
+
+
+class BasketAnalysis:
+    """Incremental "bought together" counts over baskets of sales.
+
+    Sales carry no basket id, so a basket is a run of sales from one source
+    (a till, or a checkout session at one location) with no gap longer than
+    BASKET_GAP. Each sale
+    adds pairs with the items already in its open basket, so the work per
+    sale is bounded by MAX_BASKET_ITEMS and history is never rescanned.
+    Counts are bucketed by the day a basket started, so any window of whole
+    days can be summed.
+    """
+
+    def __init__(self, gap: float = BASKET_GAP):
+        self.gap = gap
+        self.days: Dict[datetime, BasketDay] = {}
+        self._open: Dict[Hashable, _OpenBasket] = {}
+        self._latest_day: Optional[datetime] = None
+
+    def record_sale(self, sale: Sale, source: Hashable = 'counter'):
+        basket = self._open.get(source)
+        if basket is None or abs(sale.sale_ts - basket.last_ts) > self.gap:
+            basket = self._open[source] = _OpenBasket(floor_day(datetime.fromtimestamp(sale.sale_ts)), sale.sale_ts)
+            self._day(basket.day).baskets += 1
+        basket.last_ts = sale.sale_ts
+
+        if sale.item_id in basket.items or len(basket.items) >= MAX_BASKET_ITEMS:
+            return
+        bucket = self.days[basket.day]
+        bucket.items[sale.item_id] = bucket.items.get(sale.item_id, 0) + 1
+        for other in basket.items:
+            bucket.pairs.add((other, sale.item_id) if other < sale.item_id else (sale.item_id, other))
+        basket.items.add(sale.item_id)
+
+    def _day(self, day: datetime) -> BasketDay:
+        bucket = self.days.get(day)
+        if bucket is None:
+            bucket = self.days[day] = BasketDay()
+            if self._latest_day is None or day > self._latest_day:
+                # The previous day is finished; trim it to its steady-state size
+                if self._latest_day is not None:
+                    self.days[self._latest_day].pairs.prune()
+                self._latest_day = day
+        return bucket
+
+    def top_pairs(self, start: datetime, end: datetime, limit: int = 20,
+                  item_id: Optional[int] = None) -> Dict[str, Any]:
+        """Most frequent item pairs in baskets started in [start, end), optionally only those with item_id"""
+        baskets = 0
+        item_counts: Dict[int, int] = {}
+        pair_counts: Dict[Tuple[int, int], int] = {}
+        error = 0
+        day = floor_day(start)
+        while day < end:
+            bucket = self.days.get(day)
+            if bucket is not None:
+                baskets += bucket.baskets
+                for key, count in bucket.items.items():
+                    item_counts[key] = item_counts.get(key, 0) + count
+                for key, count in bucket.pairs.counts.items():
+                    if item_id is None or item_id in key:
+                        pair_counts[key] = pair_counts.get(key, 0) + count
+                error += bucket.pairs.error
+            day += timedelta(days=1)
+
+        pairs = []
+        for (first, second), count in sorted(pair_counts.items(), key=lambda entry: entry[1], reverse=True)[:limit]:
+            pairs.append({
+                'items': [first, second],
+                'baskets': count,
+                'support': count / baskets,
+                'confidence': [count / item_counts[first], count / item_counts[second]],
+                'lift': count * baskets / (item_counts[first] * item_counts[second])
+            })
+        return {'baskets': baskets, 'max_error': error, 'pairs': pairs}
@@ -0,0 +1,73 @@
+import json
+import os
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Mapping, Optional, Tuple
+
+DEFAULT_REGISTRY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'business_types.json')
+
+# Optional JSON file with extra or overriding business types, same format as business_types.json
+CUSTOM_REGISTRY_ENV = 'BUSINESS_TYPES_FILE'
+
+
+class BusinessRegistry:
+    """Immutable business type and category definitions loaded from data files"""
+
+    def __init__(self, default_categories: Tuple[str, ...],
+                 business_types: Tuple[Mapping[str, str], ...],
+                 categories: Mapping[str, Tuple[str, ...]]):
+        self.default_categories = default_categories
+        self.business_types = business_types
+        self.categories = categories
+
+    def categories_for(self, business_type: str) -> Tuple[str, ...]:
+        """Get the categories for a business type, falling back to the defaults"""
+        return self.categories.get(business_type.lower(), self.default_categories)
+
+
+def _read_definitions(path: str) -> dict:
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+@lru_cache(maxsize=None)
+def load_registry(path: str = DEFAULT_REGISTRY_PATH, custom_path: Optional[str] = None) -> BusinessRegistry:
+    """Load (once per path pair) the business registry, merging any custom types over the built-ins"""
+    definitions = _read_definitions(path)
+    default_categories = tuple(definitions.get('default_categories', ('General', 'Other')))
+
+    types = {}
+    for entry in definitions['business_types']:
+        types[entry['id']] = entry
+
+    if custom_path:
+        custom = _read_definitions(custom_path)
+        for entry in custom.get('business_types', []):
+            # Custom entries override built-ins with the same id and may omit unchanged fields
+            types[entry['id']] = dict(types.get(entry['id'], {}), **entry)
+
+    # Keep the catch-all 'other' type at the end of the list
+    ordered = [entry for type_id, entry in types.items() if type_id != 'other']
+    if 'other' in types:
+        ordered.append(types['other'])
+
+    business_types = tuple(
+        MappingProxyType({
+            'id': entry['id'],
+            'name': entry.get('name', entry['id'].replace('_', ' ').title()),
+            'description': entry.get('description', '')
+        })
+        for entry in ordered
+    )
+    categories = MappingProxyType({
+        entry['id'].lower(): tuple(entry['categories'])
+        for entry in ordered
+        if entry.get('categories')
+    })
+
+    return BusinessRegistry(default_categories, business_types, categories)
+
+
+def get_registry() -> BusinessRegistry:
+    """Get the process-wide registry, honouring the BUSINESS_TYPES_FILE override"""
+    return load_registry(DEFAULT_REGISTRY_PATH, os.environ.get(CUSTOM_REGISTRY_ENV) or None)
@@ -1,304 +1,95 @@
+import copy
 import json
 import csv
 from datetime import datetime, timedelta
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 import os
+import threading
+import time
+import uuid
+
+from sales_rollups import SalesRollups, day_bounds, floor_day, sales_analytics
+from margin_analytics import MarginAnalytics
+from business_registry import get_registry
+from stock_ledger import StockLedger, ADJUSTMENT_REASONS
+from day_close import DayCloseStore, add_snapshot, build_snapshot, combine_snapshots, days_between
+from sales_store import SalesStore
+from memory_usage import estimate_bytes
+from records import Item, Sale, InventoryEntry, Alert, to_timestamp
+from till_sync import TillState, parse_till_sale, till_sale_key, MAX_BATCH
+from search_suggestions import SuggestionCache
+from sales_anomalies import SalesAnomalyDetector
+from basket_analysis import BasketAnalysis
+from sales_sketches import SalesSketches
+from locations import DEFAULT_LOCATION, DEFAULT_LOCATION_NAME, LocationStock, make_location
+from offload import freeze, thaw
+
+# Optional cap on resident sales; older sales spill under SALES_SPILL_DIR (a temp dir if unset)
+SALES_MEMORY_BUDGET_MB = os.environ.get('SALES_MEMORY_BUDGET_MB')
+
+# Optional hot window: sales older than this many days are moved to the compressed archive
+SALES_HOT_DAYS = os.environ.get('SALES_HOT_DAYS')
+
+# Default for the approximate analytics setting, for stores whose history makes exact top items slow
+APPROXIMATE_ANALYTICS = os.environ.get('APPROXIMATE_ANALYTICS', '0') == '1'
+
+# Exact analytics over at least this many days run on the offload executor, when one is set
+OFFLOAD_ANALYTICS_DAYS = int(os.environ.get('OFFLOAD_ANALYTICS_DAYS', 90))
 
 class DataManager:
     def _get_default_categories(self):
         """Get default generic categories"""
-        return [
-            'General',
-            'Other'
-        ]
+        return list(get_registry().default_categories)
     
     def _get_business_categories(self, business_type: str) -> List[str]:
         """Get categories based on business type"""
-        business_category_map = {
-            'grocery': [
-                'Fruits & Vegetables',
-                'Dairy & Eggs',
-                'Meat & Poultry',
-                'Beverages',
-                'Snacks & Confectionery',
-                'Canned & Packaged Foods',
-                'Spices & Condiments',
-                'Bread & Bakery',
-                'Household Items',
-                'Personal Care',
-                'Other'
-            ],
-            'electronics': [
-                'Mobile Phones & Accessories',
-                'Computers & Laptops',
-                'Audio & Video',
-                'Gaming',
-                'Home Appliances',
-                'Cables & Chargers',
-                'Storage Devices',
-                'Cameras & Photography',
-                'Electronic Components',
-                'Batteries & Power',
-                'Other'
-            ],
-            'hair_salon': [
-                'Hair Care Products',
-                'Hair Styling Tools',
-                'Hair Color & Dyes',
-                'Hair Extensions',
-                'Salon Equipment',
-                'Beauty Accessories',
-                'Skin Care',
-                'Nail Care',
-                'Professional Tools',
-                'Salon Supplies',
-                'Other'
-            ],
-            'tailoring': [
-                'Fabrics',
-                'Threads & Yarns',
-                'Buttons & Fasteners',
-                'Zippers',
-                'Sewing Tools',
-                'Measuring Tools',
-                'Patterns',
-                'Embellishments',
-                'Interfacing',
-                'Sewing Machine Parts',
-                'Other'
-            ],
-            'pharmacy': [
-                'Prescription Medicines',
-                'Over-the-Counter Medicines',
-                'Vitamins & Supplements',
-                'Personal Care',
-                'Baby Care',
-                'First Aid',
-                'Medical Devices',
-                'Health Monitoring',
-                'Herbal Products',
-                'Beauty & Cosmetics',
-                'Other'
-            ],
-            'restaurant': [
-                'Appetizers',
-                'Main Courses',
-                'Beverages',
-                'Desserts',
-                'Snacks',
-                'Breakfast Items',
-                'Lunch Specials',
-                'Dinner Specials',
-                'Vegetarian',
-                'Take Away',
-                'Other'
-            ],
-            'bookstore': [
-                'Fiction',
-                'Non-Fiction',
-                'Educational',
-                'Children\'s Books',
-                'Stationery',
-                'Office Supplies',
-                'Art Supplies',
-                'Magazines',
-                'Religious Books',
-                'Reference Books',
-                'Other'
-            ],
-            'clothing': [
-                'Men\'s Clothing',
-                'Women\'s Clothing',
-                'Children\'s Clothing',
-                'Shoes',
-                'Accessories',
-                'Bags & Purses',
-                'Jewelry',
-                'Undergarments',
-                'Sportswear',
-                'Traditional Wear',
-                'Other'
-            ],
-            'auto_parts': [
-                'Engine Parts',
-                'Brake Parts',
-                'Electrical Components',
-                'Body Parts',
-                'Filters',
-                'Oils & Fluids',
-                'Tires & Wheels',
-                'Accessories',
-                'Tools',
-                'Car Care Products',
-                'Other'
-            ],
-            'bakery': [
-                'Bread & Rolls',
-                'Cakes & Cupcakes',
-                'Pastries',
-                'Cookies & Biscuits',
-                'Pies & Tarts',
-                'Baking Ingredients',
-                'Decorating Supplies',
-                'Seasonal Items',
-                'Custom Orders',
-                'Beverages',
-                'Other'
-            ],
-            'hardware': [
-                'Hand Tools',
-                'Power Tools',
-                'Fasteners',
-                'Electrical Supplies',
-                'Plumbing Supplies',
-                'Paint & Finishes',
-                'Building Materials',
-                'Safety Equipment',
-                'Garden Tools',
-                'Hardware Accessories',
-                'Other'
-            ],
-            'jewelry': [
-                'Rings',
-                'Necklaces',
-                'Earrings',
-                'Bracelets',
-                'Watches',
-                'Precious Metals',
-                'Gemstones',
-                'Custom Jewelry',
-                'Repair Services',
-                'Accessories',
-                'Other'
-            ],
-            'sports': [
-                'Football Equipment',
-                'Basketball Equipment',
-                'Tennis Equipment',
-                'Fitness Equipment',
-                'Athletic Wear',
-                'Sports Shoes',
-                'Outdoor Gear',
-                'Team Sports',
-                'Individual Sports',
-                'Accessories',
-                'Other'
-            ],
-            'pet_store': [
-                'Dog Supplies',
-                'Cat Supplies',
-                'Bird Supplies',
-                'Fish & Aquarium',
-                'Small Animals',
-                'Pet Food',
-                'Toys & Treats',
-                'Health & Medicine',
-                'Grooming Supplies',
-                'Accessories',
-                'Other'
-            ],
-            'flower_shop': [
-                'Fresh Flowers',
-                'Potted Plants',
-                'Seeds & Bulbs',
-                'Garden Tools',
-                'Fertilizers',
-                'Pots & Planters',
-                'Floral Arrangements',
-                'Wedding Flowers',
-                'Funeral Flowers',
-                'Decorative Items',
-                'Other'
-            ],
-            'office_supplies': [
-                'Writing Instruments',
-                'Paper Products',
-                'Filing & Storage',
-                'Desktop Accessories',
-                'Technology',
-                'Furniture',
-                'Printing Supplies',
-                'Presentation Materials',
-                'Binding & Laminating',
-                'Office Machines',
-                'Other'
-            ],
-            'cosmetics': [
-                'Facial Care',
-                'Body Care',
-                'Hair Care',
-                'Makeup',
-                'Perfumes',
-                'Nail Care',
-                'Men\'s Grooming',
-                'Tools & Accessories',
-                'Gift Sets',
-                'Natural Products',
-                'Other'
-            ],
-            'toy_store': [
-                'Action Figures',
-                'Dolls & Accessories',
-                'Educational Toys',
-                'Board Games',
-                'Electronic Toys',
-                'Outdoor Toys',
-                'Arts & Crafts',
-                'Puzzles',
-                'Baby Toys',
-                'Remote Control',
-                'Other'
-            ],
-            'mobile_shop': [
-                'Smartphones',
-                'Feature Phones',
-                'Cases & Covers',
-                'Screen Protectors',
-                'Chargers & Cables',
-                'Headphones',
-                'Memory Cards',
-                'Power Banks',
-                'Repair Parts',
-                'Accessories',
-                'Other'
-            ],
-            'furniture': [
-                'Living Room',
-                'Bedroom',
-                'Dining Room',
-                'Office Furniture',
-                'Storage Solutions',
-                'Outdoor Furniture',
-                'Mattresses',
-                'Home Decor',
-                'Lighting',
-                'Kitchen Furniture',
-                'Other'
-            ],
-            'general_store': [
-                'Food Items',
-                'Beverages',
-                'Household Items',
-                'Personal Care',
-                'Stationery',
-                'Electronics',
-                'Clothing',
-                'Tools',
-                'Seasonal Items',
-                'Miscellaneous',
-                'Other'
-            ]
-        }
-        
-        return business_category_map.get(business_type.lower(), self._get_default_categories())
+        return list(get_registry().categories_for(business_type))
     
     def __init__(self):
         self.items = []
-        self.sales = []
-        self.inventory = {}
+        self.items_by_id = {}
+        self.sales = SalesStore(
+            budget_bytes=int(float(SALES_MEMORY_BUDGET_MB) * 1024 * 1024) if SALES_MEMORY_BUDGET_MB else None,
+            spill_dir=os.environ.get('SALES_SPILL_DIR')
+        )
+        self.inventory = {}  # Chain-wide stock per item
+        self.locations = {DEFAULT_LOCATION: make_location(DEFAULT_LOCATION, DEFAULT_LOCATION_NAME)}
+        self.location_stock = LocationStock()
         self.alerts = []
+        # The active alert per (type, item, location), so a repeated check adds no second alert
+        self.active_alerts = {}
+        self.rollups = SalesRollups()
+        # Per-location rollups, kept once there is more than one location (until then the chain's are the main store's)
+        self.location_rollups = {}
+        self.margins = MarginAnalytics(self.rollups)
+        self.anomalies = SalesAnomalyDetector()
+        self.baskets = BasketAnalysis()
+        self.sketches = SalesSketches()
+        self.price_history = {}
+        self.stock_ledger = StockLedger(spill_dir=os.environ.get('SALES_SPILL_DIR'))
+        self.day_closes = DayCloseStore(os.environ.get('DAY_CLOSE_FILE'))
+        # Guards sales, stock and aggregates against background jobs running alongside requests
+        self.lock = threading.RLock()
+        # Identifies this in-memory store; progress saved against it (import checkpoints) is void once it is gone
+        self.store_id = uuid.uuid4().hex
+        # Set on a replication primary; every mutation is appended to it
+        self.mutation_log = None
+        # OffloadExecutor for long exact analytics, set by the app; None computes inline
+        self.executor = None
+        # Bumped on every catalog or stock change; tills ask for changes since the version they hold
+        self.catalog_version = 0
+        self.item_versions = {}
+        # Version of each item's last name/price change, for views that do not show stock
+        self.item_detail_versions = {}
+        self.details_version = 0  # Catalog version of the latest name/price change
+        self.suggestions = SuggestionCache()
+        self.tills = {}
         self.settings = {
             'low_stock_threshold': 5,
+            'day_close_time': '00:15',  # Closes the previous day
+            'margin_erosion_threshold': 5.0,  # Percentage points
+            'anomaly_threshold': 4.0,  # Standard deviations from an item's usual price or quantity
+            'approximate_analytics': APPROXIMATE_ANALYTICS,  # Top items from sketches instead of exact per-item totals
             'currency': 'K',  # Kwacha
             'business_type': None,
             'business_name': None,
@@ -311,27 +102,61 @@ class DataManager:
         """Initialize with some basic item categories - no sample data"""
         self.item_categories = self.business_categories.copy()
     
-    def add_item(self, name: str, category: str, cost_price: float, selling_price: float, initial_stock: int = 0) -> Dict:
+    def add_item(self, name: str, category: str, cost_price: float, selling_price: float, initial_stock: int = 0,
+                 location: str = DEFAULT_LOCATION) -> Item:
         """Add a new item to the catalog"""
-        item_id = len(self.items) + 1
-        item = {
-            'id': item_id,
-            'name': name.strip().title(),
-            'category': category,
-            'cost_price': float(cost_price),
-            'selling_price': float(selling_price),
-            'created_date': datetime.now().isoformat(),
-            'active': True
-        }
-        self.items.append(item)
-        
-        # Initialize inventory
-        self.inventory[item_id] = {
-            'quantity': initial_stock,
-            'last_updated': datetime.now().isoformat()
-        }
-        
-        return item
+        with self.lock:
+            item_id = len(self.items) + 1
+            item = Item(item_id, name.strip().title(), category, float(cost_price), float(selling_price), time.time())
+            self.items.append(item)
+            self.items_by_id[item_id] = item
+            self.price_history[item_id] = [{
+                'cost_price': item['cost_price'],
+                'selling_price': item['selling_price'],
+                'effective_date': item['created_date']
+            }]
+            
+            # Initialize inventory
+            self.inventory[item_id] = InventoryEntry(0, item.created_ts)
+            self._touch_item(item_id, details=True)
+            self._publish('item', {'row': item.to_row(), 'price': self.price_history[item_id][-1]})
+            if initial_stock:
+                self._record_stock_movement(item_id, initial_stock, 'initial', location=self._location(location))
+            
+            return item
+    
+    def update_item_prices(self, item_id: int, cost_price: float = None, selling_price: float = None) -> Item:
+        """Change an item's cost and/or selling price, keeping the previous values in its price history"""
+        with self.lock:
+            item = self.get_item_by_id(item_id)
+            if not item:
+                raise ValueError("Item not found")
+            
+            new_cost = item['cost_price'] if cost_price is None else float(cost_price)
+            new_selling = item['selling_price'] if selling_price is None else float(selling_price)
+            if new_cost < 0 or new_selling < 0:
+                raise ValueError("Prices cannot be negative")
+            
+            if new_cost == item['cost_price'] and new_selling == item['selling_price']:
+                return item
+            
+            if new_selling != item['selling_price']:
+                self.anomalies.reset_prices(item_id)
+            item['cost_price'] = new_cost
+            item['selling_price'] = new_selling
+            self.price_history.setdefault(item_id, []).append({
+                'cost_price': new_cost,
+                'selling_price': new_selling,
+                'effective_date': datetime.now().isoformat()
+            })
+            self._touch_item(item_id, details=True)
+            self._publish('item', {'row': item.to_row(), 'price': self.price_history[item_id][-1]})
+            
+            return item
+    
+    def get_price_history(self, item_id: int) -> List[Dict]:
+        """Get an item's cost/selling price changes, oldest first"""
+        return self.price_history.get(item_id, [])
     
     def search_items(self, query: str) -> List[Dict]:
         """Search items by name with suggestions"""
@@ -361,191 +186,641 @@ class DataManager:
         if not query or len(query) < 2:
             return []
         
-        query = query.lower().strip()
-        suggestions = []
+        return self.suggestions.lookup(query, self.details_version, self._match_item_names)
+    
+    def _match_item_names(self, query: str) -> List[tuple]:
+        """All distinct active item names containing the (lowercased) query, as (lowercased, name) pairs"""
+        matches = []
+        seen = set()
         
         for item in self.items:
             if not item['active']:
                 continue
             
             item_name = item['name'].lower()
-            if query in item_name and item['name'] not in suggestions:
-                suggestions.append(item['name'])
+            if query in item_name and item['name'] not in seen:
+                seen.add(item['name'])
+                matches.append((item_name, item['name']))
         
-        return suggestions[:10]
+        return matches
     
-    def add_sale(self, item_id: int, quantity: int, sale_price: float, notes: str = '') -> Dict:
-        """Record a sale"""
-        item = self.get_item_by_id(item_id)
-        if not item:
-            raise ValueError("Item not found")
-        
-        # Check inventory
-        current_stock = self.inventory.get(item_id, {}).get('quantity', 0)
-        if current_stock < quantity:
-            raise ValueError(f"Insufficient stock. Available: {current_stock}")
-        
-        sale_id = len(self.sales) + 1
-        sale = {
-            'id': sale_id,
-            'item_id': item_id,
-            'item_name': item['name'],
-            'quantity': quantity,
-            'unit_price': float(sale_price),
-            'total_amount': float(sale_price * quantity),
-            'cost_price': item['cost_price'],
-            'profit': float((sale_price - item['cost_price']) * quantity),
-            'sale_date': datetime.now().isoformat(),
-            'notes': notes.strip()
-        }
+    def _build_sale(self, item: Item, quantity: int, sale_price: float, cost_price: float,
+                    sale_ts: float, notes: str = '', location: str = DEFAULT_LOCATION) -> Sale:
+        """Build a sale record with the item's name, category and cost snapshotted"""
+        return Sale(
+            len(self.sales) + 1,
+            item.id,
+            item.name,
+            item.category,
+            quantity,
+            float(sale_price),
+            float(sale_price * quantity),
+            float(cost_price),
+            float((sale_price - cost_price) * quantity),
+            sale_ts,
+            notes.strip(),
+            location
+        )
+    
+    def add_sale(self, item_id: int, quantity: int, sale_price: float, notes: str = '',
+                 location: str = DEFAULT_LOCATION, basket_id: str = None) -> Sale:
+        """Record a sale
         
+        Sales with the same basket_id (a checkout, or the browser session
+        ringing them up) at the same location group into baskets.
+        """
+        with self.lock:
+            item = self.get_item_by_id(item_id)
+            if not item:
+                raise ValueError("Item not found")
+            location = self._location(location)
+            
+            # Check inventory
+            current_stock = self.location_stock.quantity(location, item_id)
+            if current_stock < quantity:
+                raise ValueError(f"Insufficient stock. Available: {current_stock}")
+            
+            sale = self._build_sale(item, quantity, sale_price, item.cost_price, time.time(), notes, location)
+            
+            source = f"counter:{basket_id}" if basket_id else 'counter'
+            self._store_sale(sale, source)
+            self._publish('sales', {'source': source, 'rows': [sale.to_row()]})
+            
+            # Update inventory
+            self._record_stock_movement(item_id, -quantity, 'sale', reference=sale['id'], location=location)
+            
+            # Check for low stock alert
+            self._check_low_stock_alert(item_id, location)
+            self._check_sale_anomalies(sale)
+            
+            return sale
+    
+    def _store_sale(self, sale: Sale, source: str = 'counter'):
+        """Keep a sale and fold it into every aggregate maintained per sale"""
         self.sales.append(sale)
+        self.rollups.record_sale(sale)
+        if self.location_rollups:
+            self.location_rollups[sale.location].record_sale(sale)
+        self.sketches.record_sale(sale)
+        self.baskets.record_sale(sale, (source, sale.location))
+    
+    def import_sales(self, records: List[Dict]) -> int:
+        """Load historical sales directly, skipping stock checks and alert generation
         
-        # Update inventory
-        self.inventory[item_id]['quantity'] -= quantity
-        self.inventory[item_id]['last_updated'] = datetime.now().isoformat()
-        
-        # Check for low stock alert
-        self._check_low_stock_alert(item_id)
+        Each record needs 'item', 'quantity', 'unit_price' and 'sale_date';
+        'cost_price' defaults to the item's current cost.
+        """
+        with self.lock:
+            rows = []
+            stored = []
+            for record in records:
+                item = record['item']
+                cost_price = record.get('cost_price')
+                sale = self._build_sale(
+                    item,
+                    record['quantity'],
+                    record['unit_price'],
+                    item['cost_price'] if cost_price is None else cost_price,
+                    to_timestamp(record['sale_date']),
+                    record.get('notes', ''),
+                    self._location(record.get('location'))
+                )
+                self._store_sale(sale, 'import')
+                self.anomalies.observe(sale.item_id, sale.unit_price, sale.quantity,
+                                       self.settings['anomaly_threshold'])
+                rows.append(sale.to_row())
+                stored.append(sale)
+            self._publish('sales', {'source': 'import', 'rows': rows})
+            self._amend_closed_days(stored)
+            
+            return len(records)
+    
+    def _record_stock_movement(self, item_id: int, change: int, movement_type: str,
+                               reason: str = None, reference: Any = None, location: str = DEFAULT_LOCATION) -> Dict:
+        """Append a stock movement to the ledger and refresh the inventory projection"""
+        movement = self.stock_ledger.record(item_id, change, movement_type, reason=reason, reference=reference,
+                                            location=location)
+        self._publish('stock', movement)
+        self._project_stock(movement)
+        return movement
+    
+    def _project_stock(self, movement: Dict):
+        """Refresh the inventory projection from a ledger movement"""
+        item_id = movement['item_id']
+        updated_ts = to_timestamp(movement['date'])
+        stock_info = self.inventory.get(item_id)
+        if stock_info is None:
+            self.inventory[item_id] = InventoryEntry(movement['balance'], updated_ts)
+        else:
+            stock_info.quantity = movement['balance']
+            stock_info.updated_ts = updated_ts
+        self.location_stock.apply(movement['location'], item_id, movement['location_balance'], updated_ts)
+        self._touch_item(item_id)
+    
+    def _touch_item(self, item_id: int, details: bool = False):
+        """Mark an item's stock, or with details=True its catalog entry, as changed"""
+        self.catalog_version += 1
+        self.item_versions[item_id] = self.catalog_version
+        if details:
+            self.item_detail_versions[item_id] = self.catalog_version
+            self.details_version = self.catalog_version
+    
+    def get_catalog_changes(self, since_version: int = 0, location: str = None) -> Dict:
+        """Get items whose details or stock changed after the given catalog version
         
-        return sale
+        Stock is chain-wide, or at one location when given.
+        """
+        changed = [item_id for item_id, version in self.item_versions.items() if version > since_version]
+        stock = self.inventory if location is None else self.location_stock.at(location)
+        return {
+            'version': self.catalog_version,
+            'items': [self.get_item_by_id(item_id).to_dict() for item_id in changed],
+            'stock': {item_id: stock[item_id].quantity for item_id in changed if item_id in stock}
+        }
     
-    def update_inventory(self, item_id: int, quantity: int, operation: str = 'add') -> Dict:
-        """Update inventory quantity"""
-        if item_id not in self.inventory:
-            self.inventory[item_id] = {'quantity': 0, 'last_updated': datetime.now().isoformat()}
+    def sync_till(self, till_id: str, sales: List[Dict], since_version: int = 0,
+                  location: str = DEFAULT_LOCATION) -> Dict:
+        """Apply a batch of offline sales from a till and return what changed since its last sync
         
-        if operation == 'add':
-            self.inventory[item_id]['quantity'] += quantity
-        elif operation == 'set':
-            self.inventory[item_id]['quantity'] = quantity
-        elif operation == 'subtract':
-            self.inventory[item_id]['quantity'] = max(0, self.inventory[item_id]['quantity'] - quantity)
+        Sales are idempotent by (sequence number, client id): resent sales are
+        reported as duplicates, not recorded twice, and rejected ones are
+        rejected again. They are applied even when
+        stock runs out, since the goods have already left the shop; those sales
+        are reported as conflicts and raise the usual low stock alert.
+        """
+        if len(sales) > MAX_BATCH:
+            raise ValueError(f"At most {MAX_BATCH} sales per sync")
         
-        self.inventory[item_id]['last_updated'] = datetime.now().isoformat()
+        with self.lock:
+            location = self._location(location)
+            state = self.tills.setdefault(till_id, TillState())
+            results = []
+            conflicts = []
+            stored = []
+            
+            parsed = []
+            for raw in sales:
+                try:
+                    parsed.append(parse_till_sale(raw))
+                except ValueError as e:
+                    key = till_sale_key(raw)
+                    if key is not None:
+                        state.reject(*key, str(e))
+                    results.append({'client_id': key[1] if key else None, 'status': 'rejected',
+                                    'message': str(e)})
+            
+            for sale_input in sorted(parsed, key=lambda x: x['seq']):
+                client_id = sale_input['client_id']
+                try:
+                    earlier = state.find(sale_input['seq'], client_id)
+                    if earlier is None:
+                        state.check_room(sale_input['seq'])
+                except ValueError as e:
+                    results.append({'client_id': client_id, 'status': 'rejected', 'message': str(e)})
+                    continue
+                if earlier is not None:
+                    if earlier.get('message'):
+                        results.append({'client_id': client_id, 'status': 'rejected',
+                                        'message': earlier['message']})
+                    else:
+                        results.append({'client_id': client_id, 'status': 'duplicate',
+                                        'sale_id': earlier['sale_id']})
+                    continue
+                
+                item = self.get_item_by_id(sale_input['item_id'])
+                if item is None:
+                    state.record(sale_input['seq'], client_id, None, 'Item not found')
+                    results.append({'client_id': client_id, 'status': 'rejected', 'message': 'Item not found'})
+                    continue
+                
+                try:
+                    sale_ts = to_timestamp(sale_input['sale_date']) if sale_input['sale_date'] else time.time()
+                except (TypeError, ValueError):
+                    sale_ts = time.time()
+                
+                sale = self._build_sale(item, sale_input['quantity'], sale_input['sale_price'], item.cost_price,
+                                        sale_ts, sale_input['notes'], location)
+                self._store_sale(sale, till_id)
+                self._publish('sales', {'source': till_id, 'rows': [sale.to_row()]})
+                movement = self._record_stock_movement(item.id, -sale.quantity, 'sale', reference=sale.id,
+                                                       location=location)
+                self._check_low_stock_alert(item.id, location)
+                self._check_sale_anomalies(sale)
+                
+                state.record(sale_input['seq'], client_id, sale.id)
+                stored.append(sale)
+                results.append({'client_id': client_id, 'status': 'applied', 'sale_id': sale.id})
+                if movement['location_balance'] < 0:
+                    conflicts.append({'client_id': client_id, 'type': 'oversold', 'item_id': item.id,
+                                      'item_name': item.name, 'stock': movement['location_balance']})
+            
+            self._amend_closed_days(stored)
+            state.last_sync = datetime.now().isoformat()
+            changes = self.get_catalog_changes(since_version, location)
+            changes.update({
+                'till_id': till_id,
+                'acked_seq': state.acked_seq,
+                'results': results,
+                'conflicts': conflicts
+            })
+            return changes
+    
+    def update_inventory(self, item_id: int, quantity: int, operation: str = 'add', reason: str = None,
+                         location: str = DEFAULT_LOCATION) -> InventoryEntry:
+        """Update inventory quantity at a location
         
-        # Check for low stock alert
-        self._check_low_stock_alert(item_id)
+        'add' is recorded as a receipt unless a reason is given, 'set' as a
+        stock count and 'subtract' (which never goes below zero) as a correction.
+        """
+        with self.lock:
+            location = self._location(location)
+            if item_id not in self.inventory:
+                self.inventory[item_id] = InventoryEntry(0, time.time())
+            
+            if reason is not None and reason not in ADJUSTMENT_REASONS:
+                raise ValueError(f"Unknown adjustment reason '{reason}'")
+            
+            current = self.stock_ledger.balance(item_id, location)
+            if operation == 'add':
+                change = quantity
+            elif operation == 'set':
+                change = quantity - current
+                reason = reason or 'count'
+            elif operation == 'subtract':
+                change = -min(quantity, max(current, 0))
+                reason = reason or 'correction'
+            else:
+                raise ValueError(f"Unknown inventory operation '{operation}'")
+            
+            if change:
+                movement_type = 'receipt' if operation == 'add' and reason is None else 'adjustment'
+                self._record_stock_movement(item_id, change, movement_type, reason=reason, location=location)
+            else:
+                self.inventory[item_id].updated_ts = time.time()
+                self.location_stock.apply(location, item_id, current, time.time())
+            
+            # Check for low stock alert
+            self._check_low_stock_alert(item_id, location)
+            
+            return self.location_stock.get(location, item_id)
+    
+    def transfer_stock(self, item_id: int, quantity: int, from_location: str, to_location: str) -> Dict:
+        """Move stock between locations as a pair of transfer movements
         
-        return self.inventory[item_id]
+        The chain-wide balance is unchanged; the source may not go below zero.
+        """
+        with self.lock:
+            item = self.get_item_by_id(item_id)
+            if not item:
+                raise ValueError("Item not found")
+            from_location = self._location(from_location)
+            to_location = self._location(to_location)
+            if from_location == to_location:
+                raise ValueError("Choose two different locations")
+            if quantity <= 0:
+                raise ValueError("Quantity must be positive")
+            
+            available = self.stock_ledger.balance(item_id, from_location)
+            if available < quantity:
+                raise ValueError(f"Insufficient stock at {self.locations[from_location]['name']}. Available: {available}")
+            
+            outgoing = self._record_stock_movement(item_id, -quantity, 'transfer', reference=to_location,
+                                                   location=from_location)
+            incoming = self._record_stock_movement(item_id, quantity, 'transfer', reference=from_location,
+                                                   location=to_location)
+            self._check_low_stock_alert(item_id, from_location)
+            
+            return {'item_id': item_id, 'quantity': quantity, 'from': outgoing, 'to': incoming}
+    
+    def _location(self, code: Optional[str]) -> str:
+        """Normalise a location code (None meaning the main store), raising ValueError if unknown"""
+        if code is None:
+            return DEFAULT_LOCATION
+        code = code.strip().lower()
+        if code not in self.locations:
+            raise ValueError(f"Unknown location '{code}'")
+        return code
+    
+    def get_low_stock_threshold(self, location: str = None) -> int:
+        """A location's own low stock threshold, or the store-wide setting (also used chain-wide)"""
+        threshold = None if location is None else self.locations[self._location(location)]['low_stock_threshold']
+        return self.settings['low_stock_threshold'] if threshold is None else threshold
+    
+    def save_location(self, code: str, name: str, low_stock_threshold: int = None) -> Dict:
+        """Add a location, or rename it / change its low stock threshold"""
+        with self.lock:
+            location = make_location(code, name, low_stock_threshold)
+            self._add_location(location)
+            self._publish('location', location)
+            return location
+    
+    def _add_location(self, location: Dict):
+        if location['code'] not in self.locations:
+            if not self.location_rollups:
+                # Until now every sale was the main store's, so its rollups start as a copy of the chain's
+                self.location_rollups[DEFAULT_LOCATION] = copy.deepcopy(self.rollups)
+            self.location_rollups[location['code']] = SalesRollups()
+        self.locations[location['code']] = location
+    
+    def get_locations(self) -> List[Dict]:
+        """Get every location with its stock totals"""
+        locations = []
+        for code, location in self.locations.items():
+            threshold = self.get_low_stock_threshold(code)
+            entries = self.location_stock.at(code)
+            locations.append(dict(
+                location,
+                items=sum(1 for entry in entries.values() if entry.quantity > 0),
+                quantity=sum(entry.quantity for entry in entries.values()),
+                low_stock=sum(
+                    1 for item_id, entry in entries.items()
+                    if entry.quantity <= threshold and self.get_item_by_id(item_id).active
+                )
+            ))
+        return locations
+    
+    def get_stock_movements(self, item_id: int = None, limit: int = None, location: str = None) -> List[Dict]:
+        """Get stock movements, newest first"""
+        return self.stock_ledger.history(item_id, limit, location)
     
-    def get_item_by_id(self, item_id: int) -> Dict:
+    def get_stock_on_date(self, date: datetime) -> List[Dict]:
+        """Get stock levels for every item as of the given moment"""
+        balances = self.stock_ledger.balances_at(date.isoformat())
+        return [
+            {
+                'item': item,
+                'quantity': balances.get(item['id'], 0),
+                'value': item['cost_price'] * balances.get(item['id'], 0)
+            }
+            for item in self.items
+            if item.created_ts <= date.timestamp()
+        ]
+    
+    def get_item_by_id(self, item_id: int) -> Optional[Item]:
         """Get item by ID"""
-        for item in self.items:
-            if item['id'] == item_id:
-                return item
-        return None
+        return self.items_by_id.get(item_id)
     
-    def get_inventory_status(self) -> List[Dict]:
-        """Get current inventory status with item details"""
+    def get_inventory_status(self, location: str = None) -> List[Dict]:
+        """Get current inventory status with item details, chain-wide or for the items stocked at one location"""
         inventory_status = []
         
-        for item in self.items:
+        if location is None:
+            threshold = self.settings['low_stock_threshold']
+            entries = ((item, self.inventory.get(item['id'])) for item in self.items)
+        else:
+            location = self._location(location)
+            threshold = self.get_low_stock_threshold(location)
+            entries = ((self.get_item_by_id(item_id), entry)
+                       for item_id, entry in self.location_stock.at(location).items())
+        
+        for item, stock_info in entries:
             if not item['active']:
                 continue
                 
-            item_id = item['id']
-            stock_info = self.inventory.get(item_id, {'quantity': 0, 'last_updated': datetime.now().isoformat()})
+            stock_info = stock_info or InventoryEntry(0, time.time())
             
             status = {
                 'item': item,
                 'quantity': stock_info['quantity'],
                 'last_updated': stock_info['last_updated'],
-                'is_low_stock': stock_info['quantity'] <= self.settings['low_stock_threshold'],
+                'is_low_stock': stock_info['quantity'] <= threshold,
                 'total_value': item['selling_price'] * stock_info['quantity']
             }
             inventory_status.append(status)
         
         return inventory_status
     
-    def _check_low_stock_alert(self, item_id: int):
+    def get_item_locations(self, item_id: int) -> List[Dict]:
+        """Get an item's stock at every location that has held it"""
+        return [
+            {
+                'location': location,
+                'name': self.locations[location]['name'],
+                'quantity': entry.quantity,
+                'last_updated': entry.last_updated,
+                'is_low_stock': entry.quantity <= self.get_low_stock_threshold(location)
+            }
+            for location, entry in self.location_stock.of(item_id).items()
+        ]
+    
+    def _has_active_alert(self, alert_type: str, item_id: int, location: str = DEFAULT_LOCATION) -> bool:
+        """Check whether an active alert of this type already exists for the item at a location"""
+        return (alert_type, item_id, location) in self.active_alerts
+    
+    def _index_alert(self, alert: Alert):
+        """Keep active_alerts in step with a new or changed alert"""
+        key = (alert.type, alert.item_id, alert.location)
+        if alert.active:
+            self.active_alerts[key] = alert
+        elif key in self.active_alerts and self.active_alerts[key].id == alert.id:
+            del self.active_alerts[key]
+    
+    def _create_alert(self, alert_type: str, item_id: int, item_name: str, message: str,
+                      location: str = DEFAULT_LOCATION) -> Optional[Alert]:
+        """Append a new active alert, unless one for the same item, type and location is still active"""
+        if self._has_active_alert(alert_type, item_id, location):
+            return None
+        alert = Alert(len(self.alerts) + 1, alert_type, item_id, item_name, message, time.time(), location=location)
+        self.alerts.append(alert)
+        self._index_alert(alert)
+        self._publish('alert', alert.to_row())
+        return alert
+    
+    def _check_low_stock_alert(self, item_id: int, location: str = DEFAULT_LOCATION):
         """Check and create low stock alert if needed"""
         item = self.get_item_by_id(item_id)
-        stock = self.inventory.get(item_id, {}).get('quantity', 0)
+        stock = self.location_stock.quantity(location, item_id)
         
-        if stock <= self.settings['low_stock_threshold']:
-            # Check if alert already exists
-            existing_alert = any(
-                alert['type'] == 'low_stock' and alert['item_id'] == item_id and alert['active']
-                for alert in self.alerts
+        if stock <= self.get_low_stock_threshold(location):
+            where = f" at {self.locations[location]['name']}" if len(self.locations) > 1 else ''
+            self._create_alert(
+                'low_stock', item_id, item['name'],
+                f"Low stock alert: {item['name']} has only {stock} units remaining{where}",
+                location
             )
-            
-            if not existing_alert:
-                alert = {
-                    'id': len(self.alerts) + 1,
-                    'type': 'low_stock',
-                    'item_id': item_id,
-                    'item_name': item['name'],
-                    'message': f"Low stock alert: {item['name']} has only {stock} units remaining",
-                    'created_date': datetime.now().isoformat(),
-                    'active': True
-                }
-                self.alerts.append(alert)
-    
-    def get_sales_analytics(self, days: int = 30) -> Dict:
-        """Get sales analytics for specified period"""
-        cutoff_date = datetime.now() - timedelta(days=days)
-        recent_sales = [
-            sale for sale in self.sales 
-            if datetime.fromisoformat(sale['sale_date']) >= cutoff_date
-        ]
+    
+    def get_sale_stats(self, item_id: int) -> Dict:
+        """Get the running price and quantity statistics anomaly checks use for an item"""
+        return self.anomalies.item_stats(item_id)
+    
+    def _check_sale_anomalies(self, sale: Sale):
+        """Raise an alert if a sale's price or quantity is far outside the item's usual range"""
+        currency = self.settings['currency']
+        for finding in self.anomalies.observe(sale.item_id, sale.unit_price, sale.quantity,
+                                              self.settings['anomaly_threshold']):
+            if finding['field'] == 'unit_price':
+                self._create_alert(
+                    'price_anomaly', sale.item_id, sale.item_name,
+                    f"Price check: sale #{sale.id} of {sale.item_name} was at {currency}{sale.unit_price:.2f} "
+                    f"per unit, usually around {currency}{finding['expected']:.2f}",
+                    sale.location
+                )
+            else:
+                self._create_alert(
+                    'quantity_anomaly', sale.item_id, sale.item_name,
+                    f"Quantity check: sale #{sale.id} of {sale.item_name} was {sale.quantity} units, "
+                    f"usually around {finding['expected']:.0f}",
+                    sale.location
+                )
+    
+    def sweep_alerts(self) -> List[Dict]:
+        """Re-check every active item for low stock and margin erosion, returning new alerts"""
+        with self.lock:
+            alert_count = len(self.alerts)
+            for item in self.items:
+                if item['active']:
+                    for location in self.location_stock.of(item['id']) or (DEFAULT_LOCATION,):
+                        self._check_low_stock_alert(item['id'], location)
+            self.check_margin_erosion()
+            return self.alerts[alert_count:]
+    
+    def get_sales_analytics(self, days: int = 30, approximate: bool = None, location: str = None) -> Dict:
+        """Get sales analytics for specified period, chain-wide or for one location
         
-        if not recent_sales:
-            return {
-                'total_sales': 0,
-                'total_revenue': 0,
-                'total_profit': 0,
-                'top_items': [],
-                'sales_by_day': [],
-                'category_performance': []
-            }
+        In approximate mode (the approximate_analytics setting by default) top
+        items and sale-size percentiles come from fixed-size sketches, so the
+        cost does not grow with the catalog or the history; totals, days and
+        categories stay exact over the same whole days the sketches cover.
+        The result then carries the error bounds and that window. Sketches
+        are chain-wide, so a single location is always exact. Only copying
+        the window's buckets out holds the store lock; the merge runs on a
+        copy, on the executor for exact windows of OFFLOAD_ANALYTICS_DAYS or
+        more.
+        """
+        rollups = self.rollups
+        if location is not None:
+            location = self._location(location)
+            rollups = self.location_rollups.get(location, self.rollups)
+            approximate = False
+        if approximate is None:
+            approximate = self.settings['approximate_analytics']
+        end_date = datetime.now()
+        cutoff_date = end_date - timedelta(days=days)
+        if approximate:
+            # Sketches only have day buckets; totals over a narrower window could be less than the top items
+            cutoff_date, end_date = day_bounds(cutoff_date, end_date)
         
-        # Calculate totals
-        total_revenue = sum(sale['total_amount'] for sale in recent_sales)
-        total_profit = sum(sale['profit'] for sale in recent_sales)
-        total_quantity = sum(sale['quantity'] for sale in recent_sales)
-        
-        # Top selling items
-        item_sales = {}
-        for sale in recent_sales:
-            item_id = sale['item_id']
-            if item_id not in item_sales:
-                item_sales[item_id] = {
-                    'item_name': sale['item_name'],
-                    'quantity': 0,
-                    'revenue': 0,
-                    'profit': 0
+        # Only the buckets the window touches are copied out, with the sketches' summary of the same sales
+        with self.lock:
+            snapshot = freeze(rollups.window(cutoff_date, end_date), cutoff_date, end_date)
+            sketched = self.sketches.summary(cutoff_date, end_date) if approximate else None
+        if self.executor is not None and not approximate and days >= OFFLOAD_ANALYTICS_DAYS:
+            analytics = self.executor.run(sales_analytics, snapshot)
+        else:
+            analytics = sales_analytics(*thaw(snapshot), item_breakdown=not approximate)
+        
+        if not analytics['total_sales']:
+            return analytics
+        analytics['period_days'] = days
+        
+        if approximate:
+            analytics['top_items'] = [
+                {
+                    'item_name': self.get_item_by_id(entry['item_id']).name,
+                    'quantity': round(entry['quantity']),
+                    'revenue': entry['revenue'],
+                    'profit': entry['profit']
                 }
-            item_sales[item_id]['quantity'] += sale['quantity']
-            item_sales[item_id]['revenue'] += sale['total_amount']
-            item_sales[item_id]['profit'] += sale['profit']
-        
-        top_items = sorted(item_sales.values(), key=lambda x: x['revenue'], reverse=True)[:10]
-        
-        # Sales by day
-        daily_sales = {}
-        for sale in recent_sales:
-            date = datetime.fromisoformat(sale['sale_date']).date().isoformat()
-            if date not in daily_sales:
-                daily_sales[date] = {'revenue': 0, 'quantity': 0}
-            daily_sales[date]['revenue'] += sale['total_amount']
-            daily_sales[date]['quantity'] += sale['quantity']
-        
-        sales_by_day = [
-            {'date': date, **data}
-            for date, data in sorted(daily_sales.items())
-        ]
+                for entry in sketched['top_items']
+            ]
+            analytics['approximate'] = True
+            analytics['sale_size_percentiles'] = sketched['sale_size_percentiles']
+            analytics['error_bounds'] = sketched['error_bounds']
+        if location is not None:
+            analytics['location'] = location
         
-        return {
-            'total_sales': len(recent_sales),
-            'total_revenue': total_revenue,
-            'total_profit': total_profit,
-            'total_quantity': total_quantity,
-            'average_sale': total_revenue / len(recent_sales) if recent_sales else 0,
-            'top_items': top_items,
-            'sales_by_day': sales_by_day,
-            'period_days': days
-        }
+        return analytics
+    
+    def get_approximate_summary(self, start: datetime, end: datetime, limit: int = 10) -> Dict:
+        """Get sketched top items and sale-size percentiles for the days in [start, end), with error bounds"""
+        with self.lock:
+            summary = self.sketches.summary(start, end, limit=limit)
+        for entry in summary['top_items']:
+            entry['item_name'] = self.get_item_by_id(entry['item_id']).name
+        return summary
+    
+    def query_sales(self, start: datetime, end: datetime, granularity: str = 'day',
+                    metric: str = 'revenue', group_by: Optional[str] = None, limit: int = 10) -> Dict:
+        """Get one time-bucketed sales series for an explicit date range"""
+        return self.rollups.series(start, end, granularity=granularity, metric=metric,
+                                   group_by=group_by, limit=limit)
+    
+    def iter_sales(self, start: datetime, end: datetime):
+        """Iterate over sales recorded in [start, end) without building a list"""
+        return self.sales.iter_range(start.timestamp(), end.timestamp())
+    
+    def get_recent_sales(self, limit: int = 20) -> List[Sale]:
+        """Get the latest sales, newest first"""
+        return self.sales.recent(limit)
+    
+    def archive_old_sales(self, days: int = None) -> int:
+        """Move sales older than the hot window into compressed archive segments"""
+        if days is None:
+            if not SALES_HOT_DAYS:
+                return 0
+            days = int(SALES_HOT_DAYS)
+        
+        cutoff = floor_day(datetime.now()) - timedelta(days=days)
+        with self.lock:
+            old = self.sales.resident_before(cutoff.timestamp())
+        if not old:
+            return 0
+        # Compressing and writing the segments is the slow part, and needs no lock
+        footers = self.sales.write_segments(old)
+        with self.lock:
+            return self.sales.commit_archive(old, footers)
+    
+    def get_archive_summary(self) -> List[Dict]:
+        """Get archived sales per month partition, read from segment footers"""
+        return self.sales.partitions()
+    
+    def get_sales_breakdown(self, start: datetime, end: datetime, group_by: str = 'item',
+                            metric: str = 'revenue', limit: int = 10) -> List[Dict]:
+        """Get per-item or per-category totals for an explicit date range, best first"""
+        breakdown = 'items' if group_by == 'item' else 'categories'
+        totals = self.rollups.aggregate(start, end, breakdowns=(breakdown,))[breakdown]
+        rows = [
+            {'key': key, 'label': data.get('item_name', key), **data}
+            for key, data in totals.items()
+        ]
+        return sorted(rows, key=lambda x: x[metric], reverse=True)[:limit]
+    
+    def get_margin_trend(self, start: datetime, end: datetime, granularity: str = 'day',
+                         group_by: Optional[str] = None, key: Any = None) -> Dict:
+        """Get gross margin per period, overall or for one item/category"""
+        return self.margins.trend(start, end, granularity=granularity, group_by=group_by, key=key)
+    
+    def get_frequent_pairs(self, start: datetime, end: datetime, limit: int = 20,
+                           item_id: Optional[int] = None) -> Dict:
+        """Get the item pairs most often bought together in baskets started on the days in [start, end)"""
+        with self.lock:
+            result = self.baskets.top_pairs(start, end, limit=limit, item_id=item_id)
+        for pair in result['pairs']:
+            pair['item_names'] = [self.get_item_by_id(item_id).name for item_id in pair['items']]
+        return result
+    
+    def get_margin_breakdown(self, start: datetime, end: datetime, group_by: str = 'item') -> List[Dict]:
+        """Get gross margin by item or category, lowest first"""
+        return self.margins.breakdown(start, end, group_by=group_by)
+    
+    def get_margin_erosion(self, recent_days: int = 7, baseline_days: int = 30, threshold: float = None) -> List[Dict]:
+        """Find items whose recent margin has eroded, without raising alerts"""
+        if threshold is None:
+            threshold = self.settings['margin_erosion_threshold']
+        with self.lock:
+            return self.margins.erosion(recent_days=recent_days, baseline_days=baseline_days, threshold=threshold)
+    
+    def check_margin_erosion(self, recent_days: int = 7, baseline_days: int = 30, threshold: float = None) -> List[Dict]:
+        """Find items whose recent margin has eroded and raise margin alerts for them"""
+        with self.lock:
+            findings = self.get_margin_erosion(recent_days, baseline_days, threshold)
+            for finding in findings:
+                self._create_alert(
+                    'margin_erosion', finding['item_id'], finding['item_name'],
+                    f"Margin alert: {finding['item_name']} margin fell from "
+                    f"{finding['baseline_margin']:.1f}% to {finding['recent_margin']:.1f}% over the last {recent_days} days"
+                )
+            return findings
     
     def get_restock_suggestions(self) -> List[Dict]:
         """Get items that need restocking based on sales velocity"""
@@ -581,41 +856,121 @@ class DataManager:
         return sorted(suggestions, key=lambda x: x['current_stock'])
     
     def get_daily_summary(self, date: str = None) -> Dict:
-        """Get daily sales summary"""
+        """Get daily sales summary, read from the day-end snapshot once the day is closed"""
         if date is None:
             date = datetime.now().date().isoformat()
         
-        daily_sales = [
-            sale for sale in self.sales
-            if datetime.fromisoformat(sale['sale_date']).date().isoformat() == date
-        ]
-        
-        if not daily_sales:
-            return {
+        snapshot = self.day_closes.get(date)
+        if snapshot is None:
+            day_start = datetime.fromisoformat(date)
+            summary = self.rollups.aggregate(day_start, day_start + timedelta(days=1), breakdowns=('categories',))
+            snapshot = {
                 'date': date,
-                'total_sales': 0,
-                'total_revenue': 0,
-                'total_profit': 0,
-                'total_items_sold': 0,
-                'sales_count': 0
+                'total_revenue': summary['revenue'],
+                'total_profit': summary['profit'],
+                'total_items_sold': summary['quantity'],
+                'sales_count': summary['sales'],
+                'by_category': summary['categories'],
+                'closed': False
             }
+        else:
+            snapshot['closed'] = True
         
-        return {
-            'date': date,
-            'total_sales': len(daily_sales),
-            'total_revenue': sum(sale['total_amount'] for sale in daily_sales),
-            'total_profit': sum(sale['profit'] for sale in daily_sales),
-            'total_items_sold': sum(sale['quantity'] for sale in daily_sales),
-            'sales_count': len(daily_sales),
-            'sales': daily_sales
-        }
+        snapshot['total_sales'] = snapshot['sales_count']
+        return snapshot
+    
+    def _day_snapshot(self, date: str, closed_at: str) -> Dict:
+        """Build a day's Z-report from its rollup day bucket"""
+        day_start = datetime.fromisoformat(date)
+        return build_snapshot(day_start.date(), self.rollups.day_totals(day_start), closed_at)
+    
+    def close_day(self, date: str = None) -> Dict:
+        """Freeze a day's summary into the day-end snapshot store (Z-report)"""
+        if date is None:
+            date = (datetime.now().date() - timedelta(days=1)).isoformat()
+        
+        if datetime.fromisoformat(date).date() > datetime.now().date():
+            raise ValueError("Cannot close a day that has not started")
+        
+        with self.lock:
+            if self.day_closes.is_closed(date):
+                raise ValueError(f"{date} is already closed")
+            snapshot = self._day_snapshot(date, datetime.now().isoformat())
+            self.day_closes.close(snapshot)
+            self._publish('day_close', snapshot)
+        
+        return self.day_closes.get(date)
+    
+    def _amend_closed_days(self, sales: List[Sale]) -> List[str]:
+        """Add sales that arrived for closed days (imports, offline tills) to those days' Z-reports
+        
+        Only the late sales are added to the stored snapshot: the day's
+        earlier sales may be gone from memory (a restart keeps the
+        DAY_CLOSE_FILE, not the sales), so the day cannot be rebuilt.
+        """
+        late: Dict[str, SalesRollups] = {}
+        for sale in sales:
+            date = datetime.fromtimestamp(sale.sale_ts).date().isoformat()
+            if self.day_closes.is_closed(date):
+                late.setdefault(date, SalesRollups()).record_sale(sale)
+        
+        for date, rollups in sorted(late.items()):
+            day_start = datetime.fromisoformat(date)
+            delta = build_snapshot(day_start.date(), rollups.day_totals(day_start), datetime.now().isoformat())
+            snapshot = add_snapshot(self.day_closes.get(date), delta)
+            snapshot['amended_at'] = delta['closed_at']
+            self.day_closes.amend(snapshot)
+            self._publish('day_close', snapshot)
+        return sorted(late)
+    
+    def close_pending_days(self) -> List[str]:
+        """Close every unclosed day from the first sale (or last close) up to yesterday"""
+        with self.lock:
+            if self.rollups.first_hour is None:
+                return []
+            
+            last_closed = self.day_closes.last_closed
+            if last_closed:
+                first = datetime.fromisoformat(last_closed).date() + timedelta(days=1)
+            else:
+                first = self.rollups.first_hour.date()
+            
+            closed = []
+            for day in days_between(first, datetime.now().date() - timedelta(days=1)):
+                self.close_day(day.isoformat())
+                closed.append(day.isoformat())
+            return closed
+    
+    def get_period_summary(self, start: str, end: str) -> Dict:
+        """Sum day summaries for [start, end] - closed days from snapshots, open days from rollups"""
+        snapshots = list(self.day_closes.between(start, end))
+        closed_days = {snapshot['date'] for snapshot in snapshots}
+        
+        for day in days_between(datetime.fromisoformat(start).date(), datetime.fromisoformat(end).date()):
+            if day.isoformat() not in closed_days:
+                live = self.get_daily_summary(day.isoformat())
+                if live['sales_count']:
+                    live['by_payment'] = {}  # Only recorded when the day is closed
+                    snapshots.append(live)
+        
+        summary = combine_snapshots(snapshots, start, end)
+        summary['days_closed'] = len(closed_days)
+        return summary
+    
+    def get_month_to_date(self, date: str = None) -> Dict:
+        """Get month-to-date totals up to and including the given day"""
+        if date is None:
+            date = datetime.now().date().isoformat()
+        return self.get_period_summary(date[:8] + '01', date)
     
     def dismiss_alert(self, alert_id: int):
         """Dismiss an alert"""
-        for alert in self.alerts:
-            if alert['id'] == alert_id:
-                alert['active'] = False
-                break
+        with self.lock:
+            if 1 <= alert_id <= len(self.alerts):
+                alert = self.alerts[alert_id - 1]
+                alert.active = False
+                self._index_alert(alert)
+                self._publish('alert', alert.to_row())
     
     def get_active_alerts(self) -> List[Dict]:
         """Get all active alerts"""
@@ -691,49 +1046,101 @@ class DataManager:
             # Update categories based on business type
             self.business_categories = self._get_business_categories(business_type)
             self.item_categories = self.business_categories.copy()
+            self._publish('business', {'name': business_name, 'type': business_type})
             
             return True
         except Exception as e:
             print(f"Error setting up business: {e}")
             return False
     
+    def update_settings(self, **values):
+        """Change settings values"""
+        self.settings.update(values)
+        self._publish('settings', values)
+    
     def is_setup_completed(self) -> bool:
         """Check if business setup is completed"""
         return self.settings.get('setup_completed', False)
     
+    def get_memory_usage(self) -> Dict[str, Dict]:
+        """Get approximate memory held by each in-memory collection"""
+        with self.lock:
+            return {
+                'items': estimate_bytes(self.items, len(self.items)),
+                'sales': self.sales.usage(),
+                'stock_ledger': self.stock_ledger.usage(),
+                'inventory': estimate_bytes(self.inventory.values(), len(self.inventory)),
+                'alerts': estimate_bytes(self.alerts, len(self.alerts))
+            }
+    
     def get_business_types(self) -> List[Dict[str, str]]:
         """Get available business types"""
-        return [
-            {'id': 'grocery', 'name': 'Grocery Store', 'description': 'Food, beverages, and household items'},
-            {'id': 'electronics', 'name': 'Electronics Store', 'description': 'Mobile phones, computers, and gadgets'},
-            {'id': 'hair_salon', 'name': 'Hair Salon', 'description': 'Hair care products and styling tools'},
-            {'id': 'tailoring', 'name': 'Tailoring Shop', 'description': 'Fabrics, threads, and sewing supplies'},
-            {'id': 'pharmacy', 'name': 'Pharmacy', 'description': 'Medicines and health products'},
-            {'id': 'restaurant', 'name': 'Restaurant/Cafe', 'description': 'Food and beverage service'},
-            {'id': 'bookstore', 'name': 'Bookstore', 'description': 'Books and stationery items'},
-            {'id': 'clothing', 'name': 'Clothing Store', 'description': 'Fashion and accessories'},
-            {'id': 'auto_parts', 'name': 'Auto Parts Store', 'description': 'Car parts, accessories, and automotive supplies'},
-            {'id': 'bakery', 'name': 'Bakery', 'description': 'Bread, cakes, pastries, and baking supplies'},
-            {'id': 'hardware', 'name': 'Hardware Store', 'description': 'Tools, construction materials, and home improvement'},
-            {'id': 'jewelry', 'name': 'Jewelry Store', 'description': 'Jewelry, watches, and precious accessories'},
-            {'id': 'sports', 'name': 'Sports Store', 'description': 'Sports equipment, fitness gear, and athletic wear'},
-            {'id': 'pet_store', 'name': 'Pet Store', 'description': 'Pet supplies, food, toys, and accessories'},
-            {'id': 'flower_shop', 'name': 'Flower Shop', 'description': 'Fresh flowers, plants, and gardening supplies'},
-            {'id': 'office_supplies', 'name': 'Office Supplies', 'description': 'Business equipment, stationery, and office furniture'},
-            {'id': 'cosmetics', 'name': 'Cosmetics Store', 'description': 'Beauty products, makeup, and skincare'},
-            {'id': 'toy_store', 'name': 'Toy Store', 'description': 'Toys, games, and children\'s entertainment'},
-            {'id': 'mobile_shop', 'name': 'Mobile Phone Shop', 'description': 'Mobile phones, accessories, and repair services'},
-            {'id': 'furniture', 'name': 'Furniture Store', 'description': 'Home and office furniture, decor items'},
-            {'id': 'paint_shop', 'name': 'Paint Shop', 'description': 'Paints, brushes, and painting supplies'},
-            {'id': 'shoe_store', 'name': 'Shoe Store', 'description': 'Footwear, sandals, and shoe accessories'},
-            {'id': 'fabric_shop', 'name': 'Fabric Shop', 'description': 'Textiles, fabrics, and sewing materials'},
-            {'id': 'computer_shop', 'name': 'Computer Shop', 'description': 'Computers, laptops, and IT equipment'},
-            {'id': 'gift_shop', 'name': 'Gift Shop', 'description': 'Gifts, souvenirs, and novelty items'},
-            {'id': 'music_store', 'name': 'Music Store', 'description': 'Musical instruments, audio equipment, and music accessories'},
-            {'id': 'bicycle_shop', 'name': 'Bicycle Shop', 'description': 'Bicycles, cycling gear, and repair services'},
-            {'id': 'general_store', 'name': 'General Store', 'description': 'Mixed goods and everyday essentials'},
-            {'id': 'other', 'name': 'Other Business', 'description': 'Custom business type with general categories'}
-        ]
+        return list(get_registry().business_types)
+    
+    def _publish(self, kind: str, payload: Any):
+        """Append a mutation to the replication log when running as a primary"""
+        if self.mutation_log is not None:
+            self.mutation_log.append(kind, payload)
+    
+    def apply_mutation(self, kind: str, payload: Any):
+        """Apply a primary's logged mutation (replica side)"""
+        with self.lock:
+            if kind == 'sales':
+                for row in payload['rows']:
+                    sale = Sale.from_row(row)
+                    self._store_sale(sale, payload['source'])
+                    # Keep the usual-price statistics current; the primary's alerts arrive as their own mutations
+                    self.anomalies.observe(sale.item_id, sale.unit_price, sale.quantity,
+                                           self.settings['anomaly_threshold'])
+            elif kind == 'stock':
+                movement = self.stock_ledger.record(
+                    payload['item_id'], payload['change'], payload['type'],
+                    reason=payload['reason'], reference=payload['reference'],
+                    date=payload['date'], location=payload.get('location', DEFAULT_LOCATION)
+                )
+                self._project_stock(movement)
+            elif kind == 'item':
+                item = Item.from_row(payload['row'])
+                if item.id > len(self.items):
+                    self.items.append(item)
+                    self.inventory.setdefault(item.id, InventoryEntry(0, item.created_ts))
+                else:
+                    self.items[item.id - 1] = item
+                self.items_by_id[item.id] = item
+                self.price_history.setdefault(item.id, []).append(payload['price'])
+                self._touch_item(item.id, details=True)
+            elif kind == 'alert':
+                alert = Alert.from_row(payload)
+                if alert.id > len(self.alerts):
+                    self.alerts.append(alert)
+                else:
+                    self.alerts[alert.id - 1] = alert
+                self._index_alert(alert)
+            elif kind == 'location':
+                self._add_location(payload)
+            elif kind == 'day_close':
+                if self.day_closes.is_closed(payload['date']):
+                    self.day_closes.amend(payload)
+                else:
+                    self.day_closes.close(payload)
+            elif kind == 'business':
+                self.setup_business(payload['name'], payload['type'])
+            elif kind == 'settings':
+                self.settings.update(payload)
+            else:
+                raise ValueError(f"Unknown mutation '{kind}'")
+    
+    def reset(self):
+        """Drop all data, e.g. when a replica's primary restarts with an empty store"""
+        with self.lock:
+            lock = self.lock
+            executor = self.executor
+            version = self.catalog_version
+            self.__init__()
+            self.lock = lock
+            self.executor = executor
+            # Versions keep counting up so nothing keyed on an old version is mistaken for current
+            self.catalog_version = version
 
 # Global data manager instance
 data_manager = DataManager()
@@ -0,0 +1,180 @@
+import json
+import os
+from bisect import bisect_left, bisect_right, insort
+from datetime import date, timedelta
+from types import MappingProxyType
+from typing import Dict, List, Any, Iterable, Optional
+
+from sales_rollups import empty_totals, add_totals
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    if isinstance(value, MappingProxyType):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+
+class DayCloseStore:
+    """Immutable day-end snapshots (Z-reports), optionally appended to a JSON-lines file.
+
+    A day can be closed once; its snapshot is frozen and later reads, ranges
+    and month-to-date totals are lookups over at most one snapshot per day.
+    Sales that arrive for a closed day (imports, till syncs) amend its
+    snapshot; in the file the latest line for a day wins.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._snapshots: Dict[str, MappingProxyType] = {}
+        self._dates: List[str] = []
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        self._store(json.loads(line))
+
+    def _store(self, snapshot: Dict):
+        if snapshot['date'] not in self._snapshots:
+            insort(self._dates, snapshot['date'])
+        self._snapshots[snapshot['date']] = _freeze(snapshot)
+
+    def _append(self, snapshot: Dict):
+        if self.path:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(snapshot) + '\n')
+
+    def is_closed(self, day: str) -> bool:
+        return day in self._snapshots
+
+    @property
+    def last_closed(self) -> Optional[str]:
+        return self._dates[-1] if self._dates else None
+
+    def close(self, snapshot: Dict) -> MappingProxyType:
+        """Freeze a day's snapshot; a closed day cannot be closed again"""
+        if snapshot['date'] in self._snapshots:
+            raise ValueError(f"{snapshot['date']} is already closed")
+        self._append(snapshot)
+        self._store(snapshot)
+        return self._snapshots[snapshot['date']]
+
+    def amend(self, snapshot: Dict) -> MappingProxyType:
+        """Replace a closed day's snapshot after late sales for that day"""
+        if snapshot['date'] not in self._snapshots:
+            raise ValueError(f"{snapshot['date']} is not closed")
+        self._append(snapshot)
+        self._store(snapshot)
+        return self._snapshots[snapshot['date']]
+
+    def get(self, day: str) -> Optional[Dict]:
+        """Get a closed day's snapshot as a plain dict"""
+        snapshot = self._snapshots.get(day)
+        return _thaw(snapshot) if snapshot is not None else None
+
+    def between(self, start: str, end: str) -> List[MappingProxyType]:
+        """Get snapshots for closed days in [start, end], oldest first"""
+        lo = bisect_left(self._dates, start)
+        hi = bisect_right(self._dates, end)
+        return [self._snapshots[day] for day in self._dates[lo:hi]]
+
+
+def combine_snapshots(snapshots: Iterable[Dict], start: str, end: str) -> Dict[str, Any]:
+    """Add several day snapshots together"""
+    totals = empty_totals()
+    by_category: Dict[str, Dict] = {}
+    by_payment: Dict[str, Dict] = {}
+    days = 0
+
+    for snapshot in snapshots:
+        days += 1
+        add_totals(totals, snapshot['total_revenue'], snapshot['total_profit'],
+                   snapshot['total_items_sold'], snapshot['sales_count'])
+        for breakdown, target in (('by_category', by_category), ('by_payment', by_payment)):
+            for key, values in snapshot[breakdown].items():
+                add_totals(target.setdefault(key, empty_totals()), values['revenue'],
+                           values['profit'], values['quantity'], values['sales'])
+
+    return {
+        'start': start,
+        'end': end,
+        'days_closed': days,
+        'total_revenue': totals['revenue'],
+        'total_profit': totals['profit'],
+        'total_items_sold': totals['quantity'],
+        'sales_count': totals['sales'],
+        'by_category': by_category,
+        'by_payment': by_payment
+    }
+
+
+def add_snapshot(snapshot: Dict, delta: Dict) -> Dict[str, Any]:
+    """A closed day's snapshot with a later snapshot of late sales for the same day added in
+
+    Top items are merged from the two top-ten lists, so an item outside the
+    stored top ten counts only its late sales there.
+    """
+    totals = empty_totals()
+    by_category: Dict[str, Dict] = {}
+    by_payment: Dict[str, Dict] = {}
+    items: Dict[str, Dict] = {}
+    for part in (snapshot, delta):
+        add_totals(totals, part['total_revenue'], part['total_profit'], part['total_items_sold'],
+                   part['sales_count'])
+        for breakdown, target in (('by_category', by_category), ('by_payment', by_payment)):
+            for key, values in part[breakdown].items():
+                add_totals(target.setdefault(key, empty_totals()), values['revenue'],
+                           values['profit'], values['quantity'], values['sales'])
+        for item in part['top_items']:
+            merged = items.setdefault(item['item_name'], {'item_name': item['item_name'], 'quantity': 0,
+                                                          'revenue': 0.0, 'profit': 0.0})
+            for field in ('quantity', 'revenue', 'profit'):
+                merged[field] += item[field]
+
+    return dict(
+        snapshot,
+        total_revenue=totals['revenue'],
+        total_profit=totals['profit'],
+        total_items_sold=totals['quantity'],
+        sales_count=totals['sales'],
+        by_category=by_category,
+        by_payment=by_payment,
+        top_items=sorted(items.values(), key=lambda x: x['revenue'], reverse=True)[:10]
+    )
+
+
+def build_snapshot(day: date, summary: Dict, closed_at: str) -> Dict[str, Any]:
+    """Build a day's Z-report from its rollup day bucket (see SalesRollups.day_totals)"""
+    top_items = sorted(summary['items'].values(), key=lambda x: x['revenue'], reverse=True)[:10]
+
+    return {
+        'date': day.isoformat(),
+        'closed_at': closed_at,
+        'total_revenue': summary['revenue'],
+        'total_profit': summary['profit'],
+        'total_items_sold': summary['quantity'],
+        'sales_count': summary['sales'],
+        'by_category': {category: dict(values) for category, values in summary['categories'].items()},
+        'by_payment': {label: dict(values) for label, values in summary['payments'].items()},
+        'top_items': [
+            {'item_name': item['item_name'], 'quantity': item['quantity'],
+             'revenue': item['revenue'], 'profit': item['profit']}
+            for item in top_items
+        ]
+    }
+
+
+def days_between(first: date, last: date) -> Iterable[date]:
+    day = first
+    while day <= last:
+        yield day
+        day += timedelta(days=1)
@@ -0,0 +1,117 @@
+import csv
+import io
+import os
+import pickle
+import tempfile
+from datetime import datetime
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Tuple
+
+from records import Sale
+
+# Everything here runs on the offload executor, possibly in a worker process: it is given a snapshot
+# of plain rows (or a file of them) and must not touch the data manager or the app.
+
+# Sales per pickled chunk in a rows file
+ROWS_CHUNK = 5000
+
+SALES_CSV_HEADER = ['Sale ID', 'Date', 'Item Name', 'Quantity', 'Unit Price', 'Total Amount', 'Profit', 'Notes']
+INVENTORY_CSV_HEADER = ['Item Name', 'Category', 'Current Stock', 'Cost Price', 'Selling Price', 'Total Value',
+                        'Status']
+
+
+def write_sale_rows(f: BinaryIO, sales: Iterable[Sale], chunk_rows: int = ROWS_CHUNK) -> int:
+    """Write sales to a rows file a chunk at a time, so no full list is built; returns the count"""
+    count = 0
+    chunk = []
+    for sale in sales:
+        chunk.append(sale.to_row())
+        if len(chunk) == chunk_rows:
+            pickle.dump(chunk, f, protocol=pickle.HIGHEST_PROTOCOL)
+            count += len(chunk)
+            chunk = []
+    if chunk:
+        pickle.dump(chunk, f, protocol=pickle.HIGHEST_PROTOCOL)
+        count += len(chunk)
+    return count
+
+
+def read_sale_rows(path: str) -> Iterator[list]:
+    """The rows of a file written by write_sale_rows, one chunk in memory at a time"""
+    with open(path, 'rb') as f:
+        while True:
+            try:
+                chunk = pickle.load(f)
+            except EOFError:
+                return
+            yield from chunk
+
+
+def inventory_csv_rows(inventory_status: List[Dict]) -> List[Tuple]:
+    """Snapshot of the columns the inventory export needs"""
+    return [(info['item'].name, info['item'].category, info['quantity'], info['item'].cost_price,
+             info['item'].selling_price, info['total_value'], info['is_low_stock']) for info in inventory_status]
+
+
+def sales_csv(rows_path: str, currency: str) -> str:
+    """Write the rows file's sales, already newest first, to a CSV temp file; the caller removes the returned path"""
+    sales = (Sale.from_row(row) for row in read_sale_rows(rows_path))
+    handle, path = tempfile.mkstemp(prefix='sales_data_', suffix='.csv')
+    try:
+        with os.fdopen(handle, 'w', encoding='utf-8', newline='') as output:
+            writer = csv.writer(output)
+            writer.writerow(SALES_CSV_HEADER)
+            for sale in sales:
+                writer.writerow([
+                    sale.id,
+                    datetime.fromtimestamp(sale.sale_ts).strftime('%Y-%m-%d %H:%M'),
+                    sale.item_name,
+                    sale.quantity,
+                    f"{currency}{sale.unit_price:.2f}",
+                    f"{currency}{sale.total_amount:.2f}",
+                    f"{currency}{sale.profit:.2f}",
+                    sale.notes
+                ])
+    except Exception:
+        os.remove(path)
+        raise
+    return path
+
+
+def inventory_csv(rows: List[Tuple], currency: str) -> bytes:
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(INVENTORY_CSV_HEADER)
+    for name, category, quantity, cost_price, selling_price, total_value, is_low_stock in rows:
+        writer.writerow([
+            name,
+            category,
+            quantity,
+            f"{currency}{cost_price:.2f}",
+            f"{currency}{selling_price:.2f}",
+            f"{currency}{total_value:.2f}",
+            'Low Stock' if is_low_stock else 'Normal'
+        ])
+    return output.getvalue().encode('utf-8')
+
+
+def summary_pdf(analytics: Dict, currency: str, period_days: int) -> bytes:
+    import pdf_reports  # ReportLab is heavy; only load it when a PDF is requested
+
+    buffer = io.BytesIO()
+    pdf_reports.build_summary_report(buffer, analytics, currency, period_days)
+    return buffer.getvalue()
+
+
+def full_report_pdf(summary: Dict, rows_path: str, currency: str, start: datetime, end: datetime) -> str:
+    """Write the full ledger report to a temp file and return its path; the caller removes it"""
+    import pdf_reports
+
+    handle, path = tempfile.mkstemp(prefix='sales_report_', suffix='.pdf')
+    os.close(handle)
+    try:
+        pdf_reports.build_full_report(path, summary, (Sale.from_row(row) for row in read_sale_rows(rows_path)),
+                                      currency, start, end)
+    except Exception:
+        os.remove(path)
+        raise
+    return path
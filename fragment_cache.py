@@ -0,0 +1,117 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+from jinja2 import nodes
+from jinja2.ext import Extension
+
+# Default bounds: whichever is reached first evicts the least recently used fragments
+MAX_ENTRIES = 20000
+MAX_BYTES = 32 * 1024 * 1024
+
+
+class FragmentCache:
+    """Bounded LRU of rendered template fragments.
+
+    Keys carry the data version the fragment was rendered from, so a changed
+    item simply misses and its stale entry ages out; nothing is invalidated
+    explicitly. Size is tracked as the length of the rendered HTML.
+    """
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, max_bytes: int = MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: 'OrderedDict[Hashable, str]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[str]:
+        with self._lock:
+            html = self._entries.get(key)
+            if html is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return html
+
+    def set(self, key: Hashable, html: str):
+        size = len(html)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= len(previous)
+            self._entries[key] = html
+            self.bytes += size
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= len(evicted)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'bytes': self.bytes,
+            'max_entries': self.max_entries,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+            'evictions': self.evictions
+        }
+
+
+class FragmentCacheExtension(Extension):
+    """Adds {% cache 'name', key, ... %}...{% endcache %} to templates.
+
+    The body is rendered once per distinct key and reused from the
+    environment's fragment cache afterwards. Blocks nest, so a table can be
+    cached whole while each row is cached on its own version.
+    """
+
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=None)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        key = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            key.append(parser.parse_expression())
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        call = self.call_method('_render_cached', [nodes.Const(parser.name), nodes.List(key)])
+        return nodes.CallBlock(call, [], [], body).set_lineno(lineno)
+
+    def _render_cached(self, template_name: str, key, caller):
+        cache = self.environment.fragment_cache
+        if cache is None:
+            return caller()
+        key = (template_name, *key)
+        html = cache.get(key)
+        if html is None:
+            html = caller()
+            cache.set(key, html)
+        return html
+
+
+def install_fragment_cache(app, max_entries: int = MAX_ENTRIES, max_bytes: int = MAX_BYTES) -> FragmentCache:
+    """Enable {% cache %} blocks in the app's templates, backed by one process-wide LRU"""
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    app.jinja_env.fragment_cache = FragmentCache(max_entries, max_bytes)
+    return app.jinja_env.fragment_cache
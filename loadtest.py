@@ -0,0 +1,328 @@
+import argparse
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from typing import Dict, List, Optional, Tuple
+
+# Default traffic mix: relative weights of each scenario
+DEFAULT_MIX = {
+    'sale': 40,        # POST /sales/add
+    'search': 40,      # Keystroke burst on /api/search-suggestions
+    'reports': 15,     # GET /reports
+    'export': 5,       # GET /export/sales-csv
+}
+
+SEED_ITEMS = [
+    'Milk', 'Bread', 'Sugar', 'Mealie Meal', 'Cooking Oil', 'Rice', 'Eggs', 'Tomatoes',
+    'Onions', 'Soap', 'Salt', 'Tea Leaves', 'Coffee', 'Biscuits', 'Juice', 'Water',
+    'Kapenta', 'Beans', 'Groundnuts', 'Candles'
+]
+
+
+def seed_catalog(items: int) -> List[Tuple[str, float, float]]:
+    """(name, cost price, selling price) for each seeded item; the same on every call, so clients know the prices"""
+    rng = random.Random(42)
+    catalog = []
+    for index in range(items):
+        cost = round(rng.uniform(2, 80), 2)
+        catalog.append((f"{SEED_ITEMS[index % len(SEED_ITEMS)]} {index // len(SEED_ITEMS) + 1}",
+                        cost, round(cost * 1.3, 2)))
+    return catalog
+
+
+def seed_data_manager(items: int = 200, sales: int = 2000):
+    """Give the in-memory store a realistic catalog and sales history to load-test against"""
+    from data_manager import data_manager
+
+    if data_manager.items:
+        return
+    data_manager.setup_business('Load Test Shop', 'grocery')
+    categories = data_manager.item_categories
+    for index, (name, cost, selling_price) in enumerate(seed_catalog(items)):
+        data_manager.add_item(name, categories[index % len(categories)], cost, selling_price, 10 ** 7)
+    rng = random.Random(43)
+    for _ in range(sales):
+        item = rng.choice(data_manager.items)
+        data_manager.add_sale(item['id'], rng.randint(1, 3), item['selling_price'])
+
+
+class Recorder:
+    """Thread-safe latency collection per route"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, route: str, seconds: float, ok: bool):
+        with self._lock:
+            self.latencies.setdefault(route, []).append(seconds)
+            if not ok:
+                self.errors[route] = self.errors.get(route, 0) + 1
+
+    def summary(self, elapsed: float) -> List[Dict]:
+        rows = []
+        for route, samples in sorted(self.latencies.items()):
+            samples = sorted(samples)
+            rows.append({
+                'route': route,
+                'requests': len(samples),
+                'errors': self.errors.get(route, 0),
+                'rps': len(samples) / elapsed if elapsed else 0,
+                'p50': percentile(samples, 50),
+                'p90': percentile(samples, 90),
+                'p99': percentile(samples, 99),
+                'max': samples[-1]
+            })
+        return rows
+
+
+def percentile(sorted_samples: List[float], pct: float) -> float:
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, int(round(pct / 100 * (len(sorted_samples) - 1))))
+    return sorted_samples[index]
+
+
+class TestClientTransport:
+    """Drives the Flask app in-process through its test client (one client per thread)"""
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def request(self, method: str, path: str, data: Optional[Dict] = None) -> int:
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.open(path, method=method, data=data)
+        response.close()
+        return response.status_code
+
+
+class HttpTransport:
+    """Drives a running server over HTTP without following redirects"""
+
+    class _NoRedirect(urllib.request.HTTPRedirectHandler):
+        def redirect_request(self, *args, **kwargs):
+            return None
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip('/')
+        self._opener = urllib.request.build_opener(self._NoRedirect)
+
+    def request(self, method: str, path: str, data: Optional[Dict] = None) -> int:
+        body = urllib.parse.urlencode(data).encode('utf-8') if data is not None else None
+        request = urllib.request.Request(self.base_url + path, data=body, method=method)
+        try:
+            with self._opener.open(request, timeout=30) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+
+class Scenarios:
+    """The traffic shapes a till and an owner's browser produce
+
+    `prices` are the seeded items' selling prices, by item id - 1. Sales go
+    through at those prices, as a till would ring them up; random prices
+    would trip the price anomaly checks and load-test the alerting instead.
+    """
+
+    def __init__(self, transport, recorder: Recorder, prices: List[float], rng: random.Random):
+        self.transport = transport
+        self.recorder = recorder
+        self.prices = prices
+        self.rng = rng
+
+    def _timed(self, route: str, method: str, path: str, data: Optional[Dict] = None):
+        started = time.perf_counter()
+        try:
+            status = self.transport.request(method, path, data)
+            ok = status < 500
+        except Exception:
+            ok = False
+        self.recorder.record(route, time.perf_counter() - started, ok)
+
+    def sale(self):
+        item_id = self.rng.randint(1, len(self.prices))
+        self._timed('POST /sales/add', 'POST', '/sales/add', {
+            'item_id': item_id,
+            'quantity': self.rng.randint(1, 3),
+            'sale_price': self.prices[item_id - 1],
+            'notes': self.rng.choice(['', 'cash', 'mobile money'])
+        })
+
+    def search(self):
+        word = self.rng.choice(SEED_ITEMS).lower()
+        for length in range(2, len(word) + 1):
+            self._timed('GET /api/search-suggestions', 'GET',
+                        f"/api/search-suggestions?q={urllib.parse.quote(word[:length])}")
+
+    def reports(self):
+        self._timed('GET /reports', 'GET', '/reports')
+
+    def export(self):
+        self._timed('GET /export/sales-csv', 'GET', '/export/sales-csv')
+
+
+def run_load(transport, mix: Dict[str, int], concurrency: int, duration: float,
+             prices: List[float], seed: int = 1) -> Tuple[List[Dict], float]:
+    """Replay the traffic mix from `concurrency` threads for `duration` seconds"""
+    recorder = Recorder()
+    names = [name for name, weight in mix.items() if weight > 0]
+    weights = [mix[name] for name in names]
+    deadline = time.perf_counter() + duration
+
+    def worker(worker_id: int):
+        rng = random.Random(seed + worker_id)
+        scenarios = Scenarios(transport, recorder, prices, rng)
+        while time.perf_counter() < deadline:
+            getattr(scenarios, rng.choices(names, weights)[0])()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return recorder.summary(elapsed), elapsed
+
+
+def print_report(title: str, rows: List[Dict], elapsed: float):
+    total = sum(row['requests'] for row in rows)
+    print(f"\n{title}: {total} requests in {elapsed:.1f}s ({total / elapsed if elapsed else 0:.1f} req/s)")
+    print(f"{'route':<32}{'reqs':>8}{'errs':>6}{'req/s':>9}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for row in rows:
+        print(f"{row['route']:<32}{row['requests']:>8}{row['errors']:>6}{row['rps']:>9.1f}"
+              f"{row['p50'] * 1000:>9.1f}{row['p90'] * 1000:>9.1f}{row['p99'] * 1000:>9.1f}{row['max'] * 1000:>9.1f}")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_port(port: int, timeout: float = 30.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server did not start listening on port {port}")
+
+
+def start_gunicorn(app_spec: str, worker_class: str, workers: int, threads: int,
+                   seed_items: int, seed_sales: int) -> Tuple[subprocess.Popen, str, str]:
+    """Start a local gunicorn whose workers each seed their own in-memory store"""
+    port = _free_port()
+    config = tempfile.NamedTemporaryFile('w', suffix='.py', prefix='loadtest_gunicorn_', delete=False)
+    config.write(
+        "def post_worker_init(worker):\n"
+        "    import routes  # noqa: F401\n"
+        "    import loadtest\n"
+        f"    loadtest.seed_data_manager({seed_items}, {seed_sales})\n"
+    )
+    config.close()
+
+    command = [
+        sys.executable, '-m', 'gunicorn', app_spec,
+        '--bind', f'127.0.0.1:{port}',
+        '--workers', str(workers),
+        '--worker-class', worker_class,
+        '--threads', str(threads),
+        '--config', config.name,
+        '--log-level', 'warning',
+    ]
+    env = dict(os.environ, BACKGROUND_JOBS=os.environ.get('BACKGROUND_JOBS', '0'))
+    process = subprocess.Popen(command, cwd=os.path.dirname(os.path.abspath(__file__)), env=env)
+    try:
+        _wait_for_port(port)
+    except RuntimeError:
+        process.terminate()
+        os.remove(config.name)
+        raise
+    return process, f'http://127.0.0.1:{port}', config.name
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    """Parse 'sale=40,search=40,reports=15,export=5'"""
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        if name.strip() not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"Unknown scenario '{name}'. Use: {', '.join(DEFAULT_MIX)}")
+        mix[name.strip()] = int(weight or 1)
+    return mix
+
+
+def parse_worker_spec(value: str) -> Tuple[str, int, int]:
+    """Parse 'sync:4' or 'gthread:2x8' into (worker_class, workers, threads)"""
+    worker_class, _, counts = value.partition(':')
+    workers, _, threads = (counts or '1').partition('x')
+    return worker_class, int(workers), int(threads or 1)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Replay realistic POS traffic against the Flask routes')
+    parser.add_argument('--mode', choices=('inprocess', 'gunicorn', 'url'), default='inprocess',
+                        help='Flask test client, a local gunicorn, or an already running server')
+    parser.add_argument('--url', help='Base URL for --mode url')
+    parser.add_argument('--app', default='main:app', help='WSGI app for gunicorn (default: main:app)')
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX,
+                        help='Scenario weights, e.g. sale=40,search=40,reports=15,export=5')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent simulated clients')
+    parser.add_argument('--duration', type=float, default=20, help='Seconds per run')
+    parser.add_argument('--workers', type=parse_worker_spec, nargs='+', default=[('sync', 2, 1)],
+                        help='gunicorn worker specs to compare, e.g. sync:4 gthread:2x8')
+    parser.add_argument('--seed-items', type=int, default=200)
+    parser.add_argument('--seed-sales', type=int, default=2000)
+    args = parser.parse_args(argv)
+    prices = [selling_price for _, _, selling_price in seed_catalog(args.seed_items)]
+
+    if args.mode == 'inprocess':
+        os.environ.setdefault('BACKGROUND_JOBS', '0')
+        from main import app
+        import routes  # noqa: F401
+        seed_data_manager(args.seed_items, args.seed_sales)
+        rows, elapsed = run_load(TestClientTransport(app), args.mix, args.concurrency,
+                                 args.duration, prices)
+        print_report('in-process test client', rows, elapsed)
+        return
+
+    if args.mode == 'url':
+        if not args.url:
+            parser.error('--mode url needs --url')
+        rows, elapsed = run_load(HttpTransport(args.url), args.mix, args.concurrency,
+                                 args.duration, prices)
+        print_report(args.url, rows, elapsed)
+        return
+
+    for worker_class, workers, threads in args.workers:
+        process, base_url, config_path = start_gunicorn(args.app, worker_class, workers, threads,
+                                                        args.seed_items, args.seed_sales)
+        try:
+            rows, elapsed = run_load(HttpTransport(base_url), args.mix, args.concurrency,
+                                     args.duration, prices)
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+            os.remove(config_path)
+        print_report(f"gunicorn {worker_class} workers={workers} threads={threads}", rows, elapsed)
+
+
+if __name__ == '__main__':
+    main()
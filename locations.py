@@ -0,0 +1,55 @@
+from typing import Dict, Optional
+
+from records import DEFAULT_LOCATION, InventoryEntry
+
+DEFAULT_LOCATION_NAME = 'Main store'
+
+
+def make_location(code: str, name: str, low_stock_threshold: Optional[int] = None) -> Dict:
+    """Validate and build a location entry, raising ValueError for bad input"""
+    code = code.strip().lower()
+    if not code or not code.replace('-', '').replace('_', '').isalnum():
+        raise ValueError("Location code must be letters, digits, '-' or '_'")
+    if low_stock_threshold is not None and low_stock_threshold < 0:
+        raise ValueError("Low stock threshold cannot be negative")
+    return {'code': code, 'name': name.strip() or code, 'low_stock_threshold': low_stock_threshold}
+
+
+class LocationStock:
+    """Stock projection per (location, item), indexed both ways.
+
+    `by_location` answers "what is at this branch" without touching other
+    branches, and `by_item` answers "where is this item" without scanning
+    every branch. Both hold the same InventoryEntry objects.
+    """
+
+    def __init__(self):
+        self.by_location: Dict[str, Dict[int, InventoryEntry]] = {}
+        self.by_item: Dict[int, Dict[str, InventoryEntry]] = {}
+
+    def apply(self, location: str, item_id: int, quantity: int, updated_ts: float) -> InventoryEntry:
+        """Set an item's quantity at a location from a ledger movement"""
+        entry = self.by_item.get(item_id, {}).get(location)
+        if entry is None:
+            entry = InventoryEntry(quantity, updated_ts)
+            self.by_location.setdefault(location, {})[item_id] = entry
+            self.by_item.setdefault(item_id, {})[location] = entry
+        else:
+            entry.quantity = quantity
+            entry.updated_ts = updated_ts
+        return entry
+
+    def get(self, location: str, item_id: int) -> Optional[InventoryEntry]:
+        return self.by_location.get(location, {}).get(item_id)
+
+    def quantity(self, location: str, item_id: int) -> int:
+        entry = self.get(location, item_id)
+        return entry.quantity if entry is not None else 0
+
+    def at(self, location: str) -> Dict[int, InventoryEntry]:
+        """Entries for every item ever stocked at a location"""
+        return self.by_location.get(location, {})
+
+    def of(self, item_id: int) -> Dict[str, InventoryEntry]:
+        """Entries for every location that has stocked an item"""
+        return self.by_item.get(item_id, {})
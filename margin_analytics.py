@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional
+
+from sales_rollups import SalesRollups
+
+
+def gross_margin(revenue: float, profit: float) -> float:
+    """Gross margin as a percentage of revenue"""
+    return profit / revenue * 100 if revenue else 0.0
+
+
+class MarginAnalytics:
+    """Margin trends, breakdowns and erosion checks read from the sales rollups.
+
+    Every sale already snapshots its cost price, so profit in the rollups is
+    the realised margin at the time of sale. Nothing here touches raw sales.
+    """
+
+    def __init__(self, rollups: SalesRollups):
+        self.rollups = rollups
+
+    def trend(self, start: datetime, end: datetime, granularity: str = 'day',
+              group_by: Optional[str] = None, key: Any = None) -> Dict[str, Any]:
+        """Get gross margin per period, overall or for a single item/category"""
+        breakdown = 'items' if group_by == 'item' else 'categories'
+        breakdowns = (breakdown,) if group_by else ()
+
+        points = []
+        for label, bucket in self.rollups.periods(start, end, granularity, breakdowns):
+            totals = bucket[breakdown].get(key) if group_by else bucket
+            revenue = totals['revenue'] if totals else 0.0
+            profit = totals['profit'] if totals else 0.0
+            points.append({
+                'period': label,
+                'revenue': revenue,
+                'profit': profit,
+                'margin': gross_margin(revenue, profit) if revenue else None
+            })
+
+        return {
+            'granularity': granularity,
+            'group_by': group_by,
+            'key': key,
+            'points': points
+        }
+
+    def breakdown(self, start: datetime, end: datetime, group_by: str = 'item') -> List[Dict]:
+        """Get gross margin by item or category for [start, end), lowest margin first"""
+        breakdown = 'items' if group_by == 'item' else 'categories'
+        totals = self.rollups.aggregate(start, end, breakdowns=(breakdown,))[breakdown]
+
+        rows = []
+        for key, data in totals.items():
+            rows.append({
+                'key': key,
+                'label': data.get('item_name', key),
+                'revenue': data['revenue'],
+                'profit': data['profit'],
+                'cost': data['revenue'] - data['profit'],
+                'quantity': data['quantity'],
+                'margin': gross_margin(data['revenue'], data['profit'])
+            })
+        return sorted(rows, key=lambda x: x['margin'])
+
+    def erosion(self, now: Optional[datetime] = None, recent_days: int = 7, baseline_days: int = 30,
+                threshold: float = 5.0, min_revenue: float = 0.0) -> List[Dict]:
+        """Get items whose recent margin fell more than `threshold` points below their baseline
+
+        The baseline window is the `baseline_days` immediately before the
+        recent window, so the two never overlap.
+        """
+        now = now or datetime.now()
+        recent_start = now - timedelta(days=recent_days)
+        baseline_start = recent_start - timedelta(days=baseline_days)
+
+        recent = self.rollups.aggregate(recent_start, now, breakdowns=('items',))['items']
+        baseline = self.rollups.aggregate(baseline_start, recent_start, breakdowns=('items',))['items']
+
+        findings = []
+        for item_id, current in recent.items():
+            previous = baseline.get(item_id)
+            if not previous or current['revenue'] < min_revenue or not previous['revenue']:
+                continue
+
+            recent_margin = gross_margin(current['revenue'], current['profit'])
+            baseline_margin = gross_margin(previous['revenue'], previous['profit'])
+            drop = baseline_margin - recent_margin
+            if drop >= threshold:
+                findings.append({
+                    'item_id': item_id,
+                    'item_name': current['item_name'],
+                    'baseline_margin': baseline_margin,
+                    'recent_margin': recent_margin,
+                    'drop': drop,
+                    'recent_revenue': current['revenue']
+                })
+        return sorted(findings, key=lambda x: x['drop'], reverse=True)
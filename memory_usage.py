@@ -0,0 +1,34 @@
+import sys
+from itertools import islice
+from typing import Any, Dict, Iterable
+
+# Records measured per collection; the rest are extrapolated from the sample's average
+DEFAULT_SAMPLE = 200
+
+
+def deep_sizeof(obj: Any) -> int:
+    """Approximate bytes held by a record: the container (dict or slotted object) plus its values"""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += sys.getsizeof(key) + sys.getsizeof(value)
+            if isinstance(value, (dict, list, tuple)):
+                size += deep_sizeof(value) - sys.getsizeof(value)
+    elif isinstance(obj, (list, tuple)):
+        for value in obj:
+            size += sys.getsizeof(value)
+    else:
+        for slot in getattr(obj, '__slots__', ()):
+            size += sys.getsizeof(getattr(obj, slot, None))
+    return size
+
+
+def estimate_bytes(records: Iterable, count: int, sample: int = DEFAULT_SAMPLE) -> Dict[str, Any]:
+    """Estimate a collection's memory from a sample of its records"""
+    measured = [deep_sizeof(record) for record in islice(records, sample)]
+    per_record = sum(measured) / len(measured) if measured else 0
+    return {
+        'count': count,
+        'bytes_per_record': round(per_record),
+        'approx_bytes': round(per_record * count)
+    }
@@ -0,0 +1,117 @@
+import multiprocessing
+import pickle
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+# Tasks running or waiting for a worker, per worker; past this, callers wait `queue_wait` and are then refused
+QUEUE_PER_WORKER = 2
+
+# Seconds a caller waits for room in the queue before ExecutorBusy
+DEFAULT_QUEUE_WAIT = 2.0
+
+
+class ExecutorBusy(Exception):
+    """The offload queue is full; retry after `retry_after` seconds"""
+
+    def __init__(self, retry_after: float):
+        super().__init__('Too many reports and exports in progress, please try again shortly')
+        self.retry_after = retry_after
+
+
+def freeze(*args) -> bytes:
+    """Serialise a task's inputs now, so later changes to the store cannot affect (or break) them"""
+    return pickle.dumps(args, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def thaw(snapshot: bytes) -> tuple:
+    """The arguments a snapshot was frozen with, as an independent copy"""
+    return pickle.loads(snapshot)
+
+
+def _thaw_and_call(fn: Callable, snapshot: bytes) -> Any:
+    return fn(*thaw(snapshot))
+
+
+class OffloadExecutor:
+    """Runs CPU-heavy report and export work away from the request threads.
+
+    With workers > 0 tasks go to a process pool, so building a CSV or PDF
+    does not hold the web worker's GIL; with 0 they run in the caller's
+    thread as before. Either way at most `max_pending` tasks are admitted
+    at once, so a burst of exports queues briefly and is then refused
+    (ExecutorBusy) instead of piling up behind checkout.
+
+    Tasks are module-level functions taking a snapshot made with freeze();
+    the pool uses spawned processes, which import only the task's module,
+    never the app or the store.
+    """
+
+    def __init__(self, workers: int = 0, max_pending: Optional[int] = None,
+                 queue_wait: float = DEFAULT_QUEUE_WAIT):
+        self.workers = workers
+        self.max_pending = max_pending or max(1, workers) * QUEUE_PER_WORKER
+        self.queue_wait = queue_wait
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.busy_seconds = 0.0
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+            return self._pool
+
+    def run(self, fn: Callable, snapshot: bytes, timeout: Optional[float] = None) -> Any:
+        """Run fn(*thawed snapshot) and return its result, raising ExecutorBusy if the queue stays full"""
+        if not self._slots.acquire(timeout=self.queue_wait):
+            with self._stats_lock:
+                self.rejected += 1
+            raise ExecutorBusy(retry_after=max(1.0, self.queue_wait))
+
+        with self._stats_lock:
+            self.pending += 1
+        started = time.perf_counter()
+        failed = False
+        try:
+            if self.workers > 0:
+                return self._get_pool().submit(_thaw_and_call, fn, snapshot).result(timeout)
+            return _thaw_and_call(fn, snapshot)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self._slots.release()
+            with self._stats_lock:
+                self.pending -= 1
+                self.busy_seconds += time.perf_counter() - started
+                if failed:
+                    self.failed += 1
+                else:
+                    self.completed += 1
+
+    def shutdown(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+                self._pool = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                'mode': 'process' if self.workers > 0 else 'inline',
+                'workers': self.workers,
+                'max_pending': self.max_pending,
+                'pending': self.pending,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected,
+                'busy_seconds': round(self.busy_seconds, 3)
+            }
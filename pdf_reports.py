@@ -0,0 +1,258 @@
+from datetime import datetime, timedelta
+from typing import Dict, List, Iterable, Iterator
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
+
+# Rows per ledger table, roughly one page; each chunk becomes its own Table so
+# ReportLab never has to lay out, split (or hold) the whole ledger at once.
+LEDGER_CHUNK_ROWS = 50
+
+# Flowables kept ahead of the layout engine while streaming a report.
+STORY_LOOKAHEAD = 8
+
+_STYLES = getSampleStyleSheet()
+
+TITLE_STYLE = ParagraphStyle(
+    'CustomTitle',
+    parent=_STYLES['Heading1'],
+    fontSize=18,
+    spaceAfter=30,
+    alignment=1  # Center alignment
+)
+
+SUMMARY_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 14),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+])
+
+DETAIL_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 12),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+])
+
+LEDGER_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 8),
+    ('ALIGN', (3, 1), (-1, -1), 'RIGHT'),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.beige]),
+    ('GRID', (0, 0), (-1, -1), 0.25, colors.black)
+])
+
+LEDGER_HEADER = ['Date', 'Item', 'Category', 'Qty', 'Unit Price', 'Total', 'Profit']
+
+
+class _StreamingStory(list):
+    """A story list that pulls flowables from a generator as ReportLab consumes them.
+
+    ReportLab's layout loop only ever looks at the front of the story, so
+    keeping a short lookahead buffer is enough and the full report never has
+    to exist in memory at once.
+    """
+
+    def __init__(self, flowables: Iterable, lookahead: int = STORY_LOOKAHEAD):
+        super().__init__()
+        self._source = iter(flowables)
+        self._lookahead = lookahead
+        self._fill()
+
+    def _fill(self):
+        while self._source is not None and list.__len__(self) < self._lookahead:
+            try:
+                self.append(next(self._source))
+            except StopIteration:
+                self._source = None
+
+    def __len__(self):
+        self._fill()
+        return list.__len__(self)
+
+    def __getitem__(self, index):
+        self._fill()
+        return list.__getitem__(self, index)
+
+
+def _money(currency: str, amount: float) -> str:
+    return f"{currency}{amount:.2f}"
+
+
+def _summary_flowables(title: str, analytics: Dict, currency: str) -> List:
+    summary_data = [
+        ['Metric', 'Value'],
+        ['Total Sales', str(analytics['total_sales'])],
+        ['Total Revenue', _money(currency, analytics['total_revenue'])],
+        ['Total Profit', _money(currency, analytics['total_profit'])],
+        ['Average Sale', _money(currency, analytics.get('average_sale', 0))],
+    ]
+    summary_table = Table(summary_data)
+    summary_table.setStyle(SUMMARY_TABLE_STYLE)
+
+    return [
+        Paragraph(title, TITLE_STYLE),
+        Spacer(1, 20),
+        summary_table,
+        Spacer(1, 30)
+    ]
+
+
+def _top_items_flowables(top_items: List[Dict], currency: str) -> List:
+    if not top_items:
+        return []
+
+    top_items_data = [['Item Name', 'Quantity Sold', 'Revenue', 'Profit']]
+    for item in top_items[:10]:
+        top_items_data.append([
+            item['item_name'],
+            str(item['quantity']),
+            _money(currency, item['revenue']),
+            _money(currency, item['profit'])
+        ])
+
+    top_items_table = Table(top_items_data)
+    top_items_table.setStyle(DETAIL_TABLE_STYLE)
+    return [
+        Paragraph("Top Selling Items", _STYLES['Heading2']),
+        Spacer(1, 12),
+        top_items_table,
+        Spacer(1, 30)
+    ]
+
+
+def _category_flowables(category_performance: List[Dict], currency: str) -> List:
+    if not category_performance:
+        return []
+
+    category_data = [['Category', 'Quantity Sold', 'Revenue', 'Profit', 'Share']]
+    for category in category_performance:
+        category_data.append([
+            category['category'],
+            str(category['quantity']),
+            _money(currency, category['revenue']),
+            _money(currency, category['profit']),
+            f"{category['revenue_share']:.1f}%"
+        ])
+
+    category_table = Table(category_data)
+    category_table.setStyle(DETAIL_TABLE_STYLE)
+    return [
+        Paragraph("Category Performance", _STYLES['Heading2']),
+        Spacer(1, 12),
+        category_table
+    ]
+
+
+def build_summary_report(output, analytics: Dict, currency: str, period_days: int):
+    """Write the summary PDF (totals, top items, categories) to a path or file object"""
+    doc = SimpleDocTemplate(output, pagesize=letter)
+
+    story = _summary_flowables(f"Sales Report - Last {period_days} Days", analytics, currency)
+    story += _top_items_flowables(analytics['top_items'], currency)
+    story += _category_flowables(analytics.get('category_performance', []), currency)
+
+    doc.build(story)
+
+
+def _ledger_tables(sales: Iterable[Dict], currency: str, chunk_rows: int) -> Iterator[Table]:
+    """Yield the transaction ledger as a sequence of fixed-size tables"""
+    rows = [LEDGER_HEADER]
+    for sale in sales:
+        rows.append([
+            datetime.fromtimestamp(sale.sale_ts).strftime('%Y-%m-%d %H:%M'),
+            sale['item_name'],
+            sale.get('category', ''),
+            str(sale['quantity']),
+            _money(currency, sale['unit_price']),
+            _money(currency, sale['total_amount']),
+            _money(currency, sale['profit'])
+        ])
+        if len(rows) > chunk_rows:
+            yield _ledger_table(rows)
+            rows = [LEDGER_HEADER]
+
+    if len(rows) > 1:
+        yield _ledger_table(rows)
+
+
+def _ledger_table(rows: List[List[str]]) -> Table:
+    table = Table(rows, repeatRows=1)
+    table.setStyle(LEDGER_TABLE_STYLE)
+    return table
+
+
+def _full_report_flowables(title: str, summary: Dict, sales: Iterable[Dict],
+                           currency: str, chunk_rows: int) -> Iterator:
+    analytics = {
+        'total_sales': summary['sales'],
+        'total_revenue': summary['revenue'],
+        'total_profit': summary['profit'],
+        'average_sale': summary['revenue'] / summary['sales'] if summary['sales'] else 0
+    }
+    yield from _summary_flowables(title, analytics, currency)
+
+    category_performance = [
+        {
+            'category': category,
+            'quantity': totals['quantity'],
+            'revenue': totals['revenue'],
+            'profit': totals['profit'],
+            'revenue_share': totals['revenue'] / summary['revenue'] * 100 if summary['revenue'] else 0
+        }
+        for category, totals in sorted(summary['categories'].items(), key=lambda x: x[1]['revenue'], reverse=True)
+    ]
+    yield from _category_flowables(category_performance, currency)
+
+    # Per-category item breakdowns
+    items_by_category: Dict[str, List[Dict]] = {}
+    for totals in summary['items'].values():
+        items_by_category.setdefault(totals['category'], []).append(totals)
+
+    for category in category_performance:
+        yield Spacer(1, 20)
+        yield Paragraph(f"{category['category']} - Items", _STYLES['Heading3'])
+        item_rows = [['Item Name', 'Quantity Sold', 'Revenue', 'Profit']]
+        for totals in sorted(items_by_category.get(category['category'], []), key=lambda x: x['revenue'], reverse=True):
+            item_rows.append([
+                totals['item_name'],
+                str(totals['quantity']),
+                _money(currency, totals['revenue']),
+                _money(currency, totals['profit'])
+            ])
+        item_table = Table(item_rows, repeatRows=1)
+        item_table.setStyle(DETAIL_TABLE_STYLE)
+        yield item_table
+
+    # Transaction ledger, streamed in chunks
+    yield PageBreak()
+    yield Paragraph("Transaction Ledger", _STYLES['Heading2'])
+    yield Spacer(1, 12)
+    yield from _ledger_tables(sales, currency, chunk_rows)
+
+
+def build_full_report(path: str, summary: Dict, sales: Iterable[Dict], currency: str,
+                      start: datetime, end: datetime, chunk_rows: int = LEDGER_CHUNK_ROWS):
+    """Write a month-end style report with category breakdowns and the full ledger to `path`
+
+    `summary` is a rollup aggregate for the window (with item and category
+    breakdowns) and `sales` is an iterable over the window's sales; it is
+    consumed lazily, one ledger chunk at a time.
+    """
+    doc = SimpleDocTemplate(path, pagesize=letter)
+    last_day = (end - timedelta(microseconds=1)).date()
+    title = f"Sales Report - {start.date().isoformat()} to {last_day.isoformat()}"
+    doc.build(_StreamingStory(_full_report_flowables(title, summary, sales, currency, chunk_rows)))
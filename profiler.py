@@ -0,0 +1,161 @@
+import hmac
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+from itertools import count
+from typing import Dict, List, Any, Optional
+
+# Seconds between stack samples of a profiled request
+DEFAULT_INTERVAL = 0.005
+
+# Completed profiles kept for the admin endpoint, oldest dropped first
+DEFAULT_KEEP = 50
+
+PROFILE_HEADER = 'X-Profile'
+PROFILE_PARAM = 'profile'
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.splitext(os.path.basename(code.co_filename))[0]}:{code.co_name}"
+
+
+class RequestSampler:
+    """Samples one thread's stack on a timer until stopped.
+
+    Stacks are collapsed to 'root;...;leaf' strings as they are taken, so
+    the result is a Counter ready for flamegraph.pl or speedscope.
+    """
+
+    def __init__(self, thread_id: int, interval: float = DEFAULT_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, name='request-sampler', daemon=True)
+        self.started = time.perf_counter()
+        self.duration = 0.0
+
+    def start(self) -> 'RequestSampler':
+        self.started = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self.started
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                break
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(labels))] += 1
+            self.samples += 1
+
+
+class ProfileStore:
+    """Bounded in-memory store of completed request profiles"""
+
+    def __init__(self, keep: int = DEFAULT_KEEP):
+        self._profiles: deque = deque(maxlen=keep)
+        self._ids = count(1)
+        self._lock = threading.Lock()
+
+    def add(self, method: str, path: str, status: Optional[int], trigger: str,
+            sampler: RequestSampler) -> Dict[str, Any]:
+        profile = {
+            'id': next(self._ids),
+            'method': method,
+            'path': path,
+            'status': status,
+            'trigger': trigger,
+            'date': datetime.now().isoformat(),
+            'duration_ms': round(sampler.duration * 1000, 2),
+            'samples': sampler.samples,
+            'stacks': sampler.stacks
+        }
+        with self._lock:
+            self._profiles.append(profile)
+        return profile
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Get profile summaries, newest first"""
+        with self._lock:
+            profiles = list(self._profiles)
+        return [
+            {key: value for key, value in profile.items() if key != 'stacks'}
+            for profile in reversed(profiles)
+        ]
+
+    def get(self, profile_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            for profile in self._profiles:
+                if profile['id'] == profile_id:
+                    return profile
+        return None
+
+
+def collapsed(profile: Dict[str, Any]) -> str:
+    """Render a profile in collapsed-stack format, one 'stack count' line each"""
+    return ''.join(f"{stack} {samples}\n" for stack, samples in profile['stacks'].most_common())
+
+
+def has_profile_token(request, token: str) -> bool:
+    """Whether the request carries the profile token; never true when no token is configured"""
+    supplied = request.headers.get(PROFILE_HEADER) or request.args.get(PROFILE_PARAM) or ''
+    return bool(token) and hmac.compare_digest(supplied.encode('utf-8'), token.encode('utf-8'))
+
+
+def install_profiler(app, sample_rate: float = 0.0, token: str = '',
+                     interval: float = DEFAULT_INTERVAL, keep: int = DEFAULT_KEEP) -> Optional[ProfileStore]:
+    """Hook opt-in request profiling into a Flask app.
+
+    A request is profiled when it carries the token in the X-Profile header
+    or ?profile= parameter, or when picked at `sample_rate`. With no token
+    and a zero rate no hooks are registered at all, so requests pay nothing.
+    Captured profiles can only be read with the token (has_profile_token).
+    """
+    if not token and sample_rate <= 0:
+        return None
+
+    from flask import g, request
+
+    store = ProfileStore(keep)
+
+    @app.before_request
+    def _start_profile():
+        if has_profile_token(request, token):
+            trigger = 'requested'
+        elif sample_rate > 0 and random.random() < sample_rate:
+            trigger = 'sampled'
+        else:
+            return
+        g.profile_sampler = RequestSampler(threading.get_ident(), interval).start()
+        g.profile_trigger = trigger
+
+    @app.after_request
+    def _record_status(response):
+        if 'profile_sampler' in g:
+            g.profile_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def _finish_profile(error=None):
+        sampler = g.pop('profile_sampler', None)
+        if sampler is None:
+            return
+        sampler.stop()
+        store.add(request.method, request.path, g.pop('profile_status', None), g.pop('profile_trigger'), sampler)
+
+    return store
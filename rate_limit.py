@@ -0,0 +1,39 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable
+
+# Clients tracked at once; the least recently seen are forgotten (and start with a full bucket)
+MAX_CLIENTS = 10000
+
+
+class RateLimiter:
+    """Token bucket per client: `rate` requests per second on average, bursts of up to `burst`"""
+
+    def __init__(self, rate: float, burst: int, max_clients: int = MAX_CLIENTS):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self.rejected = 0
+        self._buckets: 'OrderedDict[Hashable, list]' = OrderedDict()  # client -> [tokens, updated]
+        self._lock = threading.Lock()
+
+    def check(self, client: Hashable) -> float:
+        """Take a token for the client; returns 0 if allowed, else seconds until one is available"""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                bucket = self._buckets[client] = [float(self.burst), now]
+                if len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(client)
+                bucket[0] = min(float(self.burst), bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0.0
+            self.rejected += 1
+            return (1 - bucket[0]) / self.rate
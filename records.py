@@ -0,0 +1,150 @@
+import sys
+from collections.abc import Mapping
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+# Stock, sales and alerts recorded without a location belong to the main store
+DEFAULT_LOCATION = 'main'
+
+
+def to_timestamp(value: str) -> float:
+    """Convert an ISO date/time string to epoch seconds"""
+    return datetime.fromisoformat(value).timestamp()
+
+
+def to_iso(timestamp: float) -> str:
+    """Convert epoch seconds to the ISO string the dict records used to hold"""
+    return datetime.fromtimestamp(timestamp).isoformat()
+
+
+def _iso_property(slot: str) -> property:
+    """Expose an epoch-seconds slot as an ISO string, for templates and the dict view"""
+    def get(self):
+        return to_iso(getattr(self, slot))
+
+    def set(self, value):
+        setattr(self, slot, to_timestamp(value))
+
+    return property(get, set)
+
+
+class Record(Mapping):
+    """Slotted record that reads and writes like the dict it replaced.
+
+    Subclasses list their storage in __slots__ and their dict view in
+    `fields`. Timestamps are stored as epoch seconds and exposed under their
+    old keys as ISO strings, so `sale['sale_date']` and `{{ sale.sale_date }}`
+    keep working while loops can compare `sale.sale_ts` directly.
+    """
+
+    __slots__ = ()
+    fields: Tuple[str, ...] = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._readable = frozenset(cls.fields) | frozenset(cls.__slots__)
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._readable:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value: Any):
+        if key not in self._readable:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._readable
+
+    def __iter__(self):
+        return iter(self.fields)
+
+    def __len__(self) -> int:
+        return len(self.fields)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in self.fields}
+
+    def to_row(self) -> List[Any]:
+        """Slot values in order, the compact form used for on-disk storage"""
+        return [getattr(self, slot) for slot in self.__slots__]
+
+    @classmethod
+    def from_row(cls, row: List[Any]) -> 'Record':
+        return cls(*row)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class Item(Record):
+    __slots__ = ('id', 'name', 'category', 'cost_price', 'selling_price', 'created_ts', 'active')
+    fields = ('id', 'name', 'category', 'cost_price', 'selling_price', 'created_date', 'active')
+
+    def __init__(self, id: int, name: str, category: str, cost_price: float, selling_price: float,
+                 created_ts: float, active: bool = True):
+        self.id = id
+        self.name = name
+        self.category = sys.intern(category)
+        self.cost_price = cost_price
+        self.selling_price = selling_price
+        self.created_ts = created_ts
+        self.active = active
+
+    created_date = _iso_property('created_ts')
+
+
+class Sale(Record):
+    # New slots go at the end with a default, so rows already on disk still load
+    __slots__ = ('id', 'item_id', 'item_name', 'category', 'quantity', 'unit_price', 'total_amount',
+                 'cost_price', 'profit', 'sale_ts', 'notes', 'location')
+    fields = ('id', 'item_id', 'item_name', 'category', 'quantity', 'unit_price', 'total_amount',
+              'cost_price', 'profit', 'sale_date', 'notes', 'location')
+
+    def __init__(self, id: int, item_id: int, item_name: str, category: str, quantity: int,
+                 unit_price: float, total_amount: float, cost_price: float, profit: float,
+                 sale_ts: float, notes: str = '', location: str = DEFAULT_LOCATION):
+        self.id = id
+        self.item_id = item_id
+        self.item_name = item_name
+        self.category = sys.intern(category)
+        self.quantity = quantity
+        self.unit_price = unit_price
+        self.total_amount = total_amount
+        self.cost_price = cost_price
+        self.profit = profit
+        self.sale_ts = sale_ts
+        self.notes = notes
+        self.location = sys.intern(location)
+
+    sale_date = _iso_property('sale_ts')
+
+
+class InventoryEntry(Record):
+    __slots__ = ('quantity', 'updated_ts')
+    fields = ('quantity', 'last_updated')
+
+    def __init__(self, quantity: int, updated_ts: float):
+        self.quantity = quantity
+        self.updated_ts = updated_ts
+
+    last_updated = _iso_property('updated_ts')
+
+
+class Alert(Record):
+    __slots__ = ('id', 'type', 'item_id', 'item_name', 'message', 'created_ts', 'active', 'location')
+    fields = ('id', 'type', 'item_id', 'item_name', 'message', 'created_date', 'active', 'location')
+
+    def __init__(self, id: int, type: str, item_id: int, item_name: str, message: str,
+                 created_ts: float, active: bool = True, location: str = DEFAULT_LOCATION):
+        self.id = id
+        self.type = sys.intern(type)
+        self.item_id = item_id
+        self.item_name = item_name
+        self.message = message
+        self.created_ts = created_ts
+        self.active = active
+        self.location = sys.intern(location)
+
+    created_date = _iso_property('created_ts')
@@ -0,0 +1,165 @@
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+from loadtest import percentile
+from workload_capture import decode_argument, read_workload
+
+# A slowdown counts as a regression only past both of these, so fast operations' jitter is not reported
+DEFAULT_THRESHOLD = 1.25  # Ratio of p90 latencies
+DEFAULT_MIN_MS = 1.0
+
+
+def operation_key(entry: Dict) -> str:
+    """Latencies are compared per DataManager method and per route, not per distinct URL"""
+    if entry['op'] == 'call':
+        return entry['name']
+    return f"GET {entry['route'] or entry['path']}"
+
+
+def captured_latencies(path: str) -> Dict[str, List[float]]:
+    """Latencies as measured while capturing, in seconds"""
+    latencies: Dict[str, List[float]] = {}
+    for entry in read_workload(path):
+        if entry['op'] in ('call', 'get'):
+            latencies.setdefault(operation_key(entry), []).append(entry['ms'] / 1000)
+    return latencies
+
+
+def replay(path: str, app, data_manager, pace: bool = False) -> Tuple[Dict[str, List[float]], List[Dict]]:
+    """Re-run a captured workload against a fresh store, one operation at a time in captured order.
+
+    Returns the latencies per operation and any divergences: operations
+    that failed now but not then (or the reverse), or read requests whose
+    status changed, which mean the rebuilt state is not the one captured.
+    """
+    client = app.test_client()
+    latencies: Dict[str, List[float]] = {}
+    divergences = []
+    started = time.perf_counter()
+
+    for entry in read_workload(path):
+        if entry['op'] not in ('call', 'get'):
+            continue
+        if pace:
+            delay = entry['t'] - (time.perf_counter() - started)
+            if delay > 0:
+                time.sleep(delay)
+
+        if entry['op'] == 'call':
+            method = getattr(data_manager, entry['name'])
+            args = decode_argument(entry['args'], data_manager)
+            kwargs = decode_argument(entry['kwargs'], data_manager)
+            error = None
+            began = time.perf_counter()
+            try:
+                method(*args, **kwargs)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            seconds = time.perf_counter() - began
+            if (error is None) != (entry.get('error') is None):
+                divergences.append({'operation': entry['name'], 't': entry['t'],
+                                    'captured': entry.get('error'), 'replayed': error})
+        else:
+            began = time.perf_counter()
+            response = client.get(entry['path'])
+            response.get_data()
+            response.close()
+            seconds = time.perf_counter() - began
+            if response.status_code != entry['status']:
+                divergences.append({'operation': entry['path'], 't': entry['t'],
+                                    'captured': entry['status'], 'replayed': response.status_code})
+
+        latencies.setdefault(operation_key(entry), []).append(seconds)
+
+    return latencies, divergences
+
+
+def compare(baseline: Dict[str, List[float]], current: Dict[str, List[float]],
+            threshold: float = DEFAULT_THRESHOLD, min_ms: float = DEFAULT_MIN_MS) -> List[Dict]:
+    """Per-operation p50/p90 before and after, flagging p90 slowdowns past both limits"""
+    rows = []
+    for key in sorted(set(baseline) | set(current)):
+        before = sorted(baseline.get(key, []))
+        after = sorted(current.get(key, []))
+        if not before or not after:
+            continue
+        before_p90, after_p90 = percentile(before, 90), percentile(after, 90)
+        rows.append({
+            'operation': key,
+            'count': len(after),
+            'before_p50': percentile(before, 50),
+            'after_p50': percentile(after, 50),
+            'before_p90': before_p90,
+            'after_p90': after_p90,
+            'ratio': after_p90 / before_p90 if before_p90 else float('inf'),
+            'regression': after_p90 > before_p90 * threshold and (after_p90 - before_p90) * 1000 > min_ms
+        })
+    return rows
+
+
+def print_comparison(title: str, rows: List[Dict]):
+    print(f"\n{title}")
+    print(f"{'operation':<40}{'count':>7}{'p50 before':>12}{'p50 after':>11}{'p90 before':>12}{'p90 after':>11}"
+          f"{'ratio':>8}")
+    for row in rows:
+        print(f"{row['operation']:<40}{row['count']:>7}{row['before_p50'] * 1000:>12.2f}"
+              f"{row['after_p50'] * 1000:>11.2f}{row['before_p90'] * 1000:>12.2f}{row['after_p90'] * 1000:>11.2f}"
+              f"{row['ratio']:>8.2f}{'  REGRESSION' if row['regression'] else ''}")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        description='Rebuild the store from a WORKLOAD_CAPTURE log, replay it and compare per-operation latency')
+    parser.add_argument('log', help='Workload log written with WORKLOAD_CAPTURE=<path>')
+    parser.add_argument('--baseline', help='Latencies saved with --save from a replay on another build '
+                                           '(default: the timings in the log itself)')
+    parser.add_argument('--save', help='Write this replay\'s latencies here, to use as a later --baseline')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='p90 ratio above which an operation counts as slower')
+    parser.add_argument('--min-ms', type=float, default=DEFAULT_MIN_MS,
+                        help='Ignore slowdowns smaller than this many milliseconds')
+    parser.add_argument('--pace', action='store_true', help='Keep the captured gaps between operations')
+    args = parser.parse_args(argv)
+
+    # Replay into a fresh in-process store, with nothing running alongside it and nothing captured
+    os.environ['BACKGROUND_JOBS'] = '0'
+    for name in ('WORKLOAD_CAPTURE', 'REPLICATION_LOG', 'REPLICA_OF'):
+        os.environ.pop(name, None)
+    from main import app
+    import routes  # noqa: F401
+    from data_manager import data_manager
+
+    latencies, divergences = replay(args.log, app, data_manager, pace=args.pace)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(latencies, f)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        title = f"replay vs {args.baseline}"
+    else:
+        baseline = captured_latencies(args.log)
+        title = 'replay vs captured timings'
+    rows = compare(baseline, latencies, args.threshold, args.min_ms)
+    print_comparison(title, rows)
+
+    if divergences:
+        print(f"\n{len(divergences)} operations behaved differently than when captured; first few:")
+        for divergence in divergences[:5]:
+            print(f"  t={divergence['t']}s {divergence['operation']}: "
+                  f"captured {divergence['captured']!r}, replayed {divergence['replayed']!r}")
+
+    regressions = [row['operation'] for row in rows if row['regression']]
+    if regressions:
+        print(f"\nSlower: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
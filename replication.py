@@ -0,0 +1,187 @@
+import fcntl
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, Dict, Optional
+
+# Seconds between polls of the mutation log on a replica
+POLL_INTERVAL = 0.2
+
+# Entries applied per lock acquisition, so a catching-up replica still serves reads between batches
+APPLY_BATCH = 500
+
+# Unreadable or failing entries a replica keeps for inspection after skipping them
+QUARANTINE_KEEP = 50
+
+
+class MutationLog:
+    """Primary side: appends every data mutation to a JSON-lines file.
+
+    Entries record effects (the finished sale row, the stock movement with
+    its balance and date) rather than calls, so replaying them reproduces
+    the primary's state exactly. The file is truncated and stamped with a new
+    epoch when the primary starts, because the primary's own state starts
+    empty too.
+
+    Only one process can write a log: each worker of a multi-worker server
+    has its own in-memory store, so a second writer would interleave two
+    different histories. It is refused instead of truncating the first.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.epoch = uuid.uuid4().hex
+        self.seq = 0
+        self._lock = threading.Lock()
+        self._file = open(path, 'a', encoding='utf-8')
+        try:
+            fcntl.flock(self._file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._file.close()
+            raise RuntimeError(f"{path} is already written by another process; a replication primary must run "
+                               f"as a single worker") from None
+        self._file.truncate(0)
+        self.append('reset', {'epoch': self.epoch, 'pid': os.getpid()})
+
+    def append(self, kind: str, payload: Any):
+        with self._lock:
+            entry = {'seq': self.seq, 'ts': time.time(), 'kind': kind, 'payload': payload}
+            self._file.write(json.dumps(entry) + '\n')
+            self._file.flush()
+            self.seq += 1
+
+    def status(self) -> Dict[str, Any]:
+        return {'role': 'primary', 'log': self.path, 'epoch': self.epoch, 'seq': self.seq}
+
+
+class ReplicaTailer:
+    """Replica side: follows the primary's mutation log and applies each entry to a DataManager.
+
+    The read position advances entry by entry, so an error never applies an
+    entry twice. An entry that cannot be read or applied is skipped and kept
+    in `quarantine` rather than stalling replication. A restarted primary is
+    recognised by the epoch in its log's first entry, even when it has
+    already written past the old position.
+    """
+
+    def __init__(self, data_manager, path: str, poll_interval: float = POLL_INTERVAL):
+        self.data_manager = data_manager
+        self.path = path
+        self.poll_interval = poll_interval
+        self.epoch: Optional[str] = None
+        self.applied_seq: Optional[int] = None
+        self.lag: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.skipped = 0
+        self.quarantine: deque = deque(maxlen=QUARANTINE_KEEP)
+        self._offset = 0
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._follow, name='replica-tailer', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _follow(self):
+        while not self._stopped.is_set():
+            try:
+                self.poll()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Error applying mutation log: {e}")
+            self._stopped.wait(self.poll_interval)
+
+    def poll(self) -> int:
+        """Apply any complete entries written since the last poll"""
+        try:
+            f = open(self.path, 'rb')
+        except OSError:
+            return 0
+
+        applied = 0
+        with f:
+            first = f.readline()
+            if not first.endswith(b'\n'):
+                return 0  # The primary is starting and its reset entry is not written yet
+            epoch = _reset_epoch(first)
+            if epoch is None:
+                raise ValueError(f"{self.path} does not start with a reset entry")
+            if epoch != self.epoch:
+                self._offset = 0  # A new primary: its reset entry resyncs us
+
+            f.seek(self._offset)
+            while True:
+                lines = f.readlines(1 << 20)
+                if not lines:
+                    break
+                complete = [line for line in lines if line.endswith(b'\n')]
+                for start in range(0, len(complete), APPLY_BATCH):
+                    with self.data_manager.lock:
+                        for line in complete[start:start + APPLY_BATCH]:
+                            self._apply_line(line)
+                            self._offset += len(line)
+                            applied += 1
+                if len(complete) < len(lines):
+                    break  # Partial last line: the primary is mid-write
+        return applied
+
+    def _apply_line(self, line: bytes):
+        try:
+            self._apply(json.loads(line))
+        except Exception as e:
+            self.skipped += 1
+            self.last_error = f"Skipped entry at byte {self._offset}: {type(e).__name__}: {e}"
+            self.quarantine.append({'offset': self._offset, 'error': self.last_error,
+                                    'entry': line[:1000].decode('utf-8', 'replace')})
+            print(self.last_error)
+
+    def _apply(self, entry: Dict[str, Any]):
+        if entry['kind'] == 'reset':
+            if self.epoch is not None:
+                self.data_manager.reset()
+            self.epoch = entry['payload']['epoch']
+        else:
+            self.data_manager.apply_mutation(entry['kind'], entry['payload'])
+        self.applied_seq = entry['seq']
+        self.lag = round(time.time() - entry['ts'], 3)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'role': 'replica',
+            'log': self.path,
+            'epoch': self.epoch,
+            'applied_seq': self.applied_seq,
+            'lag_seconds': self.lag,
+            'last_error': self.last_error,
+            'skipped_entries': self.skipped,
+            'quarantine': list(self.quarantine)[-5:]
+        }
+
+
+def _reset_epoch(line: bytes) -> Optional[str]:
+    """The epoch of a log's first line, if it is a reset entry"""
+    try:
+        entry = json.loads(line)
+        return entry['payload']['epoch'] if entry['kind'] == 'reset' else None
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def start_replication(data_manager, log_path: Optional[str] = None, replica_of: Optional[str] = None):
+    """Wire a DataManager up as a primary (writing log_path) or a replica (following replica_of)"""
+    if replica_of:
+        tailer = ReplicaTailer(data_manager, replica_of)
+        tailer.start()
+        return tailer
+    if log_path:
+        data_manager.mutation_log = MutationLog(log_path)
+        return data_manager.mutation_log
+    return None
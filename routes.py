@@ -1,14 +1,90 @@
-from flask import render_template, request, jsonify, redirect, url_for, flash, send_file
+from flask import render_template, request, jsonify, redirect, url_for, flash, send_file, session
 from app import app
 from data_manager import data_manager
+from stock_ledger import ADJUSTMENT_REASONS
+from scheduler import JobScheduler, parse_time_of_day
+from profiler import install_profiler, collapsed, has_profile_token
+from records import Record
+from replication import start_replication, ReplicaTailer
+from assets import install_assets
+from fragment_cache import install_fragment_cache
+from rate_limit import RateLimiter
+from workload_capture import install_workload_capture
+from offload import OffloadExecutor, ExecutorBusy, freeze
+from sales_rollups import hour_bounds
+import export_tasks
 from datetime import datetime, timedelta
 import io
+import math
+import os
 import csv
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib import colors
-from reportlab.lib.units import inch
+import tempfile
+import uuid
+
+# Precomputed results may lag live data by at most this many seconds
+PRECOMPUTE_INTERVAL = int(os.environ.get('PRECOMPUTE_INTERVAL', 60))
+PRECOMPUTE_MAX_AGE = PRECOMPUTE_INTERVAL * 2
+PRECOMPUTED_ANALYTICS_DAYS = (7, 30, 90)
+
+scheduler = JobScheduler(workers=2)
+
+# Items, sales, stock entries and alerts are slotted records; serialise them through their dict view
+_default_json = app.json.default
+
+def _json_default(value):
+    if isinstance(value, Record):
+        return value.to_dict()
+    return _default_json(value)
+
+app.json.default = _json_default
+
+# Opt-in request profiling: send the token as X-Profile header or ?profile=, or sample a fraction of requests
+PROFILE_TOKEN = os.environ.get('PROFILE_TOKEN', '')
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+PROFILE_INTERVAL_MS = float(os.environ.get('PROFILE_INTERVAL_MS', 5))
+
+profiles = install_profiler(app, sample_rate=PROFILE_SAMPLE_RATE, token=PROFILE_TOKEN,
+                            interval=PROFILE_INTERVAL_MS / 1000)
+
+# Fingerprinted, precompressed JS/CSS and gzip for HTML/JSON (COMPRESS_RESPONSES=0 when a proxy compresses)
+# BUILD_ASSETS=0 when the assets are built at deploy time (python assets.py) or the app directory is read-only
+install_assets(app, build=os.environ.get('BUILD_ASSETS', '1') != '0',
+               compress=os.environ.get('COMPRESS_RESPONSES', '1') != '0')
+
+# Rendered table rows and report sections, keyed by the data version they were rendered from
+fragments = install_fragment_cache(app, max_entries=int(os.environ.get('FRAGMENT_CACHE_ENTRIES', 20000)),
+                                   max_bytes=int(os.environ.get('FRAGMENT_CACHE_MB', 32)) * 1024 * 1024)
+
+# Replication: a primary writes every mutation to REPLICATION_LOG; a process started with
+# REPLICA_OF pointing at that file follows it and serves reports without touching the tills
+replication = start_replication(data_manager, log_path=os.environ.get('REPLICATION_LOG'),
+                                replica_of=os.environ.get('REPLICA_OF'))
+IS_REPLICA = isinstance(replication, ReplicaTailer)
+
+# Workload capture for replay.py: WORKLOAD_CAPTURE names the log; must be wired before jobs take method references
+workload = install_workload_capture(app, data_manager, os.environ.get('WORKLOAD_CAPTURE'))
+
+# CSV/PDF exports and long exact analytics run here; OFFLOAD_WORKERS=0 keeps them inline (still bounded)
+executor = OffloadExecutor(workers=int(os.environ.get('OFFLOAD_WORKERS', 0)),
+                           max_pending=int(os.environ.get('OFFLOAD_QUEUE', 0)) or None,
+                           queue_wait=float(os.environ.get('OFFLOAD_QUEUE_WAIT', 2)))
+data_manager.executor = executor
+
+# Search suggestions fire on every keystroke; cap each client so a busy till cannot tie up the workers
+suggestion_limiter = RateLimiter(rate=float(os.environ.get('SUGGEST_RATE_PER_SEC', 10)),
+                                 burst=int(os.environ.get('SUGGEST_BURST', 20)))
+
+@app.before_request
+def reject_writes_on_replica():
+    """Replicas are read-only; changes must go to the primary"""
+    if IS_REPLICA and request.method not in ('GET', 'HEAD', 'OPTIONS'):
+        return jsonify({'status': 'error', 'message': 'This server is a read-only replica'}), 403
+
+def get_analytics(days: int):
+    """Sales analytics for a window, served from the background job when one covers it"""
+    if days in PRECOMPUTED_ANALYTICS_DAYS:
+        return scheduler.latest(f'analytics_{days}d', max_age=PRECOMPUTE_MAX_AGE)
+    return data_manager.get_sales_analytics(days)
 
 @app.route('/')
 def index():
@@ -21,7 +97,7 @@ def index():
     today_summary = data_manager.get_daily_summary()
     
     # Get recent sales (last 5)
-    recent_sales = sorted(data_manager.sales, key=lambda x: x['sale_date'], reverse=True)[:5]
+    recent_sales = data_manager.get_recent_sales(5)
     
     # Get active alerts
     alerts = data_manager.get_active_alerts()
@@ -31,7 +107,7 @@ def index():
     low_stock_items = [item for item in inventory_status if item['is_low_stock']][:5]
     
     # Get quick analytics
-    analytics = data_manager.get_sales_analytics(7)  # Last 7 days
+    analytics = get_analytics(7)  # Last 7 days
     
     return render_template('index.html',
                          today_summary=today_summary,
@@ -93,7 +169,8 @@ def catalog():
                          items=items,
                          categories=data_manager.item_categories,
                          search_query=search_query,
-                         selected_category=category)
+                         selected_category=category,
+                         item_versions=data_manager.item_detail_versions)
 
 @app.route('/catalog/bulk-add')
 def bulk_add_items():
@@ -228,25 +305,82 @@ def add_item():
     
     return redirect(url_for('catalog'))
 
+@app.route('/catalog/update-prices', methods=['POST'])
+def update_item_prices():
+    """Change an item's cost and/or selling price"""
+    try:
+        item_id = int(request.form.get('item_id', 0))
+        cost_price = request.form.get('cost_price', '').strip()
+        selling_price = request.form.get('selling_price', '').strip()
+        
+        item = data_manager.update_item_prices(
+            item_id,
+            cost_price=float(cost_price) if cost_price else None,
+            selling_price=float(selling_price) if selling_price else None
+        )
+        flash(f'Updated prices for "{item["name"]}"', 'success')
+        
+    except ValueError as e:
+        flash(f'Error updating prices: {str(e)}', 'error')
+    except Exception as e:
+        flash(f'Unexpected error: {str(e)}', 'error')
+    
+    return redirect(url_for('catalog'))
+
+@app.route('/api/price-history/<int:item_id>')
+def price_history(item_id):
+    """API endpoint for an item's price/cost history"""
+    if not data_manager.get_item_by_id(item_id):
+        return jsonify({'status': 'error', 'message': 'Item not found'}), 404
+    return jsonify(data_manager.get_price_history(item_id))
+
+@app.route('/api/sale-stats/<int:item_id>')
+def sale_stats(item_id):
+    """API endpoint for an item's usual unit price and quantity per sale"""
+    if not data_manager.get_item_by_id(item_id):
+        return jsonify({'status': 'error', 'message': 'Item not found'}), 404
+    return jsonify(data_manager.get_sale_stats(item_id))
+
+@app.route('/api/item-locations/<int:item_id>')
+def item_locations(item_id):
+    """API endpoint for an item's stock at each location"""
+    if not data_manager.get_item_by_id(item_id):
+        return jsonify({'status': 'error', 'message': 'Item not found'}), 404
+    return jsonify(data_manager.get_item_locations(item_id))
+
 @app.route('/api/search-suggestions')
 def search_suggestions():
     """API endpoint for search suggestions"""
+    retry_after = suggestion_limiter.check(request.remote_addr)
+    if retry_after:
+        response = jsonify({'status': 'error', 'message': 'Too many requests'})
+        response.headers['Retry-After'] = str(math.ceil(retry_after))
+        return response, 429
+    
     query = request.args.get('q', '')
     suggestions = data_manager.get_item_suggestions(query)
     return jsonify(suggestions)
 
+@app.route('/api/search-suggestions/stats')
+def search_suggestion_stats():
+    """API endpoint for suggestion cache and rate limiter counters"""
+    stats = data_manager.suggestions.stats()
+    stats['rate_limited'] = suggestion_limiter.rejected
+    return jsonify(stats)
+
 @app.route('/sales')
 def sales():
     """Sales management page"""
     # Get recent sales
-    recent_sales = sorted(data_manager.sales, key=lambda x: x['sale_date'], reverse=True)[:20]
+    recent_sales = data_manager.get_recent_sales(20)
     
     # Get items for dropdown
     items = [item for item in data_manager.items if item['active']]
     
     return render_template('sales.html',
                          recent_sales=recent_sales,
-                         items=items)
+                         items=items,
+                         locations=data_manager.locations)
 
 @app.route('/sales/add', methods=['POST'])
 def add_sale():
@@ -287,8 +421,10 @@ def add_sale():
         if sale_price <= 0:
             raise ValueError("Sale price must be positive")
         
-        # Add the sale
-        sale = data_manager.add_sale(item['id'], quantity, sale_price, notes)
+        # Add the sale; without an explicit basket, sales from one browser session form the baskets
+        basket_id = request.form.get('basket_id', '').strip() or session.setdefault('till_id', uuid.uuid4().hex)
+        sale = data_manager.add_sale(item['id'], quantity, sale_price, notes,
+                                     location=request.form.get('location') or None, basket_id=basket_id)
         flash(f'Sale recorded: {quantity}x {item["name"]} for {data_manager.settings["currency"]}{sale_price:.2f}', 'success')
         
     except ValueError as e:
@@ -298,22 +434,75 @@ def add_sale():
     
     return redirect(url_for('sales'))
 
+@app.route('/sales/import', methods=['POST'])
+def import_sales():
+    """Import historical sales from an uploaded CSV"""
+    wants_json = request.accept_mimetypes.best == 'application/json'
+    upload = request.files.get('file')
+    
+    if not upload or not upload.filename:
+        if wants_json:
+            return jsonify({'status': 'error', 'message': 'No CSV file provided'}), 400
+        flash('Please choose a CSV file to import', 'error')
+        return redirect(url_for('sales'))
+    
+    from sales_importer import SalesImporter, file_fingerprint
+    
+    handle, path = tempfile.mkstemp(prefix='sales_import_', suffix='.csv')
+    os.close(handle)
+    try:
+        upload.save(path)
+        fingerprint = file_fingerprint(path)
+        importer = SalesImporter(
+            data_manager,
+            checkpoint_path=os.path.join(tempfile.gettempdir(), f'sales_import_{fingerprint}.json')
+        )
+        result = importer.import_file(path, fingerprint=fingerprint)
+    except (ValueError, UnicodeDecodeError) as e:
+        if wants_json:
+            return jsonify({'status': 'error', 'message': str(e)}), 400
+        flash(f'Error importing sales: {str(e)}', 'error')
+        return redirect(url_for('sales'))
+    finally:
+        os.remove(path)
+    
+    if wants_json:
+        return jsonify(dict(result, status='success'))
+    
+    flash(f"Imported {result['imported']} historical sales", 'success')
+    if result['resumed_from']:
+        flash(f"Resumed a previous import from row {result['resumed_from']}", 'success')
+    if result['error_count']:
+        flash(f"{result['error_count']} rows had errors and were not imported.", 'warning')
+        for error in result['errors'][:5]:
+            flash(error, 'error')
+    
+    return redirect(url_for('sales'))
+
 @app.route('/inventory')
 def inventory():
-    """Inventory management page"""
-    # Get inventory status
-    inventory_status = data_manager.get_inventory_status()
+    """Inventory management page, chain-wide or for one location (?location=)"""
+    location = request.args.get('location') or None
+    try:
+        inventory_status = data_manager.get_inventory_status(location)
+    except ValueError as e:
+        flash(str(e), 'error')
+        return redirect(url_for('inventory'))
     
     # Sort by low stock first
     inventory_status.sort(key=lambda x: (not x['is_low_stock'], x['quantity']))
     
     # Get restock suggestions
-    restock_suggestions = data_manager.get_restock_suggestions()
+    restock_suggestions = scheduler.latest('restock_suggestions', max_age=PRECOMPUTE_MAX_AGE)
     
     return render_template('inventory.html',
                          inventory_status=inventory_status,
                          restock_suggestions=restock_suggestions,
-                         low_stock_threshold=data_manager.settings['low_stock_threshold'])
+                         adjustment_reasons=ADJUSTMENT_REASONS,
+                         low_stock_threshold=data_manager.get_low_stock_threshold(location),
+                         locations=data_manager.locations,
+                         location=location,
+                         item_versions=data_manager.item_versions)
 
 @app.route('/inventory/update', methods=['POST'])
 def update_inventory():
@@ -322,11 +511,13 @@ def update_inventory():
         item_id = int(request.form.get('item_id', 0))
         quantity = int(request.form.get('quantity', 0))
         operation = request.form.get('operation', 'add')
+        reason = request.form.get('reason', '').strip() or None
+        location = request.form.get('location') or None
         
         if quantity <= 0:
             raise ValueError("Quantity must be positive")
         
-        updated = data_manager.update_inventory(item_id, quantity, operation)
+        updated = data_manager.update_inventory(item_id, quantity, operation, reason, location=location)
         item = data_manager.get_item_by_id(item_id)
         
         operation_text = {
@@ -342,20 +533,119 @@ def update_inventory():
     except Exception as e:
         flash(f'Unexpected error: {str(e)}', 'error')
     
-    return redirect(url_for('inventory'))
+    return redirect(request.referrer or url_for('inventory'))
+
+@app.route('/inventory/transfer', methods=['POST'])
+def transfer_stock():
+    """Move stock between two locations"""
+    try:
+        item_id = int(request.form.get('item_id', 0))
+        quantity = int(request.form.get('quantity', 0))
+        transfer = data_manager.transfer_stock(item_id, quantity, request.form.get('from_location'),
+                                               request.form.get('to_location'))
+        item = data_manager.get_item_by_id(item_id)
+        flash(f"Moved {quantity} units of {item['name']} to {data_manager.locations[transfer['to']['location']]['name']}",
+              'success')
+    except ValueError as e:
+        flash(f'Error transferring stock: {str(e)}', 'error')
+    
+    return redirect(request.referrer or url_for('inventory'))
+
+@app.route('/api/locations', methods=['GET', 'POST'])
+def locations():
+    """API endpoint to list locations, or add/update one"""
+    if request.method == 'GET':
+        return jsonify(data_manager.get_locations())
+    
+    request_data = request.get_json(silent=True)
+    if not request_data:
+        return jsonify({'status': 'error', 'message': 'No JSON data provided'}), 400
+    try:
+        threshold = request_data.get('low_stock_threshold')
+        location = data_manager.save_location(str(request_data.get('code') or ''), str(request_data.get('name') or ''),
+                                              None if threshold is None else int(threshold))
+    except (TypeError, ValueError) as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    return jsonify(dict(location, status='success'))
+
+@app.route('/api/locations/<code>/analytics')
+def location_analytics(code):
+    """API endpoint for one location's sales analytics"""
+    try:
+        data = data_manager.get_sales_analytics(request.args.get('days', 30, type=int), location=code)
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    return jsonify(data)
+
+@app.route('/api/transfers', methods=['POST'])
+def transfers():
+    """API endpoint to move stock between locations"""
+    request_data = request.get_json(silent=True)
+    if not request_data:
+        return jsonify({'status': 'error', 'message': 'No JSON data provided'}), 400
+    try:
+        transfer = data_manager.transfer_stock(int(request_data.get('item_id') or 0),
+                                               int(request_data.get('quantity') or 0),
+                                               request_data.get('from_location'), request_data.get('to_location'))
+    except (TypeError, ValueError) as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    return jsonify(dict(transfer, status='success'))
+
+@app.route('/api/stock-movements')
+def stock_movements():
+    """API endpoint for the stock movement ledger"""
+    item_id = request.args.get('item_id', type=int)
+    limit = request.args.get('limit', 100, type=int)
+    return jsonify(data_manager.get_stock_movements(item_id, limit, request.args.get('location') or None))
+
+@app.route('/export/stock-on-date-csv')
+def export_stock_on_date_csv():
+    """Export stock levels as they stood at the end of a given date"""
+    date_arg = request.args.get('date', '').strip()
+    try:
+        as_of = datetime.fromisoformat(date_arg) if date_arg else datetime.now()
+    except ValueError:
+        flash(f'Invalid date: {date_arg}', 'error')
+        return redirect(url_for('inventory'))
+    if len(date_arg) == 10:
+        as_of += timedelta(days=1, microseconds=-1)  # End of that day
+    
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(['Item ID', 'Item Name', 'Category', 'Quantity', 'Cost Price', 'Stock Value'])
+    for row in data_manager.get_stock_on_date(as_of):
+        writer.writerow([
+            row['item']['id'],
+            row['item']['name'],
+            row['item']['category'],
+            row['quantity'],
+            f"{data_manager.settings['currency']}{row['item']['cost_price']:.2f}",
+            f"{data_manager.settings['currency']}{row['value']:.2f}"
+        ])
+    
+    mem_file = io.BytesIO(output.getvalue().encode('utf-8'))
+    
+    return send_file(
+        mem_file,
+        as_attachment=True,
+        download_name=f'stock_on_{as_of.strftime("%Y%m%d")}.csv',
+        mimetype='text/csv'
+    )
 
 @app.route('/reports')
 def reports():
     """Reports and analytics page"""
     # Get analytics for different periods
-    analytics_7d = data_manager.get_sales_analytics(7)
-    analytics_30d = data_manager.get_sales_analytics(30)
-    analytics_90d = data_manager.get_sales_analytics(90)
+    analytics_7d = get_analytics(7)
+    analytics_30d = get_analytics(30)
+    analytics_90d = get_analytics(90)
     
     return render_template('reports.html',
                          analytics_7d=analytics_7d,
                          analytics_30d=analytics_30d,
-                         analytics_90d=analytics_90d)
+                         analytics_90d=analytics_90d,
+                         analytics_versions={days: scheduler.published_at(f'analytics_{days}d')
+                                             for days in (7, 30, 90)})
 
 @app.route('/analytics')
 def analytics():
@@ -366,7 +656,7 @@ def analytics():
     except ValueError:
         period_days = 30
     
-    analytics = data_manager.get_sales_analytics(period_days)
+    analytics = get_analytics(period_days)
     inventory_status = data_manager.get_inventory_status()
     
     return render_template('analytics.html',
@@ -374,128 +664,169 @@ def analytics():
                          inventory_status=inventory_status,
                          period=period_days)
 
+def _parse_date_range(default_days: int = 30):
+    """Get (start, end) from the start/end query params, defaulting to the last N days"""
+    end_arg = request.args.get('end', '').strip()
+    start_arg = request.args.get('start', '').strip()
+    
+    if end_arg:
+        end_date = datetime.fromisoformat(end_arg)
+        if len(end_arg) == 10:
+            end_date += timedelta(days=1)  # Date-only end is inclusive of that day
+    else:
+        end_date = datetime.now()
+    
+    if start_arg:
+        start_date = datetime.fromisoformat(start_arg)
+    else:
+        try:
+            period_days = int(request.args.get('period', default_days))
+        except ValueError:
+            period_days = default_days
+        start_date = end_date - timedelta(days=period_days)
+    
+    return start_date, end_date
+
+CHART_COLORS = [
+    'rgba(255, 99, 132, 0.5)',
+    'rgba(54, 162, 235, 0.5)',
+    'rgba(255, 205, 86, 0.5)',
+    'rgba(75, 192, 192, 0.5)',
+    'rgba(153, 102, 255, 0.5)',
+    'rgba(255, 159, 64, 0.5)',
+    'rgba(199, 199, 199, 0.5)',
+    'rgba(83, 102, 255, 0.5)',
+    'rgba(255, 99, 255, 0.5)',
+    'rgba(99, 255, 132, 0.5)'
+]
+
 @app.route('/api/analytics-data')
 def analytics_data():
     """API endpoint for chart data"""
-    period = request.args.get('period', '30')
     chart_type = request.args.get('type', 'sales')
+    granularity = request.args.get('granularity', 'day')
+    metric = request.args.get('metric', 'revenue')
+    group_by = request.args.get('group_by') or None
     
     try:
-        period_days = int(period)
-    except ValueError:
-        period_days = 30
+        start_date, end_date = _parse_date_range(30)
+        
+        if chart_type == 'sales':
+            # Revenue (or another metric) over time, optionally split by item or category
+            series = data_manager.query_sales(start_date, end_date, granularity=granularity,
+                                              metric=metric, group_by=group_by)
+            if group_by is None:
+                series['series'][0]['label'] = f"{granularity.title()} {metric.title()}"
+            data = {
+                'labels': series['labels'],
+                'datasets': [{
+                    'label': entry['label'],
+                    'data': entry['data'],
+                    'borderColor': 'rgb(75, 192, 192)' if group_by is None else CHART_COLORS[i % len(CHART_COLORS)],
+                    'backgroundColor': 'rgba(75, 192, 192, 0.2)' if group_by is None else CHART_COLORS[i % len(CHART_COLORS)],
+                    'tension': 0.1
+                } for i, entry in enumerate(series['series'])]
+            }
+        elif chart_type in ('top_items', 'categories'):
+            # Ranked totals for the range
+            rows = data_manager.get_sales_breakdown(
+                start_date, end_date,
+                group_by='item' if chart_type == 'top_items' else 'category',
+                metric=metric
+            )
+            data = {
+                'labels': [row['label'] for row in rows],
+                'datasets': [{
+                    'label': metric.title(),
+                    'data': [row[metric] for row in rows],
+                    'backgroundColor': CHART_COLORS[:len(rows)]
+                }]
+            }
+        else:
+            data = {'labels': [], 'datasets': []}
+    except (ValueError, KeyError) as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
     
-    analytics = data_manager.get_sales_analytics(period_days)
+    return jsonify(data)
+
+@app.route('/api/margins')
+def margin_data():
+    """API endpoint for margin trends, breakdowns and erosion checks"""
+    view = request.args.get('view', 'trend')
+    group_by = request.args.get('group_by') or None
     
-    if chart_type == 'sales':
-        # Sales by day chart data
-        data = {
-            'labels': [item['date'] for item in analytics['sales_by_day']],
-            'datasets': [{
-                'label': 'Daily Revenue',
-                'data': [item['revenue'] for item in analytics['sales_by_day']],
-                'borderColor': 'rgb(75, 192, 192)',
-                'backgroundColor': 'rgba(75, 192, 192, 0.2)',
-                'tension': 0.1
-            }]
-        }
-    elif chart_type == 'top_items':
-        # Top items chart data
-        top_items = analytics['top_items'][:10]
-        data = {
-            'labels': [item['item_name'] for item in top_items],
-            'datasets': [{
-                'label': 'Revenue',
-                'data': [item['revenue'] for item in top_items],
-                'backgroundColor': [
-                    'rgba(255, 99, 132, 0.5)',
-                    'rgba(54, 162, 235, 0.5)',
-                    'rgba(255, 205, 86, 0.5)',
-                    'rgba(75, 192, 192, 0.5)',
-                    'rgba(153, 102, 255, 0.5)',
-                    'rgba(255, 159, 64, 0.5)',
-                    'rgba(199, 199, 199, 0.5)',
-                    'rgba(83, 102, 255, 0.5)',
-                    'rgba(255, 99, 255, 0.5)',
-                    'rgba(99, 255, 132, 0.5)'
-                ]
-            }]
-        }
-    else:
-        data = {'labels': [], 'datasets': []}
+    try:
+        if view == 'trend':
+            start_date, end_date = _parse_date_range(30)
+            key = request.args.get('key') or None
+            if key is not None and group_by == 'item':
+                key = int(key)
+            data = data_manager.get_margin_trend(start_date, end_date,
+                                                 granularity=request.args.get('granularity', 'day'),
+                                                 group_by=group_by, key=key)
+        elif view == 'breakdown':
+            start_date, end_date = _parse_date_range(30)
+            data = data_manager.get_margin_breakdown(start_date, end_date, group_by=group_by or 'item')
+        elif view == 'erosion':
+            data = data_manager.get_margin_erosion(
+                recent_days=int(request.args.get('recent_days', 7)),
+                baseline_days=int(request.args.get('baseline_days', 30))
+            )
+        else:
+            raise ValueError(f"Unknown view '{view}'")
+    except (ValueError, KeyError) as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    
+    return jsonify(data)
+
+@app.route('/api/sales-sketch')
+def sales_sketch():
+    """API endpoint for approximate top items and sale-size percentiles over any range"""
+    try:
+        start_date, end_date = _parse_date_range(30)
+        data = data_manager.get_approximate_summary(start_date, end_date,
+                                                    limit=request.args.get('limit', 10, type=int))
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    
+    return jsonify(data)
+
+@app.route('/api/frequently-bought-together')
+def frequently_bought_together():
+    """API endpoint for item pairs most often sold in the same basket"""
+    try:
+        start_date, end_date = _parse_date_range(30)
+        data = data_manager.get_frequent_pairs(start_date, end_date,
+                                               limit=request.args.get('limit', 20, type=int),
+                                               item_id=request.args.get('item_id', type=int))
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
     
     return jsonify(data)
 
 @app.route('/export/sales-csv')
 def export_sales_csv():
     """Export sales data as CSV"""
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # Write header
-    writer.writerow(['Sale ID', 'Date', 'Item Name', 'Quantity', 'Unit Price', 'Total Amount', 'Profit', 'Notes'])
-    
-    # Write sales data
-    for sale in sorted(data_manager.sales, key=lambda x: x['sale_date'], reverse=True):
-        writer.writerow([
-            sale['id'],
-            datetime.fromisoformat(sale['sale_date']).strftime('%Y-%m-%d %H:%M'),
-            sale['item_name'],
-            sale['quantity'],
-            f"{data_manager.settings['currency']}{sale['unit_price']:.2f}",
-            f"{data_manager.settings['currency']}{sale['total_amount']:.2f}",
-            f"{data_manager.settings['currency']}{sale['profit']:.2f}",
-            sale['notes']
-        ])
-    
-    output.seek(0)
-    
-    # Create file-like object for sending
-    mem_file = io.BytesIO()
-    mem_file.write(output.getvalue().encode('utf-8'))
-    mem_file.seek(0)
+    # Only the segment list and a copy of the resident list are taken under the lock; rows are merged
+    # newest first as they are written, a segment at a time
+    with data_manager.lock:
+        sales = data_manager.sales.iter_newest()
+    rows_path = _dump_sales(sales)
+    try:
+        path = executor.run(export_tasks.sales_csv, freeze(rows_path, data_manager.settings['currency']))
+    finally:
+        os.remove(rows_path)
     
-    return send_file(
-        mem_file,
-        as_attachment=True,
-        download_name=f'sales_data_{datetime.now().strftime("%Y%m%d")}.csv',
-        mimetype='text/csv'
-    )
+    return _send_temp_file(path, f'sales_data_{datetime.now().strftime("%Y%m%d")}.csv', 'text/csv')
 
 @app.route('/export/inventory-csv')
 def export_inventory_csv():
     """Export inventory data as CSV"""
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # Write header
-    writer.writerow(['Item Name', 'Category', 'Current Stock', 'Cost Price', 'Selling Price', 'Total Value', 'Status'])
-    
-    # Write inventory data
-    inventory_status = data_manager.get_inventory_status()
-    for item_info in inventory_status:
-        item = item_info['item']
-        status = 'Low Stock' if item_info['is_low_stock'] else 'Normal'
-        
-        writer.writerow([
-            item['name'],
-            item['category'],
-            item_info['quantity'],
-            f"{data_manager.settings['currency']}{item['cost_price']:.2f}",
-            f"{data_manager.settings['currency']}{item['selling_price']:.2f}",
-            f"{data_manager.settings['currency']}{item_info['total_value']:.2f}",
-            status
-        ])
-    
-    output.seek(0)
-    
-    # Create file-like object for sending
-    mem_file = io.BytesIO()
-    mem_file.write(output.getvalue().encode('utf-8'))
-    mem_file.seek(0)
+    snapshot = freeze(export_tasks.inventory_csv_rows(data_manager.get_inventory_status()),
+                      data_manager.settings['currency'])
     
     return send_file(
-        mem_file,
+        io.BytesIO(executor.run(export_tasks.inventory_csv, snapshot)),
         as_attachment=True,
         download_name=f'inventory_data_{datetime.now().strftime("%Y%m%d")}.csv',
         mimetype='text/csv'
@@ -504,6 +835,11 @@ def export_inventory_csv():
 @app.route('/export/report-pdf')
 def export_report_pdf():
     """Export analytics report as PDF"""
+    mode = request.args.get('mode', 'summary')
+    
+    if mode == 'full':
+        return export_full_report_pdf()
+    
     period = request.args.get('period', '30')
     try:
         period_days = int(period)
@@ -511,90 +847,144 @@ def export_report_pdf():
         period_days = 30
     
     analytics = data_manager.get_sales_analytics(period_days)
-    
-    # Create PDF
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    
-    # Styles
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=18,
-        spaceAfter=30,
-        alignment=1  # Center alignment
-    )
-    
-    story = []
-    
-    # Title
-    story.append(Paragraph(f"Sales Report - Last {period_days} Days", title_style))
-    story.append(Spacer(1, 20))
-    
-    # Summary table
-    summary_data = [
-        ['Metric', 'Value'],
-        ['Total Sales', str(analytics['total_sales'])],
-        ['Total Revenue', f"{data_manager.settings['currency']}{analytics['total_revenue']:.2f}"],
-        ['Total Profit', f"{data_manager.settings['currency']}{analytics['total_profit']:.2f}"],
-        ['Average Sale', f"{data_manager.settings['currency']}{analytics['average_sale']:.2f}"],
-    ]
-    
-    summary_table = Table(summary_data)
-    summary_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 14),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
-    
-    story.append(summary_table)
-    story.append(Spacer(1, 30))
-    
-    # Top selling items
-    if analytics['top_items']:
-        story.append(Paragraph("Top Selling Items", styles['Heading2']))
-        story.append(Spacer(1, 12))
-        
-        top_items_data = [['Item Name', 'Quantity Sold', 'Revenue', 'Profit']]
-        for item in analytics['top_items'][:10]:
-            top_items_data.append([
-                item['item_name'],
-                str(item['quantity']),
-                f"{data_manager.settings['currency']}{item['revenue']:.2f}",
-                f"{data_manager.settings['currency']}{item['profit']:.2f}"
-            ])
-        
-        top_items_table = Table(top_items_data)
-        top_items_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        
-        story.append(top_items_table)
-    
-    # Build PDF
-    doc.build(story)
-    buffer.seek(0)
+    snapshot = freeze(analytics, data_manager.settings['currency'], period_days)
     
     return send_file(
-        buffer,
+        io.BytesIO(executor.run(export_tasks.summary_pdf, snapshot)),
         as_attachment=True,
         download_name=f'sales_report_{datetime.now().strftime("%Y%m%d")}.pdf',
         mimetype='application/pdf'
     )
 
+def export_full_report_pdf():
+    """Export the full ledger report, streamed through a temp file"""
+    try:
+        start_date, end_date = _parse_date_range(30)
+    except ValueError as e:
+        flash(f'Invalid report range: {str(e)}', 'error')
+        return redirect(url_for('reports'))
+    
+    # The summary comes from hour buckets, so the ledger lists the same whole hours
+    start_date, end_date = hour_bounds(start_date, end_date)
+    
+    # The summary and the ledger describe the same sales; the ledger rows are written out after the lock
+    with data_manager.lock:
+        summary = data_manager.rollups.aggregate(start_date, end_date)
+        sales = data_manager.iter_sales(start_date, end_date)
+    rows_path = _dump_sales(sales)
+    try:
+        path = executor.run(export_tasks.full_report_pdf, freeze(summary, rows_path, data_manager.settings['currency'],
+                                                                 start_date, end_date))
+    finally:
+        os.remove(rows_path)
+    
+    return _send_temp_file(
+        path, f'sales_ledger_{start_date.strftime("%Y%m%d")}_{end_date.strftime("%Y%m%d")}.pdf', 'application/pdf'
+    )
+
+def _dump_sales(sales) -> str:
+    """Write sales to a temp rows file for an export task, a chunk at a time; the caller removes it"""
+    handle, path = tempfile.mkstemp(prefix='sales_rows_', suffix='.pickle')
+    try:
+        with os.fdopen(handle, 'wb') as f:
+            export_tasks.write_sale_rows(f, sales)
+    except Exception:
+        os.remove(path)
+        raise
+    return path
+
+def _send_temp_file(path: str, download_name: str, mimetype: str):
+    """Send a file an export task wrote, removing it"""
+    try:
+        output = open(path, 'rb')
+    finally:
+        # The open handle keeps the data readable; the name is gone once we return
+        os.remove(path)
+    return send_file(output, as_attachment=True, download_name=download_name, mimetype=mimetype)
+
+@app.route('/api/day-close', methods=['GET', 'POST'])
+def day_close():
+    """Read a day's Z-report, or close a day (yesterday by default)"""
+    try:
+        if request.method == 'POST':
+            request_data = request.get_json(silent=True) or {}
+            return jsonify(data_manager.close_day(request_data.get('date') or None))
+        
+        date = request.args.get('date') or (datetime.now().date() - timedelta(days=1)).isoformat()
+        summary = data_manager.get_daily_summary(date)
+        if not summary['closed']:
+            return jsonify({'status': 'error', 'message': f'{date} has not been closed yet'}), 404
+        return jsonify(summary)
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+@app.route('/api/month-to-date')
+def month_to_date():
+    """API endpoint for month-to-date totals built from day-end snapshots"""
+    try:
+        return jsonify(data_manager.get_month_to_date(request.args.get('date') or None))
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+@app.route('/api/jobs')
+def job_status():
+    """API endpoint for background job status"""
+    return jsonify(scheduler.status())
+
+@app.route('/api/replication')
+def replication_status():
+    """API endpoint for this process's replication role and progress"""
+    if replication is None:
+        return jsonify({'role': 'standalone'})
+    return jsonify(replication.status())
+
+@app.route('/api/archive')
+def sales_archive():
+    """API endpoint for archived sales partitions"""
+    return jsonify(data_manager.get_archive_summary())
+
+@app.route('/api/memory')
+def memory_usage():
+    """API endpoint for approximate memory use of the in-memory collections"""
+    return jsonify(data_manager.get_memory_usage())
+
+@app.route('/api/fragment-cache')
+def fragment_cache_stats():
+    """API endpoint for template fragment cache size and hit rate"""
+    return jsonify(fragments.stats())
+
+@app.route('/api/offload')
+def offload_stats():
+    """API endpoint for the export/report executor's queue and counters"""
+    return jsonify(executor.stats())
+
+@app.route('/api/workload-capture')
+def workload_capture_status():
+    """API endpoint for the workload capture log, if capturing"""
+    return jsonify(workload.status() if workload else {'enabled': False})
+
+@app.route('/api/profiles')
+@app.route('/api/profiles/<int:profile_id>')
+def request_profiles(profile_id=None):
+    """API endpoint for captured request profiles (collapsed stacks for one profile)"""
+    if profiles is None:
+        return jsonify({'status': 'error', 'message': 'Profiling is not enabled'}), 404
+    # Profiles show production stacks and request paths, so they are never served without a configured token
+    if not PROFILE_TOKEN:
+        return jsonify({'status': 'error', 'message': 'Set PROFILE_TOKEN to read profiles'}), 403
+    if not has_profile_token(request, PROFILE_TOKEN):
+        return jsonify({'status': 'error', 'message': 'Profile token required'}), 403
+    
+    if profile_id is None:
+        return jsonify(profiles.list())
+    
+    profile = profiles.get(profile_id)
+    if profile is None:
+        return jsonify({'status': 'error', 'message': 'Profile not found'}), 404
+    
+    return app.response_class(collapsed(profile), mimetype='text/plain',
+                              headers={'Content-Disposition': f'inline; filename=profile_{profile_id}.folded'})
+
 @app.route('/api/dismiss-alert', methods=['POST'])
 def dismiss_alert():
     """Dismiss an alert"""
@@ -609,6 +999,37 @@ def dismiss_alert():
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 400
 
+@app.route('/api/sync', methods=['POST'])
+def sync_till():
+    """Upload a till's offline sales and download catalog/stock changes in one round trip"""
+    try:
+        request_data = request.get_json(silent=True)
+        if not request_data or not isinstance(request_data, dict):
+            return jsonify({'status': 'error', 'message': 'No JSON data provided'}), 400
+
+        till_id = request_data.get('till_id') or ''
+        if not isinstance(till_id, (str, int)) or not str(till_id).strip():
+            return jsonify({'status': 'error', 'message': 'till_id is required'}), 400
+        till_id = str(till_id).strip()
+
+        sales = request_data.get('sales') or []
+        if not isinstance(sales, list):
+            return jsonify({'status': 'error', 'message': 'sales must be a list'}), 400
+
+        since_version = request_data.get('since_version') or 0
+        if not isinstance(since_version, (str, int)):
+            return jsonify({'status': 'error', 'message': 'since_version must be a number'}), 400
+        since_version = int(since_version)
+
+        location = request_data.get('location') or None
+        if location is not None and not isinstance(location, str):
+            return jsonify({'status': 'error', 'message': 'location must be a location code'}), 400
+
+        result = data_manager.sync_till(till_id, sales, since_version, location=location)
+        return jsonify(dict(result, status='success'))
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
 @app.route('/settings', methods=['GET', 'POST'])
 def settings():
     """Settings page"""
@@ -616,12 +1037,15 @@ def settings():
         try:
             threshold = int(request.form.get('low_stock_threshold', 5))
             currency = request.form.get('currency', 'K').strip()
+            day_close_time = request.form.get('day_close_time', data_manager.settings['day_close_time']).strip()
             
             if threshold < 0:
                 raise ValueError("Threshold cannot be negative")
+            parse_time_of_day(day_close_time)
             
-            data_manager.settings['low_stock_threshold'] = threshold
-            data_manager.settings['currency'] = currency
+            data_manager.update_settings(low_stock_threshold=threshold, currency=currency,
+                                         day_close_time=day_close_time)
+            scheduler.reschedule()
             
             flash('Settings updated successfully', 'success')
             
@@ -631,6 +1055,12 @@ def settings():
     return render_template('settings.html', settings=data_manager.settings)
 
 # Error handlers
+@app.errorhandler(ExecutorBusy)
+def executor_busy(error):
+    response = jsonify({'status': 'error', 'message': str(error)})
+    response.headers['Retry-After'] = str(math.ceil(error.retry_after))
+    return response, 503
+
 @app.errorhandler(404)
 def not_found(error):
     return render_template('404.html'), 404
@@ -638,3 +1068,17 @@ def not_found(error):
 @app.errorhandler(500)
 def internal_error(error):
     return render_template('500.html'), 500
+
+# Background jobs: heavy recomputation runs here, routes read the latest result.
+# Day close and alerts change shared data, so replicas receive them from the primary instead
+if not IS_REPLICA:
+    scheduler.daily('day_close', lambda: data_manager.settings['day_close_time'], data_manager.close_pending_days)
+    scheduler.every('alert_sweep', PRECOMPUTE_INTERVAL * 5, data_manager.sweep_alerts)
+scheduler.every('restock_suggestions', PRECOMPUTE_INTERVAL, data_manager.get_restock_suggestions)
+scheduler.every('archive_sales', 3600, data_manager.archive_old_sales)
+for _days in PRECOMPUTED_ANALYTICS_DAYS:
+    scheduler.every(f'analytics_{_days}d', PRECOMPUTE_INTERVAL,
+                    lambda days=_days: data_manager.get_sales_analytics(days))
+
+if os.environ.get('BACKGROUND_JOBS', os.environ.get('DAY_CLOSE_SCHEDULER', '1')) != '0':
+    scheduler.start()
@@ -0,0 +1,93 @@
+import math
+from typing import Dict, List, Optional
+
+# Sales an item needs before its statistics are trusted
+MIN_SAMPLES = 10
+
+# Weight of each new sale in the running mean/variance (roughly the last 1/ALPHA sales count)
+ALPHA = 0.05
+
+# Spread never assumed smaller than this, so items always sold at one price do not flag every discount
+MIN_PRICE_SPREAD = 0.05  # Fraction of the mean unit price
+MIN_QUANTITY_SPREAD = 1.0  # Units
+
+
+class RunningStats:
+    """Exponentially weighted mean and variance, updated in O(1) per value"""
+
+    __slots__ = ('count', 'mean', 'variance')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.variance = 0.0
+
+    def zscore(self, value: float, min_spread: float) -> Optional[float]:
+        """How many spreads the value lies from the mean, or None while still warming up"""
+        if self.count < MIN_SAMPLES:
+            return None
+        return (value - self.mean) / max(math.sqrt(self.variance), min_spread)
+
+    def update(self, value: float, limit: Optional[float] = None):
+        """Fold in a value; once warmed up, values further than `limit` from the mean count as if at the limit"""
+        diff = value - self.mean
+        if limit is not None and self.count >= MIN_SAMPLES:
+            diff = max(-limit, min(limit, diff))
+        # Plain running average until the weights meet ALPHA, so early sales are not dominated by the first
+        weight = max(ALPHA, 1 / (self.count + 1))
+        increment = weight * diff
+        self.mean += increment
+        self.variance = (1 - weight) * (self.variance + diff * increment)
+        self.count += 1
+
+
+class SalesAnomalyDetector:
+    """Flags sales whose unit price or quantity is far outside an item's usual range.
+
+    Outliers are clamped before they are folded into the statistics, so a
+    mistyped price ("150" for "15") is reported without widening the range
+    enough to hide the next one. Price statistics restart when the item's
+    selling price is changed.
+    """
+
+    def __init__(self):
+        self.prices: Dict[int, RunningStats] = {}
+        self.quantities: Dict[int, RunningStats] = {}
+
+    def observe(self, item_id: int, unit_price: float, quantity: int, threshold: float) -> List[Dict]:
+        """Check a sale against the item's statistics, then fold it in; returns any findings"""
+        findings = []
+        prices = self.prices.get(item_id)
+        if prices is None:
+            prices = self.prices[item_id] = RunningStats()
+        quantities = self.quantities.get(item_id)
+        if quantities is None:
+            quantities = self.quantities[item_id] = RunningStats()
+
+        price_spread = abs(prices.mean) * MIN_PRICE_SPREAD
+        score = prices.zscore(unit_price, price_spread)
+        if score is not None and abs(score) > threshold:
+            findings.append({'field': 'unit_price', 'value': unit_price, 'expected': prices.mean,
+                             'zscore': round(score, 1)})
+        score = quantities.zscore(quantity, MIN_QUANTITY_SPREAD)
+        if score is not None and score > threshold:  # Only unusually large sales matter
+            findings.append({'field': 'quantity', 'value': quantity, 'expected': quantities.mean,
+                             'zscore': round(score, 1)})
+
+        prices.update(unit_price, threshold * max(math.sqrt(prices.variance), price_spread))
+        quantities.update(quantity, threshold * max(math.sqrt(quantities.variance), MIN_QUANTITY_SPREAD))
+        return findings
+
+    def reset_prices(self, item_id: int):
+        self.prices.pop(item_id, None)
+
+    def item_stats(self, item_id: int) -> Dict:
+        stats = {}
+        for field, series in (('unit_price', self.prices), ('quantity', self.quantities)):
+            running = series.get(item_id)
+            stats[field] = None if running is None else {
+                'count': running.count,
+                'mean': round(running.mean, 4),
+                'stddev': round(math.sqrt(running.variance), 4)
+            }
+        return stats
@@ -0,0 +1,306 @@
+import argparse
+import csv
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple
+
+# Rows handed to a worker process at a time.
+CHUNK_SIZE = 5000
+
+# Below this file size the process pool costs more than it saves.
+PARALLEL_THRESHOLD_BYTES = 2 * 1024 * 1024
+
+COLUMN_ALIASES = {
+    'date': ('date', 'sale_date', 'sale date', 'datetime'),
+    'item': ('item', 'item name', 'item_name', 'name', 'product'),
+    'quantity': ('quantity', 'qty'),
+    'unit_price': ('unit price', 'unit_price', 'price', 'sale_price', 'sale price'),
+    'total': ('total amount', 'total_amount', 'total'),
+    'cost_price': ('cost price', 'cost_price', 'cost'),
+    'notes': ('notes', 'note', 'comment'),
+}
+
+REQUIRED_COLUMNS = ('date', 'item', 'quantity')
+
+DATE_FORMATS = ('%d/%m/%Y %H:%M', '%d/%m/%Y', '%d-%m-%Y %H:%M', '%d-%m-%Y')
+
+_NUMBER_CLEANUP = re.compile(r'[^\d.\-]')
+
+
+def map_columns(header: List[str]) -> Dict[str, int]:
+    """Map canonical field names to column positions in a CSV header"""
+    normalised = [column.strip().lower() for column in header]
+    columns = {}
+    for field, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in normalised:
+                columns[field] = normalised.index(alias)
+                break
+
+    missing = [field for field in REQUIRED_COLUMNS if field not in columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(missing)}")
+    if 'unit_price' not in columns and 'total' not in columns:
+        raise ValueError("Need a unit price or total amount column")
+    return columns
+
+
+def _parse_number(value: str) -> float:
+    # Accept exported values such as "K12.50" or "1,200.00"
+    return float(_NUMBER_CLEANUP.sub('', value))
+
+
+def _parse_date(value: str) -> str:
+    value = value.strip()
+    try:
+        return datetime.fromisoformat(value).isoformat()
+    except ValueError:
+        pass
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).isoformat()
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognised date '{value}'")
+
+
+def _field(row: List[str], columns: Dict[str, int], field: str) -> str:
+    index = columns.get(field)
+    if index is None or index >= len(row):
+        return ''
+    return row[index].strip()
+
+
+def parse_chunk(rows: List[List[str]], columns: Dict[str, int], first_row: int) -> Tuple[List[Dict], List[str]]:
+    """Convert and validate raw CSV rows; runs inside a worker process"""
+    parsed = []
+    errors = []
+    for offset, row in enumerate(rows):
+        row_number = first_row + offset
+        if not any(cell.strip() for cell in row):
+            continue
+        try:
+            item_name = _field(row, columns, 'item')
+            if not item_name:
+                raise ValueError("Item name is required")
+
+            quantity = int(_parse_number(_field(row, columns, 'quantity')))
+            if quantity <= 0:
+                raise ValueError("Quantity must be positive")
+
+            unit_price = _field(row, columns, 'unit_price')
+            if unit_price:
+                price = _parse_number(unit_price)
+            else:
+                price = _parse_number(_field(row, columns, 'total')) / quantity
+            if price <= 0:
+                raise ValueError("Sale price must be positive")
+
+            cost_price = _field(row, columns, 'cost_price')
+
+            parsed.append({
+                'row': row_number,
+                'item_name': item_name.lower(),
+                'quantity': quantity,
+                'unit_price': price,
+                'cost_price': _parse_number(cost_price) if cost_price else None,
+                'sale_date': _parse_date(_field(row, columns, 'date')),
+                'notes': _field(row, columns, 'notes')
+            })
+        except (ValueError, ZeroDivisionError) as e:
+            errors.append(f"Row {row_number}: {str(e)}")
+    return parsed, errors
+
+
+def file_fingerprint(path: str) -> str:
+    """Content hash identifying a CSV across re-uploads, for matching checkpoints"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class SalesImporter:
+    """Bulk loader for historical sales exported from spreadsheets or other tills.
+
+    Rows are parsed in chunks (in a process pool for large files), matched to
+    catalog items through a name index and loaded with
+    DataManager.import_sales, which skips stock checks and alerts. Progress is
+    written to a checkpoint after every chunk so an interrupted import resumes
+    where it stopped, and re-running a finished file imports nothing twice.
+    A checkpoint only counts for the store it was written against: the store
+    lives in memory, so after a restart the same file imports from the start.
+    """
+
+    def __init__(self, data_manager, workers: Optional[int] = None, chunk_size: int = CHUNK_SIZE,
+                 checkpoint_path: Optional[str] = None):
+        self.data_manager = data_manager
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.checkpoint_path = checkpoint_path
+
+    def _build_item_index(self) -> Dict[str, Dict]:
+        index = {}
+        for item in self.data_manager.items:
+            if item['active']:
+                index.setdefault(item['name'].lower(), item)
+        return index
+
+    def _load_checkpoint(self, fingerprint: str) -> Dict[str, Any]:
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return {}
+        with open(self.checkpoint_path) as f:
+            checkpoint = json.load(f)
+        if checkpoint.get('fingerprint') != fingerprint:
+            return {}  # Different file - start over
+        if checkpoint.get('store_id') != self.data_manager.store_id:
+            return {}  # Written against a store that is gone (e.g. before a restart) - start over
+        return checkpoint
+
+    def _save_checkpoint(self, fingerprint: str, progress: Dict[str, Any]):
+        if not self.checkpoint_path:
+            return
+        temp_path = f"{self.checkpoint_path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(dict(progress, fingerprint=fingerprint, store_id=self.data_manager.store_id), f)
+        os.replace(temp_path, self.checkpoint_path)
+
+    def _chunks(self, reader, skip: int, first_row: int):
+        """Yield (rows, first_row_number) chunks, skipping rows already imported"""
+        chunk = []
+        row_number = first_row
+        for row in reader:
+            if skip:
+                skip -= 1
+            else:
+                chunk.append(row)
+                if len(chunk) >= self.chunk_size:
+                    yield chunk, row_number - len(chunk) + 1
+                    chunk = []
+            row_number += 1
+        if chunk:
+            yield chunk, row_number - len(chunk)
+
+    def _parsed_chunks(self, chunks, columns: Dict[str, int], parallel: bool):
+        """Yield (rows_in_chunk, parsed, errors) in file order"""
+        if not parallel:
+            for rows, first_row in chunks:
+                yield (len(rows),) + parse_chunk(rows, columns, first_row)
+            return
+
+        # Spawned, not forked: the server forks from a request thread while other threads may hold locks
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+            pending = deque()
+            for rows, first_row in chunks:
+                pending.append((len(rows), executor.submit(parse_chunk, rows, columns, first_row)))
+                # Keep a bounded number of chunks in flight so huge files are never fully in memory
+                if len(pending) >= self.workers * 2:
+                    size, future = pending.popleft()
+                    yield (size,) + future.result()
+            while pending:
+                size, future = pending.popleft()
+                yield (size,) + future.result()
+
+    def import_file(self, path: str, max_errors: int = 100, fingerprint: Optional[str] = None) -> Dict[str, Any]:
+        """Import a CSV of historical sales, resuming from the checkpoint if one matches"""
+        fingerprint = fingerprint or file_fingerprint(path)
+        checkpoint = self._load_checkpoint(fingerprint)
+        progress = {
+            'rows_done': checkpoint.get('rows_done', 0),
+            'imported': checkpoint.get('imported', 0),
+            'error_count': checkpoint.get('error_count', 0)
+        }
+        resumed_from = progress['rows_done']
+        errors: List[str] = []
+
+        item_index = self._build_item_index()
+
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            reader = csv.reader(f)
+            columns = map_columns(next(reader, []))
+            parallel = self.workers > 1 and os.path.getsize(path) > PARALLEL_THRESHOLD_BYTES
+
+            chunks = self._chunks(reader, skip=progress['rows_done'], first_row=2)
+            for size, parsed, chunk_errors in self._parsed_chunks(chunks, columns, parallel):
+                records = []
+                for row in parsed:
+                    item = item_index.get(row['item_name'])
+                    if item is None:
+                        chunk_errors.append(f"Row {row['row']}: No item found matching '{row['item_name']}'")
+                        continue
+                    row['item'] = item
+                    records.append(row)
+
+                progress['imported'] += self.data_manager.import_sales(records)
+                progress['rows_done'] += size
+                progress['error_count'] += len(chunk_errors)
+                errors.extend(chunk_errors[:max(0, max_errors - len(errors))])
+                self._save_checkpoint(fingerprint, progress)
+
+        return dict(progress, resumed_from=resumed_from, errors=errors)
+
+
+def upload_file(path: str, url: str) -> Dict[str, Any]:
+    """Send a CSV to a running server's /sales/import endpoint"""
+    import urllib.request
+
+    boundary = uuid.uuid4().hex
+    with open(path, 'rb') as f:
+        content = f.read()
+    body = (
+        f'--{boundary}\r\n'
+        f'Content-Disposition: form-data; name="file"; filename="{os.path.basename(path)}"\r\n'
+        'Content-Type: text/csv\r\n\r\n'
+    ).encode('utf-8') + content + f'\r\n--{boundary}--\r\n'.encode('utf-8')
+
+    request = urllib.request.Request(
+        f"{url.rstrip('/')}/sales/import",
+        data=body,
+        headers={
+            'Content-Type': f'multipart/form-data; boundary={boundary}',
+            'Accept': 'application/json'
+        },
+        method='POST'
+    )
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read().decode('utf-8'))
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Import historical sales from a CSV file')
+    parser.add_argument('csv_path', help='CSV with date, item, quantity and unit price (or total) columns')
+    parser.add_argument('--url', default=None,
+                        help='Upload to a running server (e.g. http://localhost:5000) instead of checking the file '
+                             'against a local, throwaway store')
+    parser.add_argument('--workers', type=int, default=None, help='Parser processes (default: CPU count)')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Rows per parse chunk')
+    args = parser.parse_args(argv)
+
+    if args.url:
+        result = upload_file(args.csv_path, args.url)
+    else:
+        from data_manager import data_manager
+
+        # Nothing outlives this process, so there is nothing to resume and no checkpoint is written
+        importer = SalesImporter(data_manager, workers=args.workers, chunk_size=args.chunk_size)
+        result = importer.import_file(args.csv_path)
+
+    if result.get('status') == 'error':
+        parser.exit(1, f"Import failed: {result['message']}\n")
+
+    print(f"Imported {result['imported']} sales ({result['rows_done']} rows read, "
+          f"{result['error_count']} errors, resumed from row {result['resumed_from']})")
+    for error in result['errors']:
+        print(f"  {error}")
+
+
+if __name__ == '__main__':
+    main()
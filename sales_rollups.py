@@ -0,0 +1,381 @@
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional, Tuple
+
+from records import Sale
+
+GRANULARITIES = ('hour', 'day', 'week', 'month')
+GROUP_BY_OPTIONS = ('item', 'category')
+METRICS = ('revenue', 'profit', 'quantity', 'sales')
+
+# Most periods a single series may have; about 3 months of hours or 5 years of days
+MAX_PERIODS = 2000
+
+
+def empty_totals() -> Dict[str, Any]:
+    return {'revenue': 0.0, 'profit': 0.0, 'quantity': 0, 'sales': 0}
+
+
+def payment_label(notes: str) -> str:
+    """Group a sale's free-text notes into a payment/notes bucket"""
+    notes = (notes or '').strip()
+    if not notes:
+        return 'No notes'
+    if notes.lower().startswith('smart input:'):
+        return 'Smart input'
+    return notes
+
+
+def _empty_bucket() -> Dict[str, Any]:
+    bucket = empty_totals()
+    bucket['items'] = {}
+    bucket['categories'] = {}
+    return bucket
+
+
+def add_totals(target: Dict, revenue: float, profit: float, quantity: int, sales: int = 1):
+    target['revenue'] += revenue
+    target['profit'] += profit
+    target['quantity'] += quantity
+    target['sales'] += sales
+
+
+def floor_hour(moment: datetime) -> datetime:
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def floor_day(moment: datetime) -> datetime:
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def floor_week(moment: datetime) -> datetime:
+    return floor_day(moment) - timedelta(days=moment.weekday())
+
+
+def floor_month(moment: datetime) -> datetime:
+    return floor_day(moment).replace(day=1)
+
+
+def next_month(moment: datetime) -> datetime:
+    if moment.month == 12:
+        return moment.replace(year=moment.year + 1, month=1)
+    return moment.replace(month=moment.month + 1)
+
+
+def ceil_hour(moment: datetime) -> datetime:
+    floored = floor_hour(moment)
+    return floored if floored == moment else floored + timedelta(hours=1)
+
+
+def ceil_day(moment: datetime) -> datetime:
+    floored = floor_day(moment)
+    return floored if floored == moment else floored + timedelta(days=1)
+
+
+def hour_bounds(start: datetime, end: datetime) -> Tuple[datetime, datetime]:
+    """The range rollup queries actually cover for [start, end); raw scans shown beside them should use it too"""
+    return floor_hour(start), ceil_hour(end)
+
+
+def day_bounds(start: datetime, end: datetime) -> Tuple[datetime, datetime]:
+    """The range sketch queries actually cover for [start, end); totals shown beside them should use it too"""
+    return floor_day(start), ceil_day(end)
+
+
+_FLOOR = {'hour': floor_hour, 'day': floor_day, 'week': floor_week, 'month': floor_month}
+
+
+def _step(moment: datetime, granularity: str) -> datetime:
+    if granularity == 'hour':
+        return moment + timedelta(hours=1)
+    if granularity == 'day':
+        return moment + timedelta(days=1)
+    if granularity == 'week':
+        return moment + timedelta(days=7)
+    return next_month(moment)
+
+
+def _label(moment: datetime, granularity: str) -> str:
+    if granularity == 'hour':
+        return moment.strftime('%Y-%m-%d %H:00')
+    if granularity == 'month':
+        return moment.strftime('%Y-%m')
+    return moment.date().isoformat()
+
+
+class SalesRollups:
+    """Hierarchical hour -> day -> month sales aggregates maintained on every sale.
+
+    Queries are answered by covering the requested range with the coarsest
+    buckets that fit entirely inside it, so a year of monthly data touches 12
+    month buckets and only the ragged edges fall back to days and hours.
+    The finest resolution is one hour: range boundaries are aligned to the hour.
+    Day buckets also keep totals per payment label, for day-end close.
+    """
+
+    def __init__(self):
+        self.hours: Dict[datetime, Dict] = {}
+        self.days: Dict[datetime, Dict] = {}
+        self.months: Dict[datetime, Dict] = {}
+        self.first_hour: Optional[datetime] = None
+        self.last_hour: Optional[datetime] = None
+
+    def record_sale(self, sale: Sale):
+        """Fold a sale into the hour, day and month buckets"""
+        moment = datetime.fromtimestamp(sale.sale_ts)
+        hour = floor_hour(moment)
+        targets = (
+            self.hours.setdefault(hour, _empty_bucket()),
+            self.days.setdefault(floor_day(moment), _empty_bucket()),
+            self.months.setdefault(floor_month(moment), _empty_bucket()),
+        )
+
+        revenue = sale.total_amount
+        profit = sale.profit
+        quantity = sale.quantity
+        item_id = sale.item_id
+        category = sale.category
+
+        payments = targets[1].setdefault('payments', {})
+        label = payment_label(sale.notes)
+        add_totals(payments.setdefault(label, empty_totals()), revenue, profit, quantity)
+
+        for bucket in targets:
+            add_totals(bucket, revenue, profit, quantity)
+
+            item_totals = bucket['items'].get(item_id)
+            if item_totals is None:
+                item_totals = bucket['items'][item_id] = empty_totals()
+                item_totals['item_name'] = sale.item_name
+                item_totals['category'] = category
+            add_totals(item_totals, revenue, profit, quantity)
+
+            category_totals = bucket['categories'].get(category)
+            if category_totals is None:
+                category_totals = bucket['categories'][category] = empty_totals()
+            add_totals(category_totals, revenue, profit, quantity)
+
+        if self.first_hour is None or hour < self.first_hour:
+            self.first_hour = hour
+        if self.last_hour is None or hour > self.last_hour:
+            self.last_hour = hour
+
+    def day_totals(self, day: datetime) -> Dict[str, Any]:
+        """The bucket for the day starting at `day`, with its item, category and payment breakdowns"""
+        bucket = self.days.get(day)
+        if bucket is None:
+            bucket = _empty_bucket()
+            bucket['payments'] = {}
+        return bucket
+
+    def _cover(self, start: datetime, end: datetime) -> List[Dict]:
+        """Get the coarsest buckets that exactly tile [start, end)"""
+        if self.first_hour is None:
+            return []
+
+        # Clamp to whole months around the recorded data so month buckets stay aligned
+        start = max(floor_hour(start), floor_month(self.first_hour))
+        end = min(ceil_hour(end), next_month(floor_month(self.last_hour)))
+
+        buckets = []
+        cursor = start
+        while cursor < end:
+            if cursor.day == 1 and cursor.hour == 0 and next_month(cursor) <= end:
+                bucket = self.months.get(cursor)
+                cursor = next_month(cursor)
+            elif cursor.hour == 0 and cursor + timedelta(days=1) <= end:
+                bucket = self.days.get(cursor)
+                cursor += timedelta(days=1)
+            else:
+                bucket = self.hours.get(cursor)
+                cursor += timedelta(hours=1)
+            if bucket is not None:
+                buckets.append(bucket)
+        return buckets
+
+    def window(self, start: datetime, end: datetime) -> 'SalesRollups':
+        """A rollups object holding only the buckets that queries inside [start, end) can touch.
+
+        Whole days are all a day-by-day walk of the window needs, plus the
+        hours of its first and last day; the buckets are shared, not copied.
+        """
+        part = SalesRollups()
+        part.first_hour, part.last_hour = self.first_hour, self.last_hour
+        cursor = floor_month(start)
+        while cursor < end:
+            if cursor in self.months:
+                part.months[cursor] = self.months[cursor]
+            cursor = next_month(cursor)
+        cursor = floor_day(start)
+        while cursor < end:
+            if cursor in self.days:
+                part.days[cursor] = self.days[cursor]
+            cursor += timedelta(days=1)
+        for day in {floor_day(start), floor_day(end)}:
+            for hour in range(24):
+                cursor = day + timedelta(hours=hour)
+                if cursor in self.hours:
+                    part.hours[cursor] = self.hours[cursor]
+        return part
+
+    def aggregate(self, start: datetime, end: datetime,
+                  breakdowns: Tuple[str, ...] = ('items', 'categories')) -> Dict[str, Any]:
+        """Get totals plus the requested per-item/per-category breakdowns for [start, end)"""
+        result = _empty_bucket()
+        for bucket in self._cover(start, end):
+            add_totals(result, bucket['revenue'], bucket['profit'], bucket['quantity'], bucket['sales'])
+
+            for breakdown in breakdowns:
+                merged = result[breakdown]
+                for key, totals in bucket[breakdown].items():
+                    target = merged.get(key)
+                    if target is None:
+                        target = merged[key] = empty_totals()
+                        if 'item_name' in totals:
+                            target['item_name'] = totals['item_name']
+                            target['category'] = totals['category']
+                    add_totals(target, totals['revenue'], totals['profit'], totals['quantity'], totals['sales'])
+        return result
+
+    def periods(self, start: datetime, end: datetime, granularity: str = 'day',
+                breakdowns: Tuple[str, ...] = ()) -> List[Tuple[str, Dict]]:
+        """Get (label, aggregate) pairs for each period of [start, end)"""
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown granularity '{granularity}'. Use one of: {', '.join(GRANULARITIES)}")
+
+        # Find the period boundaries first, so an over-long range is refused before anything is aggregated
+        starts = []
+        cursor = _FLOOR[granularity](start)
+        while cursor < end:
+            if len(starts) >= MAX_PERIODS:
+                raise ValueError(f"Range has more than {MAX_PERIODS} {granularity} periods; "
+                                 f"use a coarser granularity or a shorter range")
+            starts.append(cursor)
+            cursor = _step(cursor, granularity)
+
+        periods = []
+        for cursor in starts:
+            period_end = _step(cursor, granularity)
+            periods.append((_label(cursor, granularity),
+                            self.aggregate(max(cursor, start), min(period_end, end), breakdowns)))
+        return periods
+
+    def series(self, start: datetime, end: datetime, granularity: str = 'day',
+               metric: str = 'revenue', group_by: Optional[str] = None,
+               keys: Optional[List[Any]] = None, limit: int = 10) -> Dict[str, Any]:
+        """Get a single chart series for [start, end) at the requested granularity"""
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric '{metric}'. Use one of: {', '.join(METRICS)}")
+        if group_by is not None and group_by not in GROUP_BY_OPTIONS:
+            raise ValueError(f"Unknown grouping '{group_by}'. Use one of: {', '.join(GROUP_BY_OPTIONS)}")
+        if end <= start:
+            raise ValueError("End of range must be after its start")
+
+        breakdown = 'items' if group_by == 'item' else 'categories'
+        breakdowns = (breakdown,) if group_by else ()
+        periods = self.periods(start, end, granularity, breakdowns)
+
+        labels = [label for label, _ in periods]
+
+        if group_by is None:
+            return {
+                'granularity': granularity,
+                'metric': metric,
+                'labels': labels,
+                'series': [{'key': 'total', 'label': metric.title(),
+                            'data': [bucket[metric] for _, bucket in periods]}]
+            }
+
+        if keys is None:
+            # Pick the top groups over the whole range, ranked by the requested metric
+            overall = self.aggregate(start, end, breakdowns)[breakdown]
+            keys = [key for key, _ in sorted(overall.items(), key=lambda kv: kv[1][metric], reverse=True)[:limit]]
+
+        series = []
+        for key in keys:
+            data = []
+            label = str(key)
+            for _, bucket in periods:
+                totals = bucket[breakdown].get(key)
+                data.append(totals[metric] if totals else 0)
+                if totals and group_by == 'item':
+                    label = totals['item_name']
+            series.append({'key': key, 'label': label, 'data': data})
+
+        return {
+            'granularity': granularity,
+            'metric': metric,
+            'group_by': group_by,
+            'labels': labels,
+            'series': series
+        }
+
+
+def sales_analytics(rollups: SalesRollups, start: datetime, end: datetime,
+                    item_breakdown: bool = True) -> Dict[str, Any]:
+    """Totals, top items, category performance and daily totals for [start, end)
+
+    A plain function of the rollups (or a window() of them) so that it can
+    run in a worker process. With item_breakdown=False per-item totals are
+    not merged and top_items is left empty for the caller to fill.
+    """
+    summary = rollups.aggregate(start, end,
+                                breakdowns=('items', 'categories') if item_breakdown else ('categories',))
+
+    if not summary['sales']:
+        return {
+            'total_sales': 0,
+            'total_revenue': 0,
+            'total_profit': 0,
+            'top_items': [],
+            'sales_by_day': [],
+            'category_performance': []
+        }
+
+    # Top selling items
+    top_items = [
+        {
+            'item_name': totals['item_name'],
+            'quantity': totals['quantity'],
+            'revenue': totals['revenue'],
+            'profit': totals['profit']
+        }
+        for totals in sorted(summary['items'].values(), key=lambda x: x['revenue'], reverse=True)[:10]
+    ] if item_breakdown else []
+
+    # Category performance, using each item's category at the time of sale
+    category_performance = [
+        {
+            'category': category,
+            'quantity': totals['quantity'],
+            'revenue': totals['revenue'],
+            'profit': totals['profit'],
+            'sales': totals['sales'],
+            'revenue_share': totals['revenue'] / summary['revenue'] * 100 if summary['revenue'] else 0
+        }
+        for category, totals in sorted(summary['categories'].items(), key=lambda x: x[1]['revenue'], reverse=True)
+    ]
+
+    # Sales by day
+    sales_by_day = []
+    day = floor_day(start)
+    while day < end:
+        next_day = day + timedelta(days=1)
+        daily = rollups.aggregate(max(day, start), min(next_day, end), breakdowns=())
+        if daily['sales']:
+            sales_by_day.append({
+                'date': day.date().isoformat(),
+                'revenue': daily['revenue'],
+                'quantity': daily['quantity']
+            })
+        day = next_day
+
+    return {
+        'total_sales': summary['sales'],
+        'total_revenue': summary['revenue'],
+        'total_profit': summary['profit'],
+        'total_quantity': summary['quantity'],
+        'average_sale': summary['revenue'] / summary['sales'],
+        'top_items': top_items,
+        'sales_by_day': sales_by_day,
+        'category_performance': category_performance
+    }
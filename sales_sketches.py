@@ -0,0 +1,281 @@
+import math
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from records import Sale
+from sales_rollups import day_bounds, floor_day, floor_month, next_month
+
+# Items tracked per bucket by Space-Saving; revenue estimates are within N/TOP_CAPACITY
+TOP_CAPACITY = 100
+
+# Count-Min shape: estimates exceed the truth by at most e/WIDTH of the total with probability 1 - e^-DEPTH
+CMS_WIDTH = 256
+CMS_DEPTH = 3
+
+# t-digest compression; quantile error is roughly 1/COMPRESSION in the middle and far less at the tails
+TDIGEST_COMPRESSION = 100
+TDIGEST_BUFFER = 500
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_CMS_SEEDS = ((0x5bd1e995, 0x1b873593), (0xcc9e2d51, 0x85ebca6b), (0xc2b2ae35, 0x27d4eb2f))
+
+
+class CountMinSketch:
+    """Non-negative totals per key in fixed memory; estimates never undercount"""
+
+    __slots__ = ('width', 'depth', 'table', 'total')
+
+    def __init__(self, width: int = CMS_WIDTH, depth: int = CMS_DEPTH):
+        self.width = width
+        self.depth = depth
+        self.table = array('d', bytes(8 * width * depth))
+        self.total = 0.0
+
+    def _cells(self, key: int):
+        for row, (a, b) in enumerate(_CMS_SEEDS[:self.depth]):
+            yield row * self.width + ((a * key + b) % _MERSENNE_PRIME) % self.width
+
+    def add(self, key: int, value: float):
+        self.total += value
+        for cell in self._cells(key):
+            self.table[cell] += value
+
+    def estimate(self, key: int) -> float:
+        return min(self.table[cell] for cell in self._cells(key))
+
+    def merge(self, other: 'CountMinSketch'):
+        self.total += other.total
+        self.table = array('d', map(sum, zip(self.table, other.table)))
+
+
+class SpaceSaving:
+    """Weighted heavy hitters: the keys with the largest totals, tracked in `capacity` counters.
+
+    A new key past capacity takes over the smallest counter and inherits its
+    total as its error, so each count overestimates by at most
+    errors[key] <= total / capacity and every key above that is tracked.
+    """
+
+    __slots__ = ('capacity', 'counts', 'errors', 'total')
+
+    def __init__(self, capacity: int = TOP_CAPACITY):
+        self.capacity = capacity
+        self.counts: Dict[Hashable, float] = {}
+        self.errors: Dict[Hashable, float] = {}
+        self.total = 0.0
+
+    def add(self, key: Hashable, weight: float):
+        self.total += weight
+        counts = self.counts
+        if key in counts:
+            counts[key] += weight
+        elif len(counts) < self.capacity:
+            counts[key] = weight
+            self.errors[key] = 0.0
+        else:
+            victim = min(counts, key=counts.get)
+            floor = counts.pop(victim)
+            del self.errors[victim]
+            counts[key] = floor + weight
+            self.errors[key] = floor
+
+    def floor(self) -> float:
+        """Most an untracked key can have been seen with"""
+        return min(self.counts.values()) if len(self.counts) >= self.capacity else 0.0
+
+    def merge(self, other: 'SpaceSaving'):
+        """Fold another summary in; keys missing from either side carry that side's floor as error"""
+        own_floor, other_floor = self.floor(), other.floor()
+        for key in set(self.counts) | set(other.counts):
+            if key in self.counts:
+                count, error = self.counts[key], self.errors[key]
+            else:
+                count, error = own_floor, own_floor
+            if key in other.counts:
+                count += other.counts[key]
+                error += other.errors[key]
+            else:
+                count += other_floor
+                error += other_floor
+            self.counts[key] = count
+            self.errors[key] = error
+        self.total += other.total
+        if len(self.counts) > self.capacity:
+            kept = sorted(self.counts, key=self.counts.get, reverse=True)[:self.capacity]
+            self.counts = {key: self.counts[key] for key in kept}
+            self.errors = {key: self.errors[key] for key in kept}
+
+    def top(self, limit: int) -> List[Tuple[Hashable, float, float]]:
+        """(key, estimated total, maximum overestimate) for the largest keys"""
+        ranked = sorted(self.counts.items(), key=lambda entry: entry[1], reverse=True)[:limit]
+        return [(key, count, self.errors[key]) for key, count in ranked]
+
+
+class TDigest:
+    """Streaming quantiles: values are merged into centroids that stay small near the tails"""
+
+    __slots__ = ('compression', 'means', 'weights', 'count', 'min', 'max', '_buffer')
+
+    def __init__(self, compression: int = TDIGEST_COMPRESSION):
+        self.compression = compression
+        self.means: List[float] = []
+        self.weights: List[float] = []
+        self.count = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._buffer: List[Tuple[float, float]] = []
+
+    def add(self, value: float, weight: float = 1.0):
+        self._buffer.append((value, weight))
+        self.count += weight
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        if len(self._buffer) >= TDIGEST_BUFFER:
+            self._compress()
+
+    def merge(self, other: 'TDigest'):
+        other._compress()
+        self._buffer.extend(zip(other.means, other.weights))
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)  # Compressed once when a quantile is read
+
+    def _compress(self):
+        if not self._buffer:
+            return
+        points = sorted(list(zip(self.means, self.weights)) + self._buffer)
+        self._buffer = []
+        total = self.count
+        means, weights = [], []
+        mean, weight = points[0]
+        before = 0.0
+        for value, value_weight in points[1:]:
+            proposed = weight + value_weight
+            q = (before + proposed / 2) / total
+            if proposed <= max(1.0, 4 * total * q * (1 - q) / self.compression):
+                mean += (value - mean) * value_weight / proposed
+                weight = proposed
+            else:
+                means.append(mean)
+                weights.append(weight)
+                before += weight
+                mean, weight = value, value_weight
+        means.append(mean)
+        weights.append(weight)
+        self.means, self.weights = means, weights
+
+    def quantile(self, q: float) -> Optional[float]:
+        self._compress()
+        if not self.means:
+            return None
+        target = q * self.count
+        # Each centroid's mean sits at the middle of its weight
+        centres, cumulative = [], 0.0
+        for weight in self.weights:
+            centres.append(cumulative + weight / 2)
+            cumulative += weight
+        index = bisect_left(centres, target)
+        if index == 0:
+            lower_pos, lower_value = 0.0, self.min
+        else:
+            lower_pos, lower_value = centres[index - 1], self.means[index - 1]
+        if index == len(centres):
+            upper_pos, upper_value = self.count, self.max
+        else:
+            upper_pos, upper_value = centres[index], self.means[index]
+        if upper_pos == lower_pos:
+            return upper_value
+        return lower_value + (upper_value - lower_value) * (target - lower_pos) / (upper_pos - lower_pos)
+
+
+class SketchBucket:
+    __slots__ = ('revenue', 'quantity', 'cost', 'sale_size')
+
+    def __init__(self):
+        self.revenue = SpaceSaving()
+        self.quantity = CountMinSketch()
+        self.cost = CountMinSketch()
+        self.sale_size = TDigest()
+
+    def record(self, item_id: int, revenue: float, quantity: int, cost: float):
+        self.revenue.add(item_id, revenue)
+        self.quantity.add(item_id, quantity)
+        self.cost.add(item_id, max(cost, 0.0))
+        self.sale_size.add(revenue)
+
+
+
+class SalesSketches:
+    """Day and month sketches of top items and sale sizes, maintained on every sale.
+
+    Like the rollups, a window is covered by whole months where it can be
+    and by days at the edges, so a query merges at most a few dozen fixed
+    size sketches however long the history. Windows are aligned to days.
+    """
+
+    def __init__(self):
+        self.days: Dict[datetime, SketchBucket] = {}
+        self.months: Dict[datetime, SketchBucket] = {}
+
+    def record_sale(self, sale: Sale):
+        moment = datetime.fromtimestamp(sale.sale_ts)
+        cost = sale.total_amount - sale.profit
+        for buckets, key in ((self.days, floor_day(moment)), (self.months, floor_month(moment))):
+            bucket = buckets.get(key)
+            if bucket is None:
+                bucket = buckets[key] = SketchBucket()
+            bucket.record(sale.item_id, sale.total_amount, sale.quantity, cost)
+
+    def summary(self, start: datetime, end: datetime, limit: int = 10,
+                quantiles: Tuple[float, ...] = (0.5, 0.9, 0.99)) -> Dict[str, Any]:
+        """Approximate top items by revenue and sale-size quantiles for the days in [start, end)
+
+        The window is widened to whole days; error_bounds['window'] gives the
+        range the estimates actually cover.
+        """
+        start, end = day_bounds(start, end)
+        buckets = []
+        cursor = start
+        while cursor < end:
+            if cursor.day == 1 and next_month(cursor) <= end:
+                bucket = self.months.get(cursor)
+                cursor = next_month(cursor)
+            else:
+                bucket = self.days.get(cursor)
+                cursor += timedelta(days=1)
+            if bucket is not None:
+                buckets.append(bucket)
+
+        revenue = SpaceSaving()
+        sale_size = TDigest()
+        for bucket in buckets:
+            revenue.merge(bucket.revenue)
+            sale_size.merge(bucket.sale_size)
+
+        # Summing each bucket's Count-Min estimate keeps the never-undercount guarantee without merging tables
+        top_items = []
+        for item_id, item_revenue, error in revenue.top(limit):
+            cost = sum(bucket.cost.estimate(item_id) for bucket in buckets)
+            top_items.append({
+                'item_id': item_id,
+                'quantity': sum(bucket.quantity.estimate(item_id) for bucket in buckets),
+                'revenue': item_revenue,
+                'profit': item_revenue - cost,
+                'revenue_error': error
+            })
+
+        return {
+            'top_items': top_items,
+            'sale_size_percentiles': {f"p{round(q * 100)}": sale_size.quantile(q) for q in quantiles},
+            'error_bounds': {
+                'revenue': revenue.total / TOP_CAPACITY,
+                'quantity': math.e / CMS_WIDTH * sum(bucket.quantity.total for bucket in buckets),
+                'cost': math.e / CMS_WIDTH * sum(bucket.cost.total for bucket in buckets),
+                'confidence': 1 - math.exp(-CMS_DEPTH),
+                'window': {'start': start.isoformat(), 'end': end.isoformat()}
+            }
+        }
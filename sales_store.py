@@ -0,0 +1,296 @@
+import heapq
+import itertools
+import json
+import os
+import shutil
+import struct
+import tempfile
+import weakref
+import zlib
+from datetime import datetime
+from operator import attrgetter
+from typing import Dict, List, Any, Iterator, Optional
+
+from memory_usage import estimate_bytes
+from records import Sale
+from sales_rollups import empty_totals, add_totals
+
+_by_time = attrgetter('sale_ts')
+
+# Sales written per on-disk segment when the resident window is trimmed
+SPILL_BATCH = 5000
+
+# After a spill the resident window is cut to this fraction of the budget, so spills are infrequent and batched
+SPILL_TARGET = 0.5
+
+# Segment file layout: zlib-compressed JSON rows, JSON footer, footer length, magic
+SEGMENT_MAGIC = b'SEG1'
+_TRAILER = struct.Struct('<Q4s')
+
+
+def partition_key(sale_ts: float) -> str:
+    """Month partition ('YYYY-MM') a sale is archived under"""
+    return datetime.fromtimestamp(sale_ts).strftime('%Y-%m')
+
+
+def write_segment(path: str, partition: str, sales: List[Sale]) -> Dict[str, Any]:
+    """Write an immutable compressed segment and return its footer"""
+    totals = empty_totals()
+    for sale in sales:
+        add_totals(totals, sale.total_amount, sale.profit, sale.quantity)
+
+    footer = {
+        'partition': partition,
+        'count': len(sales),
+        'min_ts': min(sale.sale_ts for sale in sales),
+        'max_ts': max(sale.sale_ts for sale in sales),
+        'totals': totals
+    }
+
+    body = zlib.compress('\n'.join(json.dumps(sale.to_row()) for sale in sales).encode('utf-8'))
+    footer_bytes = json.dumps(footer).encode('utf-8')
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(body)
+        f.write(footer_bytes)
+        f.write(_TRAILER.pack(len(footer_bytes), SEGMENT_MAGIC))
+    os.replace(tmp_path, path)
+    return footer
+
+
+def read_segment(path: str) -> Iterator[Sale]:
+    """Decompress a segment's rows back into sales"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    length, magic = _TRAILER.unpack(data[-_TRAILER.size:])
+    if magic != SEGMENT_MAGIC:
+        raise ValueError(f"{path} is not a sales segment")
+    body = zlib.decompress(data[:len(data) - _TRAILER.size - length])
+    for line in body.decode('utf-8').split('\n'):
+        yield Sale.from_row(json.loads(line))
+
+
+def _iter_range(segments: List[Dict[str, Any]], resident: List[Sale], start_ts: float,
+                end_ts: float) -> Iterator[Sale]:
+    """Sales from the given segments, then the resident copy, with start_ts <= sale_ts < end_ts"""
+    for segment in segments:
+        for sale in read_segment(segment['path']):
+            if start_ts <= sale.sale_ts < end_ts:
+                yield sale
+    for sale in resident:
+        if start_ts <= sale.sale_ts < end_ts:
+            yield sale
+
+
+def _iter_newest(segments: List[Dict[str, Any]], resident: List[Sale], start_ts: float,
+                 end_ts: float) -> Iterator[Sale]:
+    """Sales with start_ts <= sale_ts < end_ts, newest first, merged from the resident copy and the segments
+
+    A segment is read only once the merge reaches its newest sale, so only
+    segments whose date ranges overlap are in memory together.
+    """
+    heap = []
+    order = itertools.count()
+
+    def newest_first(sales):
+        return iter(sorted((sale for sale in sales if start_ts <= sale.sale_ts < end_ts), key=_by_time, reverse=True))
+
+    def push(stream):
+        sale = next(stream, None)
+        if sale is not None:
+            heapq.heappush(heap, (-sale.sale_ts, next(order), sale, stream))
+
+    push(newest_first(resident))
+    waiting = sorted(segments, key=lambda segment: segment['max_ts'])
+    while True:
+        while waiting and (not heap or waiting[-1]['max_ts'] >= -heap[0][0]):
+            push(newest_first(read_segment(waiting.pop()['path'])))
+        if not heap:
+            return
+        _, _, sale, stream = heapq.heappop(heap)
+        yield sale
+        push(stream)
+
+
+class SalesStore:
+    """Sales log with a small hot tier in memory and older sales archived to disk.
+
+    Behaves like the plain list it replaces for append, len and iteration
+    (oldest first). Sales leave the hot tier when the resident window goes
+    over the memory budget or when they are older than the hot window. They
+    are written to immutable, compressed segments partitioned by month. Each
+    segment's footer holds its date range and totals: range scans skip
+    segments outside the range, and the archive summary reads footers alone.
+    Aggregates over any range come from the rollups, which never touch disk.
+
+    The store lives in memory, so its segments are scratch: they go in a
+    directory of its own under `spill_dir` (a temp dir if unset) that is
+    removed with the store, or at exit.
+    """
+
+    def __init__(self, budget_bytes: Optional[int] = None, spill_dir: Optional[str] = None):
+        self.budget_bytes = budget_bytes
+        self.spill_dir = spill_dir
+        self.resident: List[Sale] = []
+        self.segments: List[Dict[str, Any]] = []
+        self.spilled_count = 0
+        self._max_resident: Optional[int] = None
+        self._segment_numbers = itertools.count(1)
+        self._archive_dir: Optional[str] = None
+
+    def __len__(self) -> int:
+        return self.spilled_count + len(self.resident)
+
+    def __iter__(self) -> Iterator[Sale]:
+        return self.iter_range(float('-inf'), float('inf'))
+
+    def append(self, sale: Sale):
+        self.resident.append(sale)
+        if self.budget_bytes is not None:
+            if self._max_resident is None:
+                self._max_resident = self._resident_capacity()
+            if len(self.resident) > self._max_resident:
+                self.spill()
+
+    def _overlapping(self, start_ts: float, end_ts: float) -> List[Dict[str, Any]]:
+        return [
+            segment for segment in self.segments
+            if segment['max_ts'] >= start_ts and segment['min_ts'] < end_ts
+        ]
+
+    def iter_range(self, start_ts: float, end_ts: float) -> Iterator[Sale]:
+        """Iterate over sales with start_ts <= sale_ts < end_ts, skipping segments outside the range
+
+        The sales are fixed when this is called, so an iterator taken under
+        the store lock can be consumed after the lock is released.
+        """
+        return _iter_range(self._overlapping(start_ts, end_ts), self.resident[:], start_ts, end_ts)
+
+    def iter_newest(self, start_ts: float = float('-inf'), end_ts: float = float('inf')) -> Iterator[Sale]:
+        """Like iter_range, but newest first; resident sales and segments are merged lazily, never sorted whole"""
+        return _iter_newest(self._overlapping(start_ts, end_ts), self.resident[:], start_ts, end_ts)
+
+    def recent(self, limit: int) -> List[Sale]:
+        """Get the latest sales by date, reading segments only if the resident window is too small"""
+        if len(self.resident) >= limit or not self.segments:
+            return heapq.nlargest(limit, self.resident, key=_by_time)
+        return heapq.nlargest(limit, iter(self), key=_by_time)
+
+    def _resident_capacity(self) -> int:
+        """How many sales fit in the budget, from the average size of the resident ones"""
+        per_sale = estimate_bytes(self.resident, len(self.resident))['bytes_per_record'] or 1
+        return max(1, int(self.budget_bytes / per_sale))
+
+    def spill(self) -> int:
+        """Move the oldest resident sales to disk until the window is back under budget"""
+        capacity = self._resident_capacity()
+        target = max(1, int(capacity * SPILL_TARGET))
+        # Imported history arrives after newer sales; order by date so it is the oldest, not the latest, that goes
+        self.resident.sort(key=_by_time)
+        spilled = 0
+        while len(self.resident) > target:
+            batch = self.resident[:min(SPILL_BATCH, len(self.resident) - target)]
+            self._archive(batch)
+            del self.resident[:len(batch)]
+            spilled += len(batch)
+        self._max_resident = capacity
+        return spilled
+
+    def archive_before(self, cutoff_ts: float) -> int:
+        """Move resident sales dated before the cutoff to the archive tier"""
+        old = self.resident_before(cutoff_ts)
+        if not old:
+            return 0
+        return self.commit_archive(old, self.write_segments(old))
+
+    def resident_before(self, cutoff_ts: float) -> List[Sale]:
+        """Resident sales dated before the cutoff; the first step of a three-step archive.
+
+        The owner can hold its lock for this step and commit_archive while
+        write_segments, which does the compression and I/O, runs without it.
+        """
+        return [sale for sale in self.resident if sale.sale_ts < cutoff_ts]
+
+    def write_segments(self, sales: List[Sale]) -> List[Dict[str, Any]]:
+        """Write sales to segments without making them part of the archive yet"""
+        footers = []
+        for start in range(0, len(sales), SPILL_BATCH):
+            footers.extend(self._write_partitions(sales[start:start + SPILL_BATCH]))
+        return footers
+
+    def commit_archive(self, sales: List[Sale], footers: List[Dict[str, Any]]) -> int:
+        """Swap written sales out of the resident window for their segments"""
+        archived = {id(sale) for sale in sales}
+        remaining = [sale for sale in self.resident if id(sale) not in archived]
+        if len(self.resident) - len(remaining) != len(sales):
+            # Some were spilled while the segments were written; drop this attempt rather than keep them twice
+            for footer in footers:
+                os.remove(footer['path'])
+            return 0
+        self.resident = remaining
+        self._register(footers)
+        return len(sales)
+
+    def _archive(self, sales: List[Sale]):
+        """Write sales to one new segment per month partition they fall in"""
+        self._register(self._write_partitions(sales))
+
+    def _write_partitions(self, sales: List[Sale]) -> List[Dict[str, Any]]:
+        if self._archive_dir is None:
+            if self.spill_dir:
+                os.makedirs(self.spill_dir, exist_ok=True)
+            self._archive_dir = tempfile.mkdtemp(prefix='sales_segments_', dir=self.spill_dir)
+            weakref.finalize(self, shutil.rmtree, self._archive_dir, True)
+
+        partitions: Dict[str, List[Sale]] = {}
+        for sale in sales:
+            partitions.setdefault(partition_key(sale.sale_ts), []).append(sale)
+
+        footers = []
+        for partition, partition_sales in sorted(partitions.items()):
+            directory = os.path.join(self._archive_dir, partition)
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"sales-{next(self._segment_numbers):06d}.seg")
+            footer = write_segment(path, partition, partition_sales)
+            footer['path'] = path
+            footer['bytes'] = os.path.getsize(path)
+            footers.append(footer)
+        return footers
+
+    def _register(self, footers: List[Dict[str, Any]]):
+        for footer in footers:
+            self.segments.append(footer)
+            self.spilled_count += footer['count']
+
+    def usage(self) -> Dict[str, Any]:
+        """Get resident size estimate and archive totals"""
+        usage = estimate_bytes(reversed(self.resident), len(self.resident))
+        usage.update({
+            'count': len(self),
+            'resident_count': len(self.resident),
+            'spilled_count': self.spilled_count,
+            'segments': len(self.segments),
+            'archive_bytes': sum(segment['bytes'] for segment in self.segments),
+            'budget_bytes': self.budget_bytes
+        })
+        return usage
+
+    def partitions(self) -> List[Dict[str, Any]]:
+        """Get per-partition segment counts, date ranges and totals from the footers"""
+        summary: Dict[str, Dict] = {}
+        for segment in self.segments:
+            entry = summary.setdefault(segment['partition'], {
+                'partition': segment['partition'],
+                'segments': 0,
+                'bytes': 0,
+                'min_ts': segment['min_ts'],
+                'max_ts': segment['max_ts'],
+                **empty_totals()
+            })
+            entry['segments'] += 1
+            entry['bytes'] += segment['bytes']
+            entry['min_ts'] = min(entry['min_ts'], segment['min_ts'])
+            entry['max_ts'] = max(entry['max_ts'], segment['max_ts'])
+            totals = segment['totals']
+            add_totals(entry, totals['revenue'], totals['profit'], totals['quantity'], totals['sales'])
+        return [summary[partition] for partition in sorted(summary)]
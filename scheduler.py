@@ -0,0 +1,166 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+def parse_time_of_day(value: str):
+    """Parse an 'HH:MM' string, raising ValueError for anything else"""
+    return datetime.strptime(value.strip(), '%H:%M').time()
+
+
+class Job:
+    """A registered background job: either every N seconds or daily at a set time"""
+
+    def __init__(self, name: str, func: Callable[[], Any], interval: Optional[float] = None,
+                 get_time: Optional[Callable[[], str]] = None):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.get_time = get_time
+        self.next_run: Optional[datetime] = None
+        self.last_run: Optional[datetime] = None
+        self.last_duration: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.running = False
+
+    def schedule_after(self, moment: datetime):
+        if self.interval is not None:
+            self.next_run = moment + timedelta(seconds=self.interval)
+        else:
+            run_at = datetime.combine(moment.date(), parse_time_of_day(self.get_time()))
+            self.next_run = run_at if run_at > moment else run_at + timedelta(days=1)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'interval': self.interval,
+            'time_of_day': self.get_time() if self.get_time else None,
+            'next_run': self.next_run.isoformat() if self.next_run else None,
+            'last_run': self.last_run.isoformat() if self.last_run else None,
+            'last_duration': self.last_duration,
+            'last_error': self.last_error,
+            'running': self.running
+        }
+
+
+class JobScheduler:
+    """In-process scheduler: one dispatcher thread hands due jobs to a small thread pool.
+
+    Each job's return value is published as a single (value, computed_at)
+    tuple, so readers see either the previous result or the new one, never a
+    half-built one. `latest` returns the published value when it is within
+    the caller's staleness bound and otherwise computes it inline.
+
+    Jobs run without any lock of the scheduler's: each takes the store lock
+    itself, only while it copies data out or writes changes back, so a long
+    job never holds up the requests running alongside it.
+    """
+
+    def __init__(self, workers: int = 2):
+        self.jobs: Dict[str, Job] = {}
+        self._results: Dict[str, Tuple[Any, float]] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._workers = workers
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+
+    def every(self, name: str, seconds: float, func: Callable[[], Any]) -> Job:
+        """Register a job that runs every `seconds`"""
+        return self._register(Job(name, func, interval=seconds))
+
+    def daily(self, name: str, get_time: Callable[[], str], func: Callable[[], Any]) -> Job:
+        """Register a job that runs once a day at the 'HH:MM' returned by `get_time`"""
+        return self._register(Job(name, func, get_time=get_time))
+
+    def _register(self, job: Job) -> Job:
+        if job.interval is not None:
+            job.next_run = datetime.now()  # Warm interval jobs straight away
+        else:
+            job.schedule_after(datetime.now())
+        self.jobs[job.name] = job
+        self._wake.set()
+        return job
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix='scheduler')
+        self._thread = threading.Thread(target=self._dispatch, name='scheduler-dispatch', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped = True
+        self._wake.set()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+    def reschedule(self):
+        """Recompute next run times, e.g. after a daily job's time setting changes"""
+        now = datetime.now()
+        for job in self.jobs.values():
+            if job.interval is None:
+                job.schedule_after(now)
+        self._wake.set()
+
+    def run_now(self, name: str):
+        """Queue a job immediately, outside its schedule"""
+        job = self.jobs[name]
+        job.next_run = datetime.now()
+        self._wake.set()
+
+    def latest(self, name: str, max_age: Optional[float] = None) -> Any:
+        """Get a job's latest published result, computing it inline if missing or older than `max_age` seconds"""
+        entry = self._results.get(name)
+        if entry is not None and (max_age is None or time.time() - entry[1] <= max_age):
+            return entry[0]
+        return self._execute(self.jobs[name])
+
+    def published_at(self, name: str) -> Optional[float]:
+        """When a job's latest result was published, usable as a version of that result"""
+        entry = self._results.get(name)
+        return entry[1] if entry else None
+
+    def status(self) -> List[Dict[str, Any]]:
+        statuses = []
+        for job in self.jobs.values():
+            status = job.status()
+            entry = self._results.get(job.name)
+            status['result_age'] = round(time.time() - entry[1], 3) if entry else None
+            statuses.append(status)
+        return statuses
+
+    def _execute(self, job: Job) -> Any:
+        started = time.time()
+        result = job.func()
+        self._results[job.name] = (result, time.time())
+        job.last_duration = round(time.time() - started, 4)
+        return result
+
+    def _run(self, job: Job):
+        try:
+            self._execute(job)
+            job.last_error = None
+        except Exception as e:
+            job.last_error = str(e)
+            print(f"Error in scheduled job {job.name}: {e}")
+        finally:
+            job.last_run = datetime.now()
+            job.running = False
+            job.schedule_after(job.last_run)
+            self._wake.set()
+
+    def _dispatch(self):
+        while not self._stopped:
+            self._wake.clear()
+            now = datetime.now()
+            for job in list(self.jobs.values()):
+                if not job.running and job.next_run is not None and job.next_run <= now:
+                    job.running = True
+                    self._executor.submit(self._run, job)
+
+            pending = [job.next_run for job in self.jobs.values() if not job.running and job.next_run]
+            timeout = max(0.0, (min(pending) - datetime.now()).total_seconds()) if pending else None
+            self._wake.wait(timeout=timeout)
@@ -0,0 +1,102 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, List, Optional, Tuple
+
+# Cached queries; each holds every matching name, so narrowing never misses a match
+MAX_ENTRIES = 2000
+
+# Names returned per suggestion request
+SUGGESTION_LIMIT = 10
+
+# (lowercased name, name) pairs in catalog order
+Matches = List[Tuple[str, str]]
+
+
+def normalise_query(query: str) -> str:
+    return query.lower().strip()
+
+
+class SuggestionCache:
+    """LRU of item-name matches per normalised query, for one catalog version.
+
+    A name containing "rice b" also contains "rice", so a query that extends
+    a cached one is answered by filtering that entry instead of rescanning
+    the catalog; typing a word fills the cache one keystroke at a time.
+    Concurrent requests for the same query wait for a single scan.
+    """
+
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.version: Optional[int] = None
+        self.hits = 0
+        self.narrowed = 0
+        self.scans = 0
+        self._entries: 'OrderedDict[str, Matches]' = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, query: str, version: int, scan: Callable[[str], Matches],
+               limit: int = SUGGESTION_LIMIT) -> List[str]:
+        """Get up to `limit` names matching the query, using `scan` only when no cached query narrows to it"""
+        key = normalise_query(query)
+        while True:
+            with self._lock:
+                if version != self.version:
+                    # Names or active flags changed; every entry may be wrong
+                    self._entries.clear()
+                    self.version = version
+                matches = self._entries.get(key)
+                if matches is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return [name for _, name in matches[:limit]]
+                waiting = self._inflight.get(key)
+                if waiting is None:
+                    done = self._inflight[key] = threading.Event()
+                    base = self._narrowest(key)
+                    break
+            waiting.wait()
+
+        try:
+            if base is not None:
+                matches = [match for match in base if key in match[0]]
+            else:
+                matches = scan(key)
+            with self._lock:
+                if base is not None:
+                    self.narrowed += 1
+                else:
+                    self.scans += 1
+                if version == self.version:
+                    self._store(key, matches)
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            done.set()
+        return [name for _, name in matches[:limit]]
+
+    def _narrowest(self, key: str) -> Optional[Matches]:
+        """The cached entry for the longest proper prefix of the query, if any"""
+        for end in range(len(key) - 1, 0, -1):
+            matches = self._entries.get(key[:end])
+            if matches is not None:
+                self._entries.move_to_end(key[:end])
+                return matches
+        return None
+
+    def _store(self, key: Hashable, matches: Matches):
+        self._entries[key] = matches
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'version': self.version,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'narrowed': self.narrowed,
+                'scans': self.scans
+            }
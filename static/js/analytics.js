@@ -0,0 +1,56 @@
+// Analytics page specific JavaScript
+document.addEventListener('DOMContentLoaded', function() {
+    const page = window.analyticsPage;
+    if (page.data) {
+        // Initialize all charts
+        initializeAnalyticsCharts(page.data, page.period);
+    }
+    
+    // Period selector event handlers
+    const periodButtons = document.querySelectorAll('input[name="period"]');
+    periodButtons.forEach(button => {
+        button.addEventListener('change', function() {
+            if (this.checked) {
+                window.location.href = `${page.url}?period=${this.value}`;
+            }
+        });
+    });
+});
+
+function generateCharts() {
+    // Animate chart generation
+    const cards = document.querySelectorAll('.card canvas');
+    cards.forEach((canvas, index) => {
+        setTimeout(() => {
+            canvas.style.animation = 'fadeIn 0.5s ease-in';
+            // Trigger chart redraw if needed
+            const chart = Chart.getChart(canvas);
+            if (chart) {
+                chart.update('active');
+            }
+        }, index * 100);
+    });
+    
+    // Show success message
+    const toast = document.createElement('div');
+    toast.className = 'toast position-fixed top-0 end-0 m-3';
+    toast.setAttribute('role', 'alert');
+    toast.innerHTML = `
+        <div class="toast-header">
+            <i class="fas fa-chart-bar text-success me-2"></i>
+            <strong class="me-auto">Analytics</strong>
+            <button type="button" class="btn-close" data-bs-dismiss="toast"></button>
+        </div>
+        <div class="toast-body">
+            Charts generated successfully!
+        </div>
+    `;
+    document.body.appendChild(toast);
+    
+    const bsToast = new bootstrap.Toast(toast);
+    bsToast.show();
+    
+    setTimeout(() => {
+        document.body.removeChild(toast);
+    }, 3000);
+}
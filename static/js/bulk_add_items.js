@@ -0,0 +1,201 @@
+let rowIndex = 3;
+
+// New rows reuse the category options rendered into the first row
+const categoryOptions = document.querySelector('select[name="items[0][category]"]').innerHTML;
+
+function addRow() {
+    const tableBody = document.getElementById('itemsTableBody');
+    const newRow = document.createElement('tr');
+    newRow.className = 'item-row';
+    
+    newRow.innerHTML = `
+        <td class="row-number text-center">${rowIndex + 1}</td>
+        <td>
+            <input type="text" 
+                   class="form-control form-control-sm border-0" 
+                   name="items[${rowIndex}][name]" 
+                   placeholder="Enter item name">
+        </td>
+        <td>
+            <select class="form-select form-select-sm border-0" name="items[${rowIndex}][category]">
+                ${categoryOptions}
+            </select>
+        </td>
+        <td>
+            <input type="number" 
+                   class="form-control form-control-sm border-0" 
+                   name="items[${rowIndex}][cost_price]" 
+                   step="0.01" 
+                   min="0"
+                   placeholder="0.00">
+        </td>
+        <td>
+            <input type="number" 
+                   class="form-control form-control-sm border-0" 
+                   name="items[${rowIndex}][selling_price]" 
+                   step="0.01" 
+                   min="0"
+                   placeholder="0.00">
+        </td>
+        <td>
+            <input type="number" 
+                   class="form-control form-control-sm border-0" 
+                   name="items[${rowIndex}][initial_stock]" 
+                   min="0"
+                   placeholder="0"
+                   value="0">
+        </td>
+        <td class="text-center">
+            <button type="button" class="btn btn-sm btn-outline-danger" onclick="removeRow(this)">
+                <i class="fas fa-times"></i>
+            </button>
+        </td>
+    `;
+    
+    tableBody.appendChild(newRow);
+    rowIndex++;
+    updateRowNumbers();
+    
+    // Focus on the name input of the new row
+    const nameInput = newRow.querySelector('input[type="text"]');
+    nameInput.focus();
+}
+
+function removeRow(button) {
+    const row = button.closest('tr');
+    const tableBody = document.getElementById('itemsTableBody');
+    
+    // Don't remove if it's the last row
+    if (tableBody.children.length <= 1) {
+        alert('You must have at least one row');
+        return;
+    }
+    
+    row.remove();
+    updateRowNumbers();
+}
+
+function updateRowNumbers() {
+    const rows = document.querySelectorAll('.item-row');
+    const rowCount = document.getElementById('rowCount');
+    
+    rows.forEach((row, index) => {
+        const rowNumber = row.querySelector('.row-number');
+        rowNumber.textContent = index + 1;
+        
+        // Update the name attributes
+        const inputs = row.querySelectorAll('input, select');
+        inputs.forEach(input => {
+            const name = input.getAttribute('name');
+            if (name) {
+                const newName = name.replace(/\[\d+\]/, `[${index}]`);
+                input.setAttribute('name', newName);
+            }
+        });
+    });
+    
+    rowCount.textContent = rows.length;
+}
+
+function clearAll() {
+    if (confirm('Are you sure you want to clear all data?')) {
+        const inputs = document.querySelectorAll('#itemsTable input');
+        const selects = document.querySelectorAll('#itemsTable select');
+        
+        inputs.forEach(input => {
+            if (input.type === 'number' && input.name.includes('initial_stock')) {
+                input.value = '0';
+            } else {
+                input.value = '';
+            }
+        });
+        
+        selects.forEach(select => {
+            select.selectedIndex = 0;
+        });
+        
+        // Focus on first input
+        const firstInput = document.querySelector('#itemsTable input[type="text"]');
+        if (firstInput) {
+            firstInput.focus();
+        }
+    }
+}
+
+// Form submission handling
+document.getElementById('bulkItemsForm').addEventListener('submit', function(e) {
+    const submitBtn = this.querySelector('button[type="submit"]');
+    
+    // Show loading state
+    submitBtn.innerHTML = '<i class="fas fa-spinner fa-spin me-2"></i>Saving Items...';
+    submitBtn.disabled = true;
+    
+    // Count filled rows
+    const filledRows = Array.from(document.querySelectorAll('.item-row')).filter(row => {
+        const nameInput = row.querySelector('input[type="text"]');
+        return nameInput && nameInput.value.trim() !== '';
+    });
+    
+    if (filledRows.length === 0) {
+        e.preventDefault();
+        alert('Please fill in at least one item');
+        submitBtn.innerHTML = '<i class="fas fa-save me-2"></i>Save All Items';
+        submitBtn.disabled = false;
+        return;
+    }
+});
+
+// Enhanced keyboard navigation
+document.addEventListener('keydown', function(e) {
+    if (e.target.matches('#itemsTable input, #itemsTable select')) {
+        if (e.key === 'Tab') {
+            // Tab navigation is handled by browser
+            return;
+        }
+        
+        if (e.key === 'Enter') {
+            e.preventDefault();
+            const currentCell = e.target.closest('td');
+            const currentRow = currentCell.closest('tr');
+            const nextRow = currentRow.nextElementSibling;
+            
+            if (nextRow) {
+                // Move to same column in next row
+                const cellIndex = Array.from(currentRow.children).indexOf(currentCell);
+                const nextCell = nextRow.children[cellIndex];
+                const nextInput = nextCell.querySelector('input, select');
+                if (nextInput) {
+                    nextInput.focus();
+                }
+            } else {
+                // Add new row and focus on it
+                addRow();
+            }
+        }
+    }
+});
+
+// Auto-calculate profit margin indicator
+document.addEventListener('input', function(e) {
+    if (e.target.name && (e.target.name.includes('cost_price') || e.target.name.includes('selling_price'))) {
+        const row = e.target.closest('tr');
+        const costInput = row.querySelector('input[name*="cost_price"]');
+        const sellingInput = row.querySelector('input[name*="selling_price"]');
+        
+        const cost = parseFloat(costInput.value) || 0;
+        const selling = parseFloat(sellingInput.value) || 0;
+        
+        // Add visual feedback for profit margin
+        if (cost > 0 && selling > 0) {
+            if (selling <= cost) {
+                sellingInput.classList.add('is-invalid');
+                sellingInput.classList.remove('is-valid');
+            } else {
+                sellingInput.classList.remove('is-invalid');
+                sellingInput.classList.add('is-valid');
+            }
+        } else {
+            sellingInput.classList.remove('is-invalid', 'is-valid');
+        }
+    }
+});
@@ -0,0 +1,110 @@
+// Search suggestions
+let searchTimeout;
+let searchController;
+const searchInput = document.getElementById('searchInput');
+const suggestionsDiv = document.getElementById('searchSuggestions');
+
+function showSuggestions(suggestions) {
+    if (suggestions.length > 0) {
+        suggestionsDiv.innerHTML = suggestions.map(item => 
+            `<a class="dropdown-item" href="#" onclick="selectSuggestion('${item}')">${item}</a>`
+        ).join('');
+        suggestionsDiv.style.display = 'block';
+    } else {
+        suggestionsDiv.style.display = 'none';
+    }
+}
+
+searchInput.addEventListener('input', function() {
+    clearTimeout(searchTimeout);
+    const query = this.value.trim();
+    
+    if (query.length < 2) {
+        suggestionsDiv.style.display = 'none';
+        return;
+    }
+    
+    searchTimeout = setTimeout(() => {
+        // Only the latest query matters; drop a response still in flight for an older one
+        if (searchController) {
+            searchController.abort();
+        }
+        searchController = new AbortController();
+        fetch(`/api/search-suggestions?q=${encodeURIComponent(query)}`, {signal: searchController.signal})
+            .then(response => {
+                if (response.status === 429) {
+                    return null;  // Rate limited: keep the current suggestions until the next keystroke
+                }
+                return response.json();
+            })
+            .then(suggestions => {
+                if (suggestions) {
+                    showSuggestions(suggestions);
+                }
+            })
+            .catch(error => {
+                if (error.name === 'AbortError') {
+                    return;
+                }
+                console.error('Error fetching suggestions:', error);
+                suggestionsDiv.style.display = 'none';
+            });
+    }, 300);
+});
+
+function selectSuggestion(item) {
+    searchInput.value = item;
+    suggestionsDiv.style.display = 'none';
+    searchInput.form.submit();
+}
+
+// Hide suggestions when clicking outside
+document.addEventListener('click', function(e) {
+    if (!e.target.closest('#searchInput') && !e.target.closest('#searchSuggestions')) {
+        suggestionsDiv.style.display = 'none';
+    }
+});
+
+// Profit preview in add item modal
+const costPriceInput = document.getElementById('cost_price');
+const sellingPriceInput = document.getElementById('selling_price');
+const profitPreview = document.getElementById('profitPreview');
+const profitAmount = document.getElementById('profitAmount');
+
+function updateProfitPreview() {
+    const cost = parseFloat(costPriceInput.value) || 0;
+    const selling = parseFloat(sellingPriceInput.value) || 0;
+    
+    if (cost > 0 && selling > 0) {
+        const profit = selling - cost;
+        const margin = (profit / selling * 100).toFixed(1);
+        profitAmount.textContent = `K${profit.toFixed(2)} (${margin}% margin)`;
+        profitPreview.style.display = 'block';
+    } else {
+        profitPreview.style.display = 'none';
+    }
+}
+
+costPriceInput.addEventListener('input', updateProfitPreview);
+sellingPriceInput.addEventListener('input', updateProfitPreview);
+
+// Quick sale functionality
+function quickSale(itemId, itemName, sellingPrice) {
+    document.getElementById('quick_item_id').value = itemId;
+    document.getElementById('quick_item_name').textContent = itemName;
+    document.getElementById('quick_sale_price').value = sellingPrice;
+    updateSaleTotal();
+    
+    const modal = new bootstrap.Modal(document.getElementById('quickSaleModal'));
+    modal.show();
+}
+
+function updateSaleTotal() {
+    const quantity = parseFloat(document.getElementById('quick_quantity').value) || 0;
+    const price = parseFloat(document.getElementById('quick_sale_price').value) || 0;
+    const total = quantity * price;
+    document.getElementById('totalAmount').textContent = total.toFixed(2);
+}
+
+document.getElementById('quick_quantity').addEventListener('input', updateSaleTotal);
+document.getElementById('quick_sale_price').addEventListener('input', updateSaleTotal);
@@ -0,0 +1,69 @@
+function updateStock(itemId, itemName, operation) {
+    document.getElementById('update_item_id').value = itemId;
+    document.getElementById('update_item_name').textContent = itemName;
+    document.getElementById('update_operation').value = operation;
+    
+    const operationTexts = {
+        'add': 'Add Stock',
+        'subtract': 'Remove Stock',
+        'set': 'Set Stock Level'
+    };
+    
+    const helpTexts = {
+        'add': 'Enter the number of units to add to current stock',
+        'subtract': 'Enter the number of units to remove from current stock',
+        'set': 'Enter the new total stock quantity'
+    };
+    
+    const buttonTexts = {
+        'add': 'Add Stock',
+        'subtract': 'Remove Stock',
+        'set': 'Set Stock'
+    };
+    
+    document.getElementById('update_operation_text').textContent = operationTexts[operation];
+    document.getElementById('quantity_help').textContent = helpTexts[operation];
+    document.getElementById('update_submit_btn').textContent = buttonTexts[operation];
+    document.getElementById('update_reason').value = '';
+    document.getElementById('update_reason_default').textContent = {
+        'add': 'Stock received',
+        'subtract': 'Data entry correction',
+        'set': 'Stock count correction'
+    }[operation];
+    
+    // Set button color based on operation
+    const submitBtn = document.getElementById('update_submit_btn');
+    submitBtn.className = 'btn ' + {
+        'add': 'btn-success',
+        'subtract': 'btn-warning',
+        'set': 'btn-primary'
+    }[operation];
+    
+    const modal = new bootstrap.Modal(document.getElementById('updateStockModal'));
+    modal.show();
+}
+
+function transferStock(itemId, itemName) {
+    document.getElementById('transfer_item_id').value = itemId;
+    document.getElementById('transfer_item_name').textContent = itemName;
+    document.getElementById('transfer_quantity').value = '';
+    
+    const modal = new bootstrap.Modal(document.getElementById('transferStockModal'));
+    modal.show();
+}
+
+function exportInventory() {
+    window.location.href = '/export/inventory-csv';
+}
+
+// Auto-scroll to item if URL hash is present
+window.addEventListener('load', function() {
+    if (window.location.hash) {
+        const element = document.querySelector(window.location.hash);
+        if (element) {
+            element.scrollIntoView({ behavior: 'smooth' });
+            element.classList.add('table-info');
+            setTimeout(() => element.classList.remove('table-info'), 3000);
+        }
+    }
+});
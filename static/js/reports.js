@@ -0,0 +1,11 @@
+// Update analytics sections when tabs are switched
+document.addEventListener('DOMContentLoaded', function() {
+    const tabButtons = document.querySelectorAll('#reportTabs button[data-bs-toggle="tab"]');
+    
+    tabButtons.forEach(button => {
+        button.addEventListener('shown.bs.tab', function(event) {
+            // Add any dynamic loading logic here if needed
+            console.log('Switched to tab:', event.target.getAttribute('data-bs-target'));
+        });
+    });
+});
@@ -0,0 +1,73 @@
+// Initialize tooltips
+var tooltipTriggerList = [].slice.call(document.querySelectorAll('[data-bs-toggle="tooltip"]'))
+var tooltipList = tooltipTriggerList.map(function (tooltipTriggerEl) {
+    return new bootstrap.Tooltip(tooltipTriggerEl)
+});
+
+// Manual sale form handling
+const itemSelect = document.getElementById('item_id');
+const salePriceInput = document.getElementById('sale_price');
+const quantityInput = document.getElementById('quantity');
+const manualSaleTotal = document.getElementById('manualSaleTotal');
+const manualTotalAmount = document.getElementById('manualTotalAmount');
+
+// Auto-fill price when item is selected
+itemSelect.addEventListener('change', function() {
+    const selectedOption = this.options[this.selectedIndex];
+    if (selectedOption.dataset.price) {
+        salePriceInput.value = selectedOption.dataset.price;
+        updateManualTotal();
+    }
+});
+
+function updateManualTotal() {
+    const quantity = parseFloat(quantityInput.value) || 0;
+    const price = parseFloat(salePriceInput.value) || 0;
+    const total = quantity * price;
+    
+    if (total > 0) {
+        manualTotalAmount.textContent = total.toFixed(2);
+        manualSaleTotal.style.display = 'block';
+    } else {
+        manualSaleTotal.style.display = 'none';
+    }
+}
+
+quantityInput.addEventListener('input', updateManualTotal);
+salePriceInput.addEventListener('input', updateManualTotal);
+
+// Quick sale function for compatibility
+function quickSale() {
+    // Focus on the smart sale input
+    const smartSaleInput = document.getElementById('sale_input');
+    if (smartSaleInput) {
+        smartSaleInput.focus();
+        smartSaleInput.scrollIntoView({ behavior: 'smooth' });
+    }
+}
+
+// Export functionality
+function exportSales() {
+    window.location.href = '/export/sales-csv';
+}
+
+// Smart input examples cycling
+const smartInput = document.getElementById('smart_input');
+const examples = [
+    'sold milk for K15',
+    'bread 2 K10',
+    'biscuits K5',
+    'sold rice 5kg K25',
+    'soap K8'
+];
+
+let exampleIndex = 0;
+function cycleExamples() {
+    if (smartInput === document.activeElement) return; // Don't change if user is typing
+    
+    smartInput.placeholder = `e.g., ${examples[exampleIndex]}`;
+    exampleIndex = (exampleIndex + 1) % examples.length;
+}
+
+// Cycle examples every 3 seconds
+setInterval(cycleExamples, 3000);
@@ -0,0 +1,245 @@
+import json
+import os
+import shutil
+import tempfile
+import weakref
+import zlib
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from itertools import islice
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+
+from memory_usage import estimate_bytes
+from records import DEFAULT_LOCATION
+
+MOVEMENT_TYPES = ('initial', 'receipt', 'sale', 'adjustment', 'transfer')
+
+# Reason codes for adjustments; receipts, sales and opening stock carry their own type
+ADJUSTMENT_REASONS = {
+    'count': 'Stock count correction',
+    'damage': 'Damaged goods',
+    'expired': 'Expired stock',
+    'theft': 'Theft or shrinkage',
+    'return': 'Customer return',
+    'supplier_return': 'Returned to supplier',
+    'correction': 'Data entry correction',
+}
+
+# Full stock snapshot taken every N movements, bounding point-in-time replays
+CHECKPOINT_INTERVAL = 1000
+
+# Checkpoint intervals of movements kept in memory; older ones are compressed to disk, one interval per segment
+HOT_CHECKPOINTS = 10
+
+
+def write_movements(path: str, movements: List[Dict]) -> int:
+    """Write an immutable compressed segment of movements and return its size in bytes"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(zlib.compress(json.dumps(movements).encode('utf-8')))
+    os.replace(tmp_path, path)
+    return os.path.getsize(path)
+
+
+def read_movements(path: str) -> List[Dict]:
+    with open(path, 'rb') as f:
+        return json.loads(zlib.decompress(f.read()).decode('utf-8'))
+
+
+class StockLedger:
+    """Append-only log of stock movements with periodic balance checkpoints.
+
+    Current balances are kept as a running projection, a per-item index of
+    (date, balance) supports single-item point-in-time lookups by bisection,
+    and whole-store stock on a date replays at most CHECKPOINT_INTERVAL
+    movements from the nearest earlier checkpoint.
+
+    Only the last `hot_checkpoints` intervals of movements (and their index
+    entries) stay in memory. Older intervals are compacted into compressed
+    segments under `spill_dir` (a temp dir if unset) that are read back only
+    for history or dates that reach behind the hot tail. The segments hold
+    nothing the in-memory store does not, so they are removed with it.
+
+    Every movement happens at one location. `balance` on a movement is the
+    item's chain-wide balance and `location_balance` its balance at that
+    location; a transfer is a pair of movements that leaves the chain-wide
+    balance unchanged.
+    """
+
+    def __init__(self, checkpoint_interval: int = CHECKPOINT_INTERVAL, hot_checkpoints: int = HOT_CHECKPOINTS,
+                 spill_dir: Optional[str] = None):
+        self.movements: List[Dict] = []  # The hot tail; movement N is at N - 1 - archived_count
+        self.archived_count = 0
+        self.balances: Dict[int, int] = {}
+        self.location_balances: Dict[Tuple[str, int], int] = {}
+        self.checkpoint_interval = checkpoint_interval
+        self.hot_checkpoints = max(1, hot_checkpoints)
+        self.spill_dir = spill_dir
+        self._archive_dir: Optional[str] = None
+        self._segments: List[Dict] = []
+        self._checkpoints: List[Dict] = []
+        self._checkpoint_dates: List[str] = []
+        # Per-item and per-location indexes over the hot tail only, by position in the whole log
+        self._item_dates: Dict[int, List[str]] = {}
+        self._item_balances: Dict[int, List[int]] = {}
+        self._item_positions: Dict[int, List[int]] = {}
+        self._location_positions: Dict[str, List[int]] = {}
+
+    def __len__(self) -> int:
+        return self.archived_count + len(self.movements)
+
+    def record(self, item_id: int, change: int, movement_type: str, reason: Optional[str] = None,
+               reference: Optional[Any] = None, date: Optional[str] = None,
+               location: str = DEFAULT_LOCATION) -> Dict:
+        """Append a movement and update the running balance"""
+        if movement_type not in MOVEMENT_TYPES:
+            raise ValueError(f"Unknown movement type '{movement_type}'")
+        if movement_type == 'adjustment' and reason not in ADJUSTMENT_REASONS:
+            raise ValueError(f"Adjustments need a reason: {', '.join(ADJUSTMENT_REASONS)}")
+
+        date = date or datetime.now().isoformat()
+        if self.movements and date < self.movements[-1]['date']:
+            date = self.movements[-1]['date']  # Keep the log ordered if the clock steps back
+
+        balance = self.balances.get(item_id, 0) + change
+        location_balance = self.location_balances.get((location, item_id), 0) + change
+        position = len(self)
+        movement = {
+            'id': position + 1,
+            'item_id': item_id,
+            'type': movement_type,
+            'change': change,
+            'balance': balance,
+            'location': location,
+            'location_balance': location_balance,
+            'reason': reason,
+            'reference': reference,
+            'date': date
+        }
+        self.movements.append(movement)
+        self.balances[item_id] = balance
+        self.location_balances[(location, item_id)] = location_balance
+        self._location_positions.setdefault(location, []).append(position)
+        self._item_dates.setdefault(item_id, []).append(date)
+        self._item_balances.setdefault(item_id, []).append(balance)
+        self._item_positions.setdefault(item_id, []).append(position)
+
+        if len(self) % self.checkpoint_interval == 0:
+            self._checkpoints.append({'index': len(self), 'date': date, 'balances': dict(self.balances)})
+            self._checkpoint_dates.append(date)
+            if len(self.movements) > self.checkpoint_interval * self.hot_checkpoints:
+                self._compact()
+
+        return movement
+
+    def _compact(self):
+        """Move the oldest checkpoint interval of the hot tail to a segment and drop its index entries"""
+        if self._archive_dir is None:
+            if self.spill_dir:
+                os.makedirs(self.spill_dir, exist_ok=True)
+            self._archive_dir = tempfile.mkdtemp(prefix='stock_ledger_', dir=self.spill_dir)
+            weakref.finalize(self, shutil.rmtree, self._archive_dir, True)
+
+        block = self.movements[:self.checkpoint_interval]
+        path = os.path.join(self._archive_dir, f"movements-{len(self._segments) + 1:06d}.seg")
+        size = write_movements(path, block)
+        self._segments.append({'path': path, 'first': self.archived_count, 'count': len(block), 'bytes': size})
+        del self.movements[:len(block)]
+        self.archived_count += len(block)
+
+        for item_id, positions in list(self._item_positions.items()):
+            cut = bisect_left(positions, self.archived_count)
+            if cut == len(positions):
+                del self._item_positions[item_id], self._item_dates[item_id], self._item_balances[item_id]
+            elif cut:
+                del positions[:cut], self._item_dates[item_id][:cut], self._item_balances[item_id][:cut]
+        for location, positions in list(self._location_positions.items()):
+            cut = bisect_left(positions, self.archived_count)
+            if cut == len(positions):
+                del self._location_positions[location]
+            elif cut:
+                del positions[:cut]
+
+    def _iter_from(self, index: int) -> Iterator[Dict]:
+        """Movements from position `index` on, oldest first, reading segments as needed"""
+        for segment in self._segments:
+            if segment['first'] + segment['count'] > index:
+                yield from read_movements(segment['path'])[max(0, index - segment['first']):]
+        yield from self.movements[max(0, index - self.archived_count):]
+
+    def _archived_newest_first(self, item_id: Optional[int], location: Optional[str]) -> Iterator[Dict]:
+        for segment in reversed(self._segments):
+            for movement in reversed(read_movements(segment['path'])):
+                if ((item_id is None or movement['item_id'] == item_id)
+                        and (location is None or movement['location'] == location)):
+                    yield movement
+
+    def balance(self, item_id: int, location: Optional[str] = None) -> int:
+        """Get the current balance for an item, chain-wide or at one location"""
+        if location is not None:
+            return self.location_balances.get((location, item_id), 0)
+        return self.balances.get(item_id, 0)
+
+    def item_balance_at(self, item_id: int, date: str) -> int:
+        """Get an item's balance as of an ISO timestamp"""
+        dates = self._item_dates.get(item_id)
+        position = bisect_right(dates, date) if dates else 0
+        if position:
+            return self._item_balances[item_id][position - 1]
+        if not self.archived_count:
+            return 0
+        # The answer lies behind the hot tail; a checkpoint plus at most one interval has it
+        return self.balances_at(date).get(item_id, 0)
+
+    def balances_at(self, date: str) -> Dict[int, int]:
+        """Get every item's balance as of an ISO timestamp"""
+        position = bisect_right(self._checkpoint_dates, date)
+        if position:
+            checkpoint = self._checkpoints[position - 1]
+            balances = dict(checkpoint['balances'])
+            start = checkpoint['index']
+        else:
+            balances = {}
+            start = 0
+
+        for movement in self._iter_from(start):
+            if movement['date'] > date:
+                break
+            balances[movement['item_id']] = movement['balance']
+        return balances
+
+    def history(self, item_id: Optional[int] = None, limit: Optional[int] = None,
+                location: Optional[str] = None) -> List[Dict]:
+        """Get movements (optionally for one item and/or location), newest first"""
+        if item_id is None and location is None:
+            movements = self.movements[-limit:] if limit else self.movements
+            recent = movements[::-1]
+        else:
+            if item_id is None:
+                positions = self._location_positions.get(location, [])
+            else:
+                positions = self._item_positions.get(item_id, [])
+                if location is not None:
+                    positions = [position for position in positions
+                                 if self.movements[position - self.archived_count]['location'] == location]
+            if limit:
+                positions = positions[-limit:]
+            recent = [self.movements[position - self.archived_count] for position in reversed(positions)]
+
+        if not self._segments or (limit and len(recent) >= limit):
+            return recent
+        older = self._archived_newest_first(item_id, location)
+        return recent + list(islice(older, limit - len(recent) if limit else None))
+
+    def usage(self) -> Dict[str, Any]:
+        """Get the hot tail's size estimate and archive totals"""
+        usage = estimate_bytes(reversed(self.movements), len(self.movements))
+        usage.update({
+            'count': len(self),
+            'resident_count': len(self.movements),
+            'archived_count': self.archived_count,
+            'checkpoints': len(self._checkpoints),
+            'segments': len(self._segments),
+            'archive_bytes': sum(segment['bytes'] for segment in self._segments)
+        })
+        return usage
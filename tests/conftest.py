@@ -0,0 +1,36 @@
+import os
+import sys
+
+import pytest
+
+# The modules live at the repository root rather than in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from records import Sale  # noqa: E402
+
+
+@pytest.fixture
+def make_sale():
+    """Build a Sale with sensible defaults; `when` is a datetime"""
+    counter = iter(range(1, 1_000_000))
+
+    def build(when, item_id=1, quantity=1, unit_price=10.0, cost_price=6.0, item_name='Bread',
+              category='Food', notes='', location='main'):
+        total = quantity * unit_price
+        return Sale(next(counter), item_id, item_name, category, quantity, unit_price, total, cost_price,
+                    total - quantity * cost_price, when.timestamp(), notes, location)
+
+    return build
+
+
+@pytest.fixture
+def data_manager(monkeypatch):
+    """A fresh, set-up store with two items and no background wiring"""
+    monkeypatch.delenv('DAY_CLOSE_FILE', raising=False)
+    from data_manager import DataManager
+
+    manager = DataManager()
+    manager.setup_business('Test Shop', 'retail')
+    manager.add_item('Bread', 'Food', 6.0, 10.0, initial_stock=100)
+    manager.add_item('Milk', 'Drinks', 3.0, 5.0, initial_stock=100)
+    return manager
@@ -0,0 +1,51 @@
+from data_manager import DEFAULT_LOCATION
+
+
+def _usual_sales(data_manager, count=12, location=DEFAULT_LOCATION):
+    for _ in range(count):
+        data_manager.add_sale(1, 1, 10.0, location=location)
+
+
+def _alerts(data_manager, alert_type):
+    return [alert for alert in data_manager.get_active_alerts() if alert.type == alert_type]
+
+
+def test_price_anomaly_alert_once_while_active(data_manager):
+    _usual_sales(data_manager)
+    data_manager.add_sale(1, 1, 100.0)
+    data_manager.add_sale(1, 1, 120.0)
+    alerts = _alerts(data_manager, 'price_anomaly')
+    assert len(alerts) == 1
+    assert alerts[0].item_id == 1
+
+    data_manager.dismiss_alert(alerts[0].id)
+    data_manager.add_sale(1, 1, 150.0)
+    assert len(_alerts(data_manager, 'price_anomaly')) == 1
+    assert len([alert for alert in data_manager.alerts if alert.type == 'price_anomaly']) == 2
+
+
+def test_anomaly_alert_carries_the_sale_location(data_manager):
+    data_manager.save_location('north', 'North Street')
+    data_manager.transfer_stock(1, 50, DEFAULT_LOCATION, 'north')
+    _usual_sales(data_manager, location='north')
+    data_manager.add_sale(1, 1, 100.0, location='north')
+    data_manager.add_sale(1, 1, 100.0, location=DEFAULT_LOCATION)
+    assert sorted(alert.location for alert in _alerts(data_manager, 'price_anomaly')) == [DEFAULT_LOCATION, 'north']
+
+
+def test_low_stock_alert_once_per_location(data_manager):
+    data_manager.update_inventory(1, 3, 'set')
+    data_manager.add_sale(1, 1, 10.0)
+    assert len(_alerts(data_manager, 'low_stock')) == 1
+    assert data_manager.sweep_alerts() == []
+
+
+def test_replayed_dismissal_updates_the_index(data_manager):
+    data_manager.update_inventory(1, 3, 'set')
+    alert = _alerts(data_manager, 'low_stock')[0]
+    dismissed = alert.to_row()
+    dismissed[alert.fields.index('active')] = False
+    data_manager.apply_mutation('alert', dismissed)
+    assert not data_manager._has_active_alert('low_stock', 1)
+    data_manager.sweep_alerts()
+    assert len(_alerts(data_manager, 'low_stock')) == 1
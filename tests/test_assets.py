@@ -0,0 +1,86 @@
+import gzip
+import os
+
+import pytest
+from flask import Flask, url_for
+
+import assets
+from assets import build_assets, install_assets, load_manifest
+
+
+@pytest.fixture
+def static_dir(tmp_path):
+    (tmp_path / 'js').mkdir()
+    (tmp_path / 'js' / 'sales.js').write_text('console.log("sales");\n' * 100)
+    (tmp_path / 'css').mkdir()
+    (tmp_path / 'css' / 'style.css').write_text('body { margin: 0; }\n')
+    return tmp_path
+
+
+def _app(static_dir):
+    app = Flask(__name__, static_folder=str(static_dir), static_url_path='/static')
+    app.add_url_rule('/page', 'page', lambda: '<p>' + 'x' * 1000 + '</p>')
+    return app
+
+
+def test_build_writes_fingerprinted_and_compressed_copies(static_dir):
+    manifest = build_assets(str(static_dir))
+    target = static_dir / manifest['js/sales.js']
+    assert manifest['js/sales.js'].startswith('dist/js/sales.')
+    assert gzip.decompress((static_dir / (manifest['js/sales.js'] + '.gz')).read_bytes()) == target.read_bytes()
+    assert load_manifest(str(static_dir)) == manifest
+    assert not [name for _, _, files in os.walk(static_dir) for name in files if name.endswith('.tmp')]
+
+
+def test_rebuild_is_stable(static_dir):
+    assert build_assets(str(static_dir)) == build_assets(str(static_dir))
+
+
+def test_failed_write_leaves_no_temp_file(static_dir, monkeypatch):
+    def fail(src, dst):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(assets.os, 'replace', fail)
+    with pytest.raises(OSError):
+        build_assets(str(static_dir))
+    assert not [name for _, _, files in os.walk(static_dir) for name in files if name.endswith('.tmp')]
+
+
+def test_install_falls_back_to_existing_build(static_dir, monkeypatch):
+    built = build_assets(str(static_dir))
+
+    def read_only(static):
+        raise PermissionError('Read-only file system')
+
+    monkeypatch.setattr(assets, 'build_assets', read_only)
+    app = _app(static_dir)
+    assert install_assets(app) == built
+
+
+def test_install_without_build_serves_plain_files(static_dir):
+    app = _app(static_dir)
+    assert install_assets(app, build=False) == {}
+    with app.test_request_context():
+        assert url_for('static', filename='js/sales.js') == '/static/js/sales.js'
+    assert not (static_dir / 'dist').exists()
+
+
+def test_serves_precompressed_immutable_copy(static_dir):
+    app = _app(static_dir)
+    manifest = install_assets(app)
+    with app.test_request_context():
+        url = url_for('static', filename='js/sales.js')
+    assert url == f"/static/{manifest['js/sales.js']}"
+
+    response = app.test_client().get(url, headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'immutable' in response.headers['Cache-Control']
+    assert gzip.decompress(response.data) == (static_dir / 'js' / 'sales.js').read_bytes()
+
+
+def test_compresses_dynamic_html(static_dir):
+    app = _app(static_dir)
+    install_assets(app, build=False)
+    client = app.test_client()
+    assert client.get('/page', headers={'Accept-Encoding': 'gzip'}).headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Encoding' not in client.get('/page').headers
@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+
+from basket_analysis import BASKET_GAP, BasketAnalysis, TopKCounter
+from data_manager import DEFAULT_LOCATION
+
+
+def _window():
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    return today - timedelta(days=1), today + timedelta(days=1)
+
+
+def test_sales_close_together_form_one_basket(make_sale):
+    baskets = BasketAnalysis()
+    when = datetime(2026, 3, 2, 10)
+    baskets.record_sale(make_sale(when, item_id=1))
+    baskets.record_sale(make_sale(when + timedelta(seconds=30), item_id=2))
+    baskets.record_sale(make_sale(when + timedelta(seconds=BASKET_GAP + 60), item_id=1))
+    result = baskets.top_pairs(datetime(2026, 3, 2), datetime(2026, 3, 3))
+    assert result['baskets'] == 2
+    assert result['pairs'][0]['items'] == [1, 2]
+    assert result['pairs'][0]['support'] == 0.5
+
+
+def test_sources_do_not_share_baskets(make_sale):
+    baskets = BasketAnalysis()
+    when = datetime(2026, 3, 2, 10)
+    baskets.record_sale(make_sale(when, item_id=1), source='till-1')
+    baskets.record_sale(make_sale(when, item_id=2), source='till-2')
+    result = baskets.top_pairs(datetime(2026, 3, 2), datetime(2026, 3, 3))
+    assert result['baskets'] == 2
+    assert result['pairs'] == []
+
+
+def test_top_k_keeps_largest_and_tracks_error():
+    counter = TopKCounter(capacity=2)
+    for key, count in (('a', 5), ('b', 4), ('c', 1), ('d', 2), ('e', 1)):
+        counter.add(key, count)
+    assert set(counter.counts) == {'a', 'b'}
+    assert counter.error == 2
+
+
+def test_counter_sessions_are_separate_baskets(data_manager):
+    data_manager.add_sale(1, 1, 10.0, basket_id='till-a')
+    data_manager.add_sale(2, 1, 5.0, basket_id='till-b')
+    assert data_manager.get_frequent_pairs(*_window())['baskets'] == 2
+
+    data_manager.add_sale(2, 1, 5.0, basket_id='till-a')
+    pairs = data_manager.get_frequent_pairs(*_window())['pairs']
+    assert pairs[0]['item_names'] == ['Bread', 'Milk']
+
+
+def test_locations_are_separate_baskets(data_manager):
+    data_manager.save_location('north', 'North Street')
+    data_manager.transfer_stock(2, 10, DEFAULT_LOCATION, 'north')
+    data_manager.add_sale(1, 1, 10.0)
+    data_manager.add_sale(2, 1, 5.0, location='north')
+    result = data_manager.get_frequent_pairs(*_window())
+    assert result['baskets'] == 2
+    assert result['pairs'] == []
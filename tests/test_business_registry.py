@@ -0,0 +1,32 @@
+import json
+
+import pytest
+
+from business_registry import DEFAULT_REGISTRY_PATH, get_registry, load_registry
+
+
+def test_registry_is_loaded_once():
+    assert get_registry() is get_registry()
+
+
+def test_categories_and_fallback():
+    registry = load_registry(DEFAULT_REGISTRY_PATH)
+    assert 'Dairy & Eggs' in registry.categories_for('Grocery')
+    assert registry.categories_for('no such type') == registry.default_categories
+    assert registry.business_types[-1]['id'] == 'other'
+    with pytest.raises(TypeError):
+        registry.business_types[0]['name'] = 'Changed'
+
+
+def test_custom_types_override_built_ins(tmp_path):
+    custom = tmp_path / 'types.json'
+    custom.write_text(json.dumps({'business_types': [
+        {'id': 'grocery', 'categories': ['Produce']},
+        {'id': 'bike_shop', 'categories': ['Bikes', 'Parts']},
+    ]}))
+    registry = load_registry(DEFAULT_REGISTRY_PATH, str(custom))
+    grocery = next(entry for entry in registry.business_types if entry['id'] == 'grocery')
+    assert grocery['name'] == 'Grocery Store'
+    assert registry.categories_for('grocery') == ('Produce',)
+    assert registry.categories_for('bike_shop') == ('Bikes', 'Parts')
+    assert [entry['id'] for entry in registry.business_types][-2:] == ['bike_shop', 'other']
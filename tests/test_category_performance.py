@@ -0,0 +1,24 @@
+import pytest
+
+
+def test_category_performance_from_rollups(data_manager):
+    data_manager.add_sale(1, 3, 10.0)
+    data_manager.add_sale(2, 2, 5.0)
+    data_manager.add_sale(1, 1, 10.0)
+
+    performance = data_manager.get_sales_analytics(7)['category_performance']
+    assert [row['category'] for row in performance] == ['Food', 'Drinks']
+    food, drinks = performance
+    assert (food['quantity'], food['revenue'], food['profit'], food['sales']) == (4, 40.0, 16.0, 2)
+    assert (drinks['quantity'], drinks['revenue'], drinks['sales']) == (2, 10.0, 1)
+    assert food['revenue_share'] + drinks['revenue_share'] == pytest.approx(100)
+
+
+def test_category_is_the_one_at_sale_time(data_manager):
+    sale = data_manager.add_sale(1, 1, 10.0)
+    data_manager.items[0].category = 'Bakery'
+    data_manager.add_sale(1, 1, 10.0)
+
+    categories = {row['category']: row['sales'] for row in data_manager.get_sales_analytics(7)['category_performance']}
+    assert sale.category == 'Food'
+    assert categories == {'Food': 1, 'Bakery': 1}
@@ -0,0 +1,119 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from data_manager import DataManager
+from day_close import DayCloseStore
+
+
+def _import(data_manager, when, quantity=1, notes='', item_id=1, unit_price=10.0):
+    data_manager.import_sales([{'item': data_manager.get_item_by_id(item_id), 'quantity': quantity,
+                                'unit_price': unit_price, 'sale_date': when.isoformat(), 'notes': notes}])
+
+
+@pytest.fixture
+def three_days_ago():
+    return (datetime.now() - timedelta(days=3)).replace(hour=12, minute=0, second=0, microsecond=0)
+
+
+def test_close_day_from_rollups(data_manager, three_days_ago):
+    _import(data_manager, three_days_ago, 2, 'cash')
+    _import(data_manager, three_days_ago, 1, 'Smart input: bread 10')
+    _import(data_manager, three_days_ago, 1, item_id=2, unit_price=5.0)
+
+    day = three_days_ago.date().isoformat()
+    snapshot = data_manager.close_day(day)
+    assert snapshot['sales_count'] == 3
+    assert snapshot['total_revenue'] == 35.0
+    assert set(snapshot['by_payment']) == {'cash', 'Smart input', 'No notes'}
+    assert snapshot['by_payment']['cash']['revenue'] == 20.0
+    assert snapshot['by_category']['Drinks']['sales'] == 1
+    assert snapshot['top_items'][0]['item_name'] == 'Bread'
+    with pytest.raises(ValueError, match='already closed'):
+        data_manager.close_day(day)
+
+
+def test_close_pending_days(data_manager, three_days_ago):
+    _import(data_manager, three_days_ago - timedelta(days=10))
+    closed = data_manager.close_pending_days()
+    assert len(closed) == 13
+    assert closed[-1] == (datetime.now().date() - timedelta(days=1)).isoformat()
+    assert data_manager.close_pending_days() == []
+
+
+def test_late_sales_amend_a_closed_day(data_manager, three_days_ago):
+    _import(data_manager, three_days_ago)
+    day = three_days_ago.date().isoformat()
+    closed_at = data_manager.close_day(day)['closed_at']
+
+    _import(data_manager, three_days_ago + timedelta(hours=1), 3, 'card')
+    data_manager.sync_till('till-1', [{'client_id': 'a', 'seq': 1, 'item_id': 2, 'quantity': 1,
+                                       'sale_price': 5.0, 'sale_date': three_days_ago.isoformat()}])
+
+    snapshot = data_manager.get_daily_summary(day)
+    assert snapshot['closed'] and snapshot['closed_at'] == closed_at and 'amended_at' in snapshot
+    assert snapshot['sales_count'] == 3
+    assert snapshot['total_revenue'] == 45.0
+    assert snapshot['by_payment']['card']['quantity'] == 3
+
+    month = data_manager.get_period_summary(day, day)
+    assert month['sales_count'] == 3 and month['days_closed'] == 1
+
+
+def test_store_file_keeps_the_latest_snapshot(tmp_path):
+    path = str(tmp_path / 'closes.jsonl')
+    store = DayCloseStore(path)
+    snapshot = {'date': '2026-01-02', 'closed_at': 'x', 'total_revenue': 1.0, 'total_profit': 0.5,
+                'total_items_sold': 1, 'sales_count': 1, 'by_category': {}, 'by_payment': {}, 'top_items': []}
+    store.close(snapshot)
+    store.amend(dict(snapshot, total_revenue=3.0, sales_count=2))
+    with pytest.raises(ValueError):
+        store.amend(dict(snapshot, date='2026-01-03'))
+
+    reloaded = DayCloseStore(path)
+    assert reloaded.get('2026-01-02')['total_revenue'] == 3.0
+    assert [entry['date'] for entry in reloaded.between('2026-01-01', '2026-01-31')] == ['2026-01-02']
+
+
+def test_replica_applies_amended_closes(data_manager, three_days_ago):
+    mutations = []
+
+    class Log:
+        def append(self, kind, payload):
+            mutations.append((kind, payload))
+
+    data_manager.mutation_log = Log()
+    _import(data_manager, three_days_ago)
+    data_manager.close_day(three_days_ago.date().isoformat())
+    _import(data_manager, three_days_ago)
+
+    replica = DataManager()
+    for kind, payload in mutations:
+        replica.apply_mutation(kind, payload)
+    assert replica.get_daily_summary(three_days_ago.date().isoformat())['sales_count'] == 2
+
+
+def test_late_sale_after_restart_adds_to_the_stored_report(tmp_path, monkeypatch, three_days_ago):
+    monkeypatch.setenv('DAY_CLOSE_FILE', str(tmp_path / 'closes.jsonl'))
+
+    def start():
+        manager = DataManager()
+        manager.setup_business('Test Shop', 'retail')
+        manager.add_item('Bread', 'Food', 6.0, 10.0)
+        return manager
+
+    before = start()
+    for _ in range(50):
+        _import(before, three_days_ago, notes='cash')
+    day = three_days_ago.date().isoformat()
+    before.close_day(day)
+
+    after = start()  # The Z-reports survive the restart, the sales do not
+    _import(after, three_days_ago + timedelta(hours=1), quantity=2, notes='card')
+    snapshot = after.get_daily_summary(day)
+    assert snapshot['sales_count'] == 51
+    assert snapshot['total_revenue'] == 520.0
+    assert snapshot['by_payment']['cash']['sales'] == 50
+    assert snapshot['by_payment']['card']['revenue'] == 20.0
+    assert snapshot['top_items'] == [{'item_name': 'Bread', 'quantity': 52, 'revenue': 520.0, 'profit': 208.0}]
+    assert DayCloseStore(str(tmp_path / 'closes.jsonl')).get(day)['sales_count'] == 51
@@ -0,0 +1,77 @@
+import csv
+import io
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+import export_tasks
+from export_tasks import read_sale_rows, sales_csv, write_sale_rows
+
+
+@pytest.fixture
+def rows_file(tmp_path, make_sale):
+    sales = [make_sale(datetime(2026, 3, 1) + timedelta(hours=n), quantity=n + 1) for n in range(12)]
+    path = tmp_path / 'rows.pickle'
+    with open(path, 'wb') as f:
+        assert write_sale_rows(f, iter(sales), chunk_rows=5) == 12
+    return str(path), sales
+
+
+def test_rows_round_trip_in_chunks(rows_file, monkeypatch):
+    path, sales = rows_file
+    chunks = []
+    load = export_tasks.pickle.load
+    monkeypatch.setattr(export_tasks.pickle, 'load', lambda f: chunks.append(1) or load(f))
+    assert list(read_sale_rows(path)) == [sale.to_row() for sale in sales]
+    assert len(chunks) == 4  # Three chunks, then end of file
+
+
+def test_empty_rows_file(tmp_path):
+    path = tmp_path / 'rows.pickle'
+    with open(path, 'wb') as f:
+        assert write_sale_rows(f, iter([])) == 0
+    assert list(read_sale_rows(str(path))) == []
+
+
+def test_sales_csv_streams_rows_in_file_order(tmp_path, make_sale, monkeypatch):
+    sales = [make_sale(datetime(2026, 3, 1) - timedelta(hours=n)) for n in range(12)]
+    path = tmp_path / 'rows.pickle'
+    with open(path, 'wb') as f:
+        write_sale_rows(f, iter(sales), chunk_rows=5)
+    monkeypatch.setattr(export_tasks, 'sorted', lambda *args, **kwargs: pytest.fail('sorted in memory'),
+                        raising=False)
+    csv_path = sales_csv(str(path), 'K')
+    with open(csv_path, encoding='utf-8', newline='') as f:
+        rows = list(csv.reader(f))
+    os.remove(csv_path)
+    assert rows[0] == export_tasks.SALES_CSV_HEADER
+    assert [int(row[0]) for row in rows[1:]] == [sale.id for sale in sales]
+    assert rows[1][4] == 'K10.00'
+
+
+def test_full_report_from_rows_file(rows_file):
+    pytest.importorskip('reportlab')
+    from sales_rollups import SalesRollups
+
+    path, sales = rows_file
+    rollups = SalesRollups()
+    for sale in sales:
+        rollups.record_sale(sale)
+    start, end = datetime(2026, 3, 1), datetime(2026, 3, 2)
+    report = export_tasks.full_report_pdf(rollups.aggregate(start, end), path, 'K', start, end)
+    with open(report, 'rb') as f:
+        assert f.read(5) == b'%PDF-'
+    os.remove(report)
+
+
+def test_ledger_iterator_outlives_the_lock(data_manager):
+    start = datetime.now() - timedelta(hours=1)
+    end = datetime.now() + timedelta(hours=1)
+    data_manager.add_sale(1, 1, 10.0)
+    with data_manager.lock:
+        sales = data_manager.iter_sales(start, end)
+    data_manager.add_sale(2, 1, 5.0)
+
+    buffer = io.BytesIO()
+    assert write_sale_rows(buffer, sales) == 1
@@ -0,0 +1,71 @@
+from jinja2 import Environment
+
+from fragment_cache import FragmentCache, FragmentCacheExtension
+
+
+def _environment(cache):
+    environment = Environment(extensions=[FragmentCacheExtension])
+    environment.fragment_cache = cache
+    return environment
+
+
+def test_lru_evicts_by_entries():
+    cache = FragmentCache(max_entries=2)
+    cache.set('a', 'A')
+    cache.set('b', 'B')
+    cache.get('a')
+    cache.set('c', 'C')
+    assert cache.get('b') is None
+    assert cache.get('a') == 'A'
+    assert cache.evictions == 1
+
+
+def test_lru_evicts_by_bytes_and_skips_oversized():
+    cache = FragmentCache(max_bytes=10)
+    cache.set('a', 'x' * 6)
+    cache.set('b', 'y' * 6)
+    assert len(cache) == 1
+    assert cache.bytes == 6
+    cache.set('huge', 'z' * 11)
+    assert cache.get('huge') is None
+    assert cache.get('b') == 'y' * 6
+
+
+def test_replacing_a_key_keeps_the_byte_count():
+    cache = FragmentCache()
+    cache.set('a', 'x' * 5)
+    cache.set('a', 'x' * 3)
+    assert cache.bytes == 3
+    assert cache.stats()['entries'] == 1
+
+
+def test_block_renders_once_per_key():
+    cache = FragmentCache()
+    environment = _environment(cache)
+    template = environment.from_string("{% cache 'row', item.id, item.version %}{{ item.name }}"
+                                       "{{ calls.append(1) or '' }}{% endcache %}")
+    calls = []
+    item = {'id': 1, 'version': 1, 'name': 'Bread'}
+    assert template.render(item=item, calls=calls) == 'Bread'
+    assert template.render(item=dict(item, name='Changed'), calls=calls) == 'Bread'
+    assert len(calls) == 1
+    assert template.render(item={'id': 1, 'version': 2, 'name': 'Rye'}, calls=calls) == 'Rye'
+    assert cache.stats()['hit_rate'] == round(1 / 3, 4)
+
+
+def test_nested_blocks_cache_separately():
+    cache = FragmentCache()
+    template = _environment(cache).from_string(
+        "{% cache 'table', version %}<ul>{% for item in items %}{% cache 'row', item.id, item.v %}"
+        "<li>{{ item.name }}</li>{% endcache %}{% endfor %}</ul>{% endcache %}")
+    items = [{'id': 1, 'v': 1, 'name': 'Bread'}, {'id': 2, 'v': 1, 'name': 'Milk'}]
+    assert template.render(version=1, items=items) == '<ul><li>Bread</li><li>Milk</li></ul>'
+    items[1] = {'id': 2, 'v': 2, 'name': 'Oat milk'}
+    assert template.render(version=2, items=items) == '<ul><li>Bread</li><li>Oat milk</li></ul>'
+    assert len(cache) == 5
+
+
+def test_without_cache_renders_every_time():
+    template = _environment(None).from_string("{% cache 'x', 1 %}{{ value }}{% endcache %}")
+    assert template.render(value='a') == 'a'
+    assert template.render(value='b') == 'b'
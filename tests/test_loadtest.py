@@ -0,0 +1,56 @@
+import random
+
+from loadtest import DEFAULT_MIX, Recorder, Scenarios, parse_mix, run_load, seed_catalog
+
+
+class StoreTransport:
+    """Sends sales straight to a DataManager; everything else answers 200"""
+
+    def __init__(self, data_manager):
+        self.data_manager = data_manager
+        self.paths = []
+
+    def request(self, method, path, data=None):
+        self.paths.append(path)
+        if path == '/sales/add':
+            self.data_manager.add_sale(data['item_id'], data['quantity'], data['sale_price'], data['notes'])
+        return 200
+
+
+def test_every_scenario_in_the_mix_exists():
+    assert all(callable(getattr(Scenarios, name, None)) for name in DEFAULT_MIX)
+    assert parse_mix('sale=3,reports=1') == {'sale': 3, 'reports': 1}
+
+
+def test_seed_catalog_is_deterministic():
+    assert seed_catalog(30) == seed_catalog(30)
+    assert all(selling > cost for _, cost, selling in seed_catalog(30))
+
+
+def test_sales_use_catalog_prices_and_raise_no_anomalies():
+    from data_manager import DataManager
+
+    store = DataManager()
+    catalog = seed_catalog(5)
+    for name, cost, selling_price in catalog:
+        store.add_item(name, 'General', cost, selling_price, 10 ** 6)
+
+    transport = StoreTransport(store)
+    scenarios = Scenarios(transport, Recorder(), [selling for _, _, selling in catalog], random.Random(1))
+    for _ in range(300):
+        scenarios.sale()
+
+    assert len(store.sales) == 300
+    assert {sale.unit_price for sale in store.sales} <= {selling for _, _, selling in catalog}
+    assert not [alert for alert in store.alerts if alert.type == 'price_anomaly']
+
+
+def test_run_load_reports_each_route(data_manager):
+    for item_id in (1, 2):
+        data_manager.update_inventory(item_id, 10 ** 6)
+    transport = StoreTransport(data_manager)
+    rows, elapsed = run_load(transport, {'sale': 1, 'reports': 1}, concurrency=2, duration=0.2,
+                             prices=[10.0, 5.0])
+    assert {row['route'] for row in rows} == {'POST /sales/add', 'GET /reports'}
+    assert all(row['errors'] == 0 for row in rows)
+    assert '/' not in transport.paths
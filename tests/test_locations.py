@@ -0,0 +1,44 @@
+import pytest
+
+from data_manager import DEFAULT_LOCATION, DataManager
+
+
+@pytest.fixture
+def chain(data_manager):
+    data_manager.save_location('north', 'North Street', low_stock_threshold=10)
+    data_manager.transfer_stock(1, 8, DEFAULT_LOCATION, 'north')
+    return data_manager
+
+
+def test_transfer_keeps_the_chain_balance(chain):
+    quantities = {entry['location']: entry['quantity'] for entry in chain.get_item_locations(1)}
+    assert quantities == {DEFAULT_LOCATION: 92, 'north': 8}
+    assert chain.inventory[1].quantity == 100
+    with pytest.raises(ValueError, match='Insufficient stock at North Street'):
+        chain.transfer_stock(1, 9, 'north', DEFAULT_LOCATION)
+
+
+def test_thresholds_are_per_location(chain):
+    locations = {entry['code']: entry for entry in chain.get_locations()}
+    assert locations['north']['low_stock'] == 1
+    assert locations[DEFAULT_LOCATION]['low_stock'] == 0
+    assert [entry['is_low_stock'] for entry in chain.get_item_locations(1)] == [False, True]
+
+
+def test_inventory_status_at_a_location(chain):
+    status = chain.get_inventory_status('north')
+    assert [(entry['item'].name, entry['quantity']) for entry in status] == [('Bread', 8)]
+    assert status[0]['is_low_stock']
+    with pytest.raises(ValueError, match='Unknown location'):
+        chain.get_inventory_status('south')
+
+
+def test_items_are_looked_up_by_id(data_manager):
+    assert data_manager.get_item_by_id(2).name == 'Milk'
+    assert data_manager.get_item_by_id(3) is None
+
+    replica = DataManager()
+    for item in data_manager.items:
+        replica.apply_mutation('item', {'row': item.to_row(), 'price': data_manager.get_price_history(item.id)[-1]})
+    assert replica.get_item_by_id(2).name == 'Milk'
+    assert replica.get_item_by_id(2) is replica.items[1]
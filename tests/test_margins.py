@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+
+def _import(data_manager, item_id, days_ago, unit_price, cost_price, quantity=1):
+    item = data_manager.get_item_by_id(item_id)
+    when = datetime.now() - timedelta(days=days_ago)
+    data_manager.import_sales([{'item': item, 'quantity': quantity, 'unit_price': unit_price,
+                                'cost_price': cost_price, 'sale_date': when.isoformat()}])
+
+
+@pytest.fixture
+def eroded(data_manager):
+    # Bread: 40% margin over the baseline weeks, 10% this week
+    for days_ago in (10, 15, 20):
+        _import(data_manager, 1, days_ago, 10.0, 6.0)
+    for days_ago in (1, 2):
+        _import(data_manager, 1, days_ago, 10.0, 9.0)
+    return data_manager
+
+
+def test_price_history(data_manager):
+    data_manager.update_item_prices(1, cost_price=7.0)
+    data_manager.update_item_prices(1, cost_price=7.0)  # Unchanged, not recorded
+    data_manager.update_item_prices(1, selling_price=12.0)
+    history = data_manager.get_price_history(1)
+    assert [(entry['cost_price'], entry['selling_price']) for entry in history] == [
+        (6.0, 10.0), (7.0, 10.0), (7.0, 12.0)]
+    with pytest.raises(ValueError):
+        data_manager.update_item_prices(1, cost_price=-1)
+
+
+def test_sales_keep_the_cost_at_sale_time(data_manager):
+    data_manager.add_sale(1, 1, 10.0)
+    data_manager.update_item_prices(1, cost_price=8.0)
+    data_manager.add_sale(1, 1, 10.0)
+    row, = data_manager.get_margin_breakdown(datetime.now() - timedelta(days=1), datetime.now() + timedelta(hours=1))
+    assert row['profit'] == pytest.approx(4.0 + 2.0)
+    assert row['margin'] == pytest.approx(30.0)
+
+
+def test_erosion_query_does_not_raise_alerts(eroded):
+    findings = eroded.get_margin_erosion()
+    assert [finding['item_id'] for finding in findings] == [1]
+    assert findings[0]['baseline_margin'] == pytest.approx(40.0)
+    assert findings[0]['recent_margin'] == pytest.approx(10.0)
+    assert not [alert for alert in eroded.alerts if alert.type == 'margin_erosion']
+
+
+def test_erosion_check_raises_one_alert(eroded):
+    eroded.check_margin_erosion()
+    eroded.check_margin_erosion()
+    alerts = [alert for alert in eroded.alerts if alert.type == 'margin_erosion' and alert.active]
+    assert len(alerts) == 1
+    assert alerts[0].item_id == 1
@@ -0,0 +1,38 @@
+from datetime import datetime, timedelta
+
+from memory_usage import deep_sizeof, estimate_bytes
+from sales_store import SalesStore
+
+
+def test_estimate_extrapolates_from_a_sample():
+    records = [{'name': 'x' * 10, 'tags': [1, 2]} for _ in range(1000)]
+    estimate = estimate_bytes(records, len(records), sample=10)
+    assert estimate['count'] == 1000
+    assert estimate['bytes_per_record'] == deep_sizeof(records[0])
+    assert estimate['approx_bytes'] == estimate['bytes_per_record'] * 1000
+
+
+def test_sales_spill_under_the_budget(tmp_path, make_sale):
+    start = datetime(2026, 1, 1)
+    sales = [make_sale(start + timedelta(minutes=n)) for n in range(3000)]
+    per_sale = deep_sizeof(sales[0])
+    store = SalesStore(budget_bytes=per_sale * 500, spill_dir=str(tmp_path))
+    for sale in sales:
+        store.append(sale)
+
+    usage = store.usage()
+    assert usage['count'] == 3000
+    assert usage['resident_count'] <= 500
+    assert usage['spilled_count'] + usage['resident_count'] == 3000
+    assert [sale.id for sale in store] == [sale.id for sale in sales]
+    assert [sale.id for sale in store.recent(3)] == [3000, 2999, 2998]
+
+    window = list(store.iter_range((start + timedelta(minutes=100)).timestamp(),
+                                   (start + timedelta(minutes=110)).timestamp()))
+    assert [sale.id for sale in window] == list(range(101, 111))
+
+
+def test_memory_usage_lists_each_collection(data_manager):
+    usage = data_manager.get_memory_usage()
+    assert {'items', 'sales', 'inventory', 'alerts', 'stock_ledger'} <= set(usage)
+    assert usage['items']['count'] == 2
@@ -0,0 +1,65 @@
+import threading
+import time
+
+from flask import Flask, request
+
+from profiler import PROFILE_HEADER, ProfileStore, RequestSampler, collapsed, has_profile_token, install_profiler
+
+
+def _busy(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_sampler_collapses_stacks():
+    sampler = RequestSampler(threading.get_ident(), interval=0.001).start()
+    _busy(0.05)
+    sampler.stop()
+    assert sampler.samples > 0
+    assert any(stack.endswith('test_profiler:_busy') for stack in sampler.stacks)
+
+    store = ProfileStore(keep=2)
+    for path in ('/a', '/b', '/c'):
+        store.add('GET', path, 200, 'requested', sampler)
+    assert [profile['path'] for profile in store.list()] == ['/c', '/b']
+    assert 'stacks' not in store.list()[0]
+    assert collapsed(store.get(3)).splitlines()[0].rsplit(' ', 1)[1].isdigit()
+
+
+def test_install_is_a_no_op_without_token_or_rate():
+    app = Flask(__name__)
+    assert install_profiler(app) is None
+    assert not app.before_request_funcs
+
+
+def test_requests_with_the_token_are_profiled():
+    app = Flask(__name__)
+
+    @app.route('/slow')
+    def slow():
+        _busy(0.03)
+        return 'ok'
+
+    store = install_profiler(app, token='secret', interval=0.001)
+    client = app.test_client()
+    client.get('/slow')
+    client.get('/slow', headers={PROFILE_HEADER: 'wrong'})
+    client.get('/slow?profile=secret')
+
+    profiles = store.list()
+    assert len(profiles) == 1
+    assert profiles[0]['status'] == 200 and profiles[0]['trigger'] == 'requested'
+    assert any('slow' in stack for stack in store.get(profiles[0]['id'])['stacks'])
+
+
+def test_profile_token_check():
+    app = Flask(__name__)
+    with app.test_request_context('/', headers={PROFILE_HEADER: 'secret'}):
+        assert has_profile_token(request, 'secret')
+        assert not has_profile_token(request, 'other')
+    with app.test_request_context('/?profile=secret'):
+        assert has_profile_token(request, 'secret')
+    with app.test_request_context('/'):
+        assert not has_profile_token(request, '')  # No token configured: nobody may read profiles
+        assert not has_profile_token(request, 'secret')
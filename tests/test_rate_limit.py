@@ -0,0 +1,46 @@
+import pytest
+
+import rate_limit
+from rate_limit import RateLimiter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rate_limit.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_burst_then_rejects_with_retry_after(clock):
+    limiter = RateLimiter(rate=2, burst=3)
+    assert [limiter.check('a') for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert limiter.check('a') == pytest.approx(0.5)
+    assert limiter.rejected == 1
+
+
+def test_tokens_refill_up_to_burst(clock):
+    limiter = RateLimiter(rate=2, burst=3)
+    for _ in range(3):
+        limiter.check('a')
+    clock[0] += 0.5
+    assert limiter.check('a') == 0.0
+    assert limiter.check('a') > 0
+    clock[0] += 60
+    assert [limiter.check('a') for _ in range(4)][-1] > 0  # Refilled to the burst, not beyond
+
+
+def test_clients_are_limited_separately(clock):
+    limiter = RateLimiter(rate=1, burst=1)
+    assert limiter.check('10.0.0.1') == 0.0
+    assert limiter.check('10.0.0.1') > 0
+    assert limiter.check('10.0.0.2') == 0.0
+
+
+def test_least_recently_seen_clients_are_forgotten(clock):
+    limiter = RateLimiter(rate=1, burst=1, max_clients=2)
+    limiter.check('a')
+    limiter.check('b')
+    limiter.check('a')
+    limiter.check('c')
+    assert 'b' not in limiter._buckets
+    assert limiter.check('b') == 0.0  # Starts again with a full bucket
@@ -0,0 +1,37 @@
+import pytest
+
+from records import Alert, InventoryEntry, Item, Sale, to_timestamp
+
+
+def test_records_read_like_dicts():
+    sale = Sale(1, 2, 'Bread', 'Food', 3, 10.0, 30.0, 6.0, 12.0, 1767261600.0, 'cash')
+    assert sale['total_amount'] == 30.0
+    assert 'sale_date' in sale and 'nonsense' not in sale
+    assert sale.to_dict()['sale_date'] == sale.sale_date
+    assert list(sale) == list(Sale.fields)
+    assert dict(sale)['location'] == 'main'
+    with pytest.raises(KeyError):
+        sale['nonsense']
+
+
+def test_timestamps_round_trip_through_iso():
+    entry = InventoryEntry(5, 0.0)
+    entry['last_updated'] = '2026-01-01T10:00:00'
+    assert entry.updated_ts == to_timestamp('2026-01-01T10:00:00')
+    assert entry['last_updated'] == '2026-01-01T10:00:00'
+
+
+def test_rows_round_trip():
+    item = Item(1, 'Bread', 'Food', 6.0, 10.0, 1767261600.0)
+    alert = Alert(1, 'low_stock', 1, 'Bread', 'Low', 1767261600.0)
+    assert Item.from_row(item.to_row()).to_dict() == item.to_dict()
+    assert Alert.from_row(alert.to_row()).to_dict() == alert.to_dict()
+    # Rows written before the location slot existed still load
+    assert Sale.from_row([1, 2, 'Bread', 'Food', 1, 10.0, 10.0, 6.0, 4.0, 1767261600.0, '']).location == 'main'
+
+
+def test_records_have_no_instance_dict():
+    item = Item(1, 'Bread', 'Food', 6.0, 10.0, 0.0)
+    assert not hasattr(item, '__dict__')
+    with pytest.raises(AttributeError):
+        item.colour = 'brown'
@@ -0,0 +1,113 @@
+import json
+
+import pytest
+
+from data_manager import DataManager
+from replication import MutationLog, ReplicaTailer
+
+
+@pytest.fixture
+def primary(tmp_path, monkeypatch):
+    monkeypatch.delenv('DAY_CLOSE_FILE', raising=False)
+    manager = DataManager()
+    manager.mutation_log = MutationLog(str(tmp_path / 'mutations.log'))
+    manager.setup_business('Test Shop', 'retail')
+    manager.add_item('Bread', 'Food', 6.0, 10.0, initial_stock=100)
+    return manager
+
+
+@pytest.fixture
+def replica(primary):
+    return ReplicaTailer(DataManager(), primary.mutation_log.path)
+
+
+def _append_raw(primary, text):
+    log = primary.mutation_log
+    with log._lock:
+        log._file.write(text)
+        log._file.flush()
+
+
+def test_replica_follows_primary(primary, replica):
+    primary.add_sale(1, 3, 10.0)
+    replica.poll()
+    assert len(replica.data_manager.sales) == 1
+    assert replica.data_manager.get_item_by_id(1).name == 'Bread'
+    assert replica.applied_seq == primary.mutation_log.seq - 1
+    assert replica.poll() == 0
+
+
+def test_replica_feeds_anomaly_statistics(primary, replica):
+    for _ in range(3):
+        primary.add_sale(1, 1, 10.0)
+    replica.poll()
+    assert replica.data_manager.anomalies.item_stats(1) == primary.anomalies.item_stats(1)
+
+
+def test_corrupt_entry_is_quarantined_and_later_entries_applied(primary, replica):
+    primary.add_sale(1, 1, 10.0)
+    _append_raw(primary, '{"seq": 99, "kind": "sal\n')
+    primary.add_sale(1, 2, 10.0)
+    replica.poll()
+    assert [sale.quantity for sale in replica.data_manager.sales] == [1, 2]
+    assert replica.skipped == 1
+    assert 'JSONDecodeError' in replica.status()['quarantine'][0]['error']
+
+
+def test_failing_entry_is_not_applied_twice(primary, replica, monkeypatch):
+    primary.add_sale(1, 1, 10.0)
+    primary.add_sale(1, 2, 10.0)
+    apply_mutation = replica.data_manager.apply_mutation
+
+    def fail_on_second_sale(kind, payload):
+        if kind == 'sales' and payload['rows'][0][4] == 2:
+            raise RuntimeError('disk full')
+        apply_mutation(kind, payload)
+
+    monkeypatch.setattr(replica.data_manager, 'apply_mutation', fail_on_second_sale)
+    replica.poll()
+    monkeypatch.setattr(replica.data_manager, 'apply_mutation', apply_mutation)
+    primary.add_sale(1, 3, 10.0)
+    replica.poll()
+    assert [sale.quantity for sale in replica.data_manager.sales] == [1, 3]
+    assert replica.skipped == 1
+
+
+def test_partial_last_line_waits_for_the_rest(primary, replica):
+    entry = json.dumps({'seq': primary.mutation_log.seq, 'ts': 0, 'kind': 'settings',
+                        'payload': {'anomaly_threshold': 9.0}})
+    _append_raw(primary, entry[:10])
+    replica.poll()
+    offset = replica._offset
+    _append_raw(primary, entry[10:] + '\n')
+    replica.poll()
+    assert replica._offset > offset
+    assert replica.data_manager.settings['anomaly_threshold'] == 9.0
+    assert replica.skipped == 0
+
+
+def test_restarted_primary_detected_past_old_offset(primary, replica):
+    primary.add_sale(1, 1, 10.0)
+    replica.poll()
+    old_epoch = replica.epoch
+    primary.mutation_log._file.close()
+
+    restarted = DataManager()
+    restarted.mutation_log = MutationLog(primary.mutation_log.path)
+    restarted.setup_business('Other Shop', 'retail')
+    restarted.add_item('Tea', 'Drinks', 1.0, 2.0, initial_stock=500)
+    for _ in range(20):
+        restarted.add_sale(1, 1, 2.0)  # Longer than the old log by now
+    replica.poll()
+
+    assert replica.epoch != old_epoch
+    assert replica.data_manager.get_item_by_id(1).name == 'Tea'
+    assert len(replica.data_manager.sales) == 20
+
+
+def test_second_writer_is_refused(primary):
+    with pytest.raises(RuntimeError, match='single worker'):
+        MutationLog(primary.mutation_log.path)
+    # The first writer's log was not truncated
+    with open(primary.mutation_log.path, encoding='utf-8') as f:
+        assert sum(1 for _ in f) == primary.mutation_log.seq
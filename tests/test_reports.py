@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta
+
+from records import Sale
+from sales_rollups import day_bounds, hour_bounds
+
+
+def test_hour_bounds():
+    start, end = hour_bounds(datetime(2026, 3, 1, 9, 40), datetime(2026, 3, 2, 17, 5))
+    assert (start, end) == (datetime(2026, 3, 1, 9), datetime(2026, 3, 2, 18))
+    assert hour_bounds(start, end) == (start, end)
+
+
+def test_day_bounds():
+    start, end = day_bounds(datetime(2026, 3, 1, 9, 40), datetime(2026, 3, 2, 17, 5))
+    assert (start, end) == (datetime(2026, 3, 1), datetime(2026, 3, 3))
+    assert day_bounds(start, end) == (start, end)
+
+
+def test_ledger_and_summary_cover_the_same_sales(data_manager):
+    now = datetime.now()
+    data_manager.add_sale(1, 2, 10.0)
+    data_manager.add_sale(2, 1, 5.0)
+    # A range ending mid-hour: the rollups count the whole hour, so the ledger must too
+    start, end = hour_bounds(now - timedelta(days=1), now - timedelta(seconds=1))
+    summary = data_manager.rollups.aggregate(start, end)
+    ledger = list(data_manager.iter_sales(start, end))
+    assert summary['sales'] == len(ledger) == 2
+    assert summary['revenue'] == sum(sale.total_amount for sale in ledger)
+
+
+def test_full_report_streams_the_ledger(tmp_path, make_sale):
+    import pdf_reports
+    from sales_rollups import SalesRollups
+
+    start = datetime(2026, 1, 1)
+    rollups = SalesRollups()
+    sales = [make_sale(start + timedelta(minutes=10 * n)) for n in range(500)]
+    for sale in sales:
+        rollups.record_sale(sale)
+    consumed = []
+
+    def ledger():
+        for sale in sales:
+            consumed.append(sale.id)
+            yield Sale.from_row(sale.to_row())
+
+    path = str(tmp_path / 'report.pdf')
+    pdf_reports.build_full_report(path, rollups.aggregate(start, start + timedelta(days=7)), ledger(), 'K',
+                                  start, start + timedelta(days=7), chunk_rows=50)
+    with open(path, 'rb') as f:
+        assert f.read(4) == b'%PDF'
+    assert len(consumed) == 500
@@ -0,0 +1,99 @@
+import os
+
+import pytest
+
+import sales_importer
+from data_manager import DataManager
+from sales_importer import SalesImporter, map_columns, parse_chunk
+
+CSV_HEADER = 'Date,Item,Quantity,Unit Price,Notes\n'
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / 'history.csv'
+    rows = [f"0{day % 9 + 1}/01/2025 10:00,{'Bread' if day % 2 else 'milk'},{day % 3 + 1},K1{day % 5}.50,\n"
+            for day in range(25)]
+    rows.insert(3, '05/01/2025,Cheese,1,10,\n')  # Unknown item
+    rows.insert(7, 'not a date,Bread,1,10,\n')
+    path.write_text(CSV_HEADER + ''.join(rows))
+    return str(path)
+
+
+def test_map_columns_accepts_aliases():
+    assert map_columns(['Sale Date', 'Product', 'Qty', 'Total']) == {'date': 0, 'item': 1, 'quantity': 2, 'total': 3}
+    with pytest.raises(ValueError, match='quantity'):
+        map_columns(['date', 'item', 'price'])
+
+
+def test_parse_chunk_reports_bad_rows():
+    columns = map_columns(['date', 'item', 'quantity', 'total'])
+    parsed, errors = parse_chunk([['2025-01-02', 'Bread', '2', '1,200.00'], ['2025-01-02', 'Bread', '0', '5'],
+                                  ['', '', '', '']], columns, first_row=2)
+    assert parsed[0]['unit_price'] == 600.0
+    assert parsed[0]['item_name'] == 'bread'
+    assert errors == ['Row 3: Quantity must be positive']
+
+
+def test_import_and_resume(data_manager, csv_path, tmp_path, monkeypatch):
+    checkpoint = str(tmp_path / 'checkpoint.json')
+    importer = SalesImporter(data_manager, workers=1, chunk_size=10, checkpoint_path=checkpoint)
+
+    original = data_manager.import_sales
+    calls = []
+
+    def failing_import(records):
+        calls.append(len(records))
+        if len(calls) == 2:
+            raise RuntimeError('interrupted')
+        return original(records)
+
+    monkeypatch.setattr(data_manager, 'import_sales', failing_import)
+    with pytest.raises(RuntimeError):
+        importer.import_file(csv_path)
+    monkeypatch.setattr(data_manager, 'import_sales', original)
+    assert len(data_manager.sales) == 8
+
+    result = importer.import_file(csv_path)
+    assert result['resumed_from'] == 10
+    assert result['imported'] == 25
+    assert result['error_count'] == 2
+    assert len(data_manager.sales) == 25
+
+    # Finished: running the same file again imports nothing twice
+    again = importer.import_file(csv_path)
+    assert again['imported'] == 25 and len(data_manager.sales) == 25
+
+
+def test_checkpoint_is_void_for_another_store(data_manager, csv_path, tmp_path):
+    checkpoint = str(tmp_path / 'checkpoint.json')
+    SalesImporter(data_manager, workers=1, checkpoint_path=checkpoint).import_file(csv_path)
+
+    restarted = DataManager()
+    restarted.add_item('Bread', 'Food', 6.0, 10.0)
+    restarted.add_item('Milk', 'Drinks', 3.0, 5.0)
+    result = SalesImporter(restarted, workers=1, checkpoint_path=checkpoint).import_file(csv_path)
+    assert result['resumed_from'] == 0
+    assert len(restarted.sales) == 25
+
+
+def test_cli_writes_no_checkpoint(csv_path, capsys):
+    sales_importer.main([csv_path, '--workers', '1'])
+    assert not os.path.exists(f"{csv_path}.import.json")
+    assert 'rows read' in capsys.readouterr().out
+
+
+def test_parallel_import_uses_spawned_workers(data_manager, csv_path, monkeypatch):
+    monkeypatch.setattr(sales_importer, 'PARALLEL_THRESHOLD_BYTES', 0)
+    contexts = []
+    pool = sales_importer.ProcessPoolExecutor
+
+    def recording_pool(*args, **kwargs):
+        contexts.append(kwargs['mp_context'].get_start_method())
+        return pool(*args, **kwargs)
+
+    monkeypatch.setattr(sales_importer, 'ProcessPoolExecutor', recording_pool)
+    result = SalesImporter(data_manager, workers=2, chunk_size=10).import_file(csv_path)
+    assert contexts == ['spawn']
+    assert result['imported'] == 25
+    assert len(data_manager.sales) == 25
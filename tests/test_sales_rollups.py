@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from sales_rollups import MAX_PERIODS, SalesRollups, sales_analytics
+
+
+@pytest.fixture
+def rollups(make_sale):
+    rollups = SalesRollups()
+    for day in range(1, 32):
+        for hour in (9, 15):
+            rollups.record_sale(make_sale(datetime(2026, 1, day, hour, 30), quantity=2))
+    rollups.record_sale(make_sale(datetime(2026, 2, 1, 10), item_id=2, item_name='Milk', category='Drinks',
+                                  unit_price=5.0, cost_price=3.0))
+    return rollups
+
+
+def test_aggregate_matches_sales_in_range(rollups):
+    totals = rollups.aggregate(datetime(2026, 1, 1), datetime(2026, 2, 1))
+    assert totals['sales'] == 62
+    assert totals['quantity'] == 124
+    assert totals['revenue'] == pytest.approx(1240.0)
+    assert set(totals['items']) == {1}
+    assert totals['categories']['Food']['sales'] == 62
+
+
+def test_ragged_edges_use_hours(rollups):
+    totals = rollups.aggregate(datetime(2026, 1, 5, 12), datetime(2026, 1, 7, 10))
+    # 5th at 15:00, all of the 6th, the 7th at 09:00
+    assert totals['sales'] == 4
+
+
+def test_periods_and_series(rollups):
+    periods = rollups.periods(datetime(2026, 1, 30), datetime(2026, 2, 2), 'day')
+    assert [label for label, _ in periods] == ['2026-01-30', '2026-01-31', '2026-02-01']
+    assert [bucket['sales'] for _, bucket in periods] == [2, 2, 1]
+
+    series = rollups.series(datetime(2026, 1, 1), datetime(2026, 3, 1), 'month', metric='sales',
+                            group_by='category')
+    assert series['labels'] == ['2026-01', '2026-02']
+    assert {entry['key']: entry['data'] for entry in series['series']} == {'Food': [62, 0], 'Drinks': [0, 1]}
+
+
+def test_periods_are_capped(rollups):
+    start = datetime(2024, 1, 1)
+    with pytest.raises(ValueError, match='more than'):
+        rollups.periods(start, start + timedelta(hours=MAX_PERIODS + 1), 'hour')
+    assert len(rollups.periods(start, start + timedelta(hours=MAX_PERIODS), 'hour')) == MAX_PERIODS
+    # The same range by month is fine
+    assert len(rollups.periods(start, start + timedelta(hours=MAX_PERIODS + 1), 'month')) == 3
+
+
+def test_window_gives_the_same_analytics(rollups):
+    start, end = datetime(2026, 1, 10, 12), datetime(2026, 2, 1, 12)
+    assert sales_analytics(rollups.window(start, end), start, end) == sales_analytics(rollups, start, end)
@@ -0,0 +1,73 @@
+import random
+import threading
+from datetime import datetime, timedelta
+
+from sales_rollups import floor_day
+from sales_sketches import CountMinSketch, SalesSketches, SpaceSaving, TDigest
+
+
+def test_count_min_never_undercounts():
+    sketch = CountMinSketch(width=16)
+    truth = {}
+    rng = random.Random(1)
+    for _ in range(500):
+        key, value = rng.randrange(100), rng.random()
+        sketch.add(key, value)
+        truth[key] = truth.get(key, 0) + value
+    assert all(sketch.estimate(key) >= total - 1e-9 for key, total in truth.items())
+
+
+def test_space_saving_finds_heavy_hitters():
+    counter = SpaceSaving(capacity=5)
+    for key in range(50):
+        counter.add(key, 1.0)
+    counter.add('heavy', 100.0)
+    assert counter.top(1)[0][0] == 'heavy'
+
+
+def test_tdigest_quantiles():
+    digest = TDigest()
+    for value in range(1, 1001):
+        digest.add(float(value))
+    assert abs(digest.quantile(0.5) - 500) < 15
+    assert abs(digest.quantile(0.99) - 990) < 5
+
+
+def test_summary_over_days(make_sale):
+    sketches = SalesSketches()
+    for day in (1, 2, 3):
+        sketches.record_sale(make_sale(datetime(2026, 3, day, 12), item_id=1, quantity=2))
+        sketches.record_sale(make_sale(datetime(2026, 3, day, 13), item_id=2, unit_price=1.0))
+    summary = sketches.summary(datetime(2026, 3, 2), datetime(2026, 3, 4))
+    assert summary['top_items'][0]['item_id'] == 1
+    assert summary['top_items'][0]['revenue'] == 40.0
+    assert summary['top_items'][0]['quantity'] >= 4
+
+
+def test_analytics_reads_sketches_under_the_store_lock(data_manager, monkeypatch):
+    data_manager.add_sale(1, 2, 10.0)
+    summary = data_manager.sketches.summary
+    held = []
+
+    def checked_summary(*args, **kwargs):
+        other = threading.Thread(target=lambda: held.append(not data_manager.lock.acquire(timeout=0)))
+        other.start()
+        other.join()
+        return summary(*args, **kwargs)
+
+    monkeypatch.setattr(data_manager.sketches, 'summary', checked_summary)
+    analytics = data_manager.get_sales_analytics(7, approximate=True)
+    data_manager.get_approximate_summary(datetime(2020, 1, 1), datetime.now())
+    assert held == [True, True]
+    assert analytics['approximate']
+    assert analytics['top_items'][0]['item_name'] == 'Bread'
+
+
+def test_approximate_totals_cover_the_sketched_days(data_manager, make_sale):
+    now = datetime.now()
+    data_manager._store_sale(make_sale(floor_day(now - timedelta(days=1)), unit_price=50.0))
+    data_manager.add_sale(1, 1, 10.0)
+    analytics = data_manager.get_sales_analytics(1, approximate=True)
+    assert sum(item['revenue'] for item in analytics['top_items']) <= analytics['total_revenue']
+    assert analytics['total_revenue'] == 60.0
+    assert analytics['error_bounds']['window']['start'] == floor_day(now - timedelta(days=1)).isoformat()
@@ -0,0 +1,89 @@
+import gc
+import os
+from datetime import datetime, timedelta
+
+import sales_store
+from sales_store import SalesStore
+
+
+def test_spill_evicts_the_oldest_sales_not_the_first_appended(tmp_path, make_sale):
+    store = SalesStore(budget_bytes=None, spill_dir=str(tmp_path))
+    recent = [make_sale(datetime(2026, 6, 1) + timedelta(minutes=n)) for n in range(100)]
+    imported = [make_sale(datetime(2024, 1, 1) + timedelta(days=n)) for n in range(100)]
+    for sale in recent + imported:
+        store.append(sale)
+
+    store.budget_bytes = 1
+    store._resident_capacity = lambda: 200  # Spill down to half
+    store.spill()
+
+    assert {sale.id for sale in store.resident} == {sale.id for sale in recent}
+    assert store.spilled_count == 100
+    assert len(list(store)) == 200
+
+
+def test_archive_prunes_segments_and_sums_partitions(tmp_path, make_sale):
+    store = SalesStore(spill_dir=str(tmp_path))
+    for month in (1, 2, 3):
+        for day in range(1, 11):
+            store.append(make_sale(datetime(2025, month, day, 12), quantity=month))
+    store.append(make_sale(datetime(2026, 1, 1)))
+    assert store.archive_before(datetime(2025, 12, 1).timestamp()) == 30
+
+    partitions = store.partitions()
+    assert [entry['partition'] for entry in partitions] == ['2025-01', '2025-02', '2025-03']
+    assert [entry['quantity'] for entry in partitions] == [10, 20, 30]
+
+    start, end = datetime(2025, 2, 1).timestamp(), datetime(2025, 3, 1).timestamp()
+    assert [segment['partition'] for segment in store._overlapping(start, end)] == ['2025-02']
+    assert len(list(store.iter_range(start, end))) == 10
+
+
+def test_segments_are_removed_with_the_store(tmp_path, make_sale):
+    store = SalesStore(spill_dir=str(tmp_path))
+    store.append(make_sale(datetime(2025, 1, 1)))
+    store.archive_before(datetime(2026, 1, 1).timestamp())
+    directory = store._archive_dir
+    assert os.path.dirname(directory) == str(tmp_path) and os.listdir(directory)
+
+    del store
+    gc.collect()
+    assert not os.path.exists(directory)
+
+
+def test_iterators_are_fixed_when_taken(tmp_path, make_sale):
+    store = SalesStore(spill_dir=str(tmp_path))
+    for day in range(1, 11):
+        store.append(make_sale(datetime(2025, 1, day)))
+    sales = iter(store)
+    window = store.iter_range(datetime(2025, 1, 1).timestamp(), datetime(2025, 2, 1).timestamp())
+
+    store.append(make_sale(datetime(2025, 1, 20)))
+    store.archive_before(datetime(2025, 2, 1).timestamp())
+
+    assert len(list(sales)) == 10
+    assert len(list(window)) == 10
+
+
+def test_newest_first_merges_segments_as_it_reaches_them(tmp_path, make_sale, monkeypatch):
+    store = SalesStore(spill_dir=str(tmp_path))
+    for month in (3, 1, 2):  # Imported history arrives out of order
+        for day in (20, 5, 12):
+            store.append(make_sale(datetime(2025, month, day)))
+    store.archive_before(datetime(2025, 3, 1).timestamp())
+    for day in (9, 2):
+        store.append(make_sale(datetime(2025, 2, day)))  # Resident, but older than some segments
+    store.append(make_sale(datetime(2025, 3, 25)))
+
+    expected = sorted((sale.sale_ts for sale in store), reverse=True)
+    read = []
+    read_segment = sales_store.read_segment
+    monkeypatch.setattr(sales_store, 'read_segment', lambda path: read.append(path) or read_segment(path))
+    sales = store.iter_newest()
+    newest = [next(sales) for _ in range(4)]
+    assert not read  # March is all resident
+    assert [sale.sale_ts for sale in newest + list(sales)] == expected
+    assert len(read) == 2
+
+    start, end = datetime(2025, 1, 10).timestamp(), datetime(2025, 2, 10).timestamp()
+    assert [datetime.fromtimestamp(sale.sale_ts).day for sale in store.iter_newest(start, end)] == [9, 5, 2, 20, 12]
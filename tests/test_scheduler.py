@@ -0,0 +1,100 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+import data_manager as data_manager_module
+from scheduler import JobScheduler
+
+
+def _lock_is_free(lock) -> bool:
+    """Whether another thread could take the lock right now"""
+    result = []
+
+    def probe():
+        acquired = lock.acquire(timeout=1)
+        if acquired:
+            lock.release()
+        result.append(acquired)
+
+    thread = threading.Thread(target=probe)
+    thread.start()
+    thread.join()
+    return result[0]
+
+
+def test_latest_publishes_and_recomputes_when_stale():
+    calls = []
+    scheduler = JobScheduler()
+    scheduler.every('count', 3600, lambda: calls.append(1) or len(calls))
+    assert scheduler.latest('count', max_age=60) == 1
+    assert scheduler.latest('count', max_age=60) == 1
+    assert scheduler.latest('count', max_age=0) == 2
+    assert scheduler.published_at('count') is not None
+
+
+def test_background_runs():
+    scheduler = JobScheduler(workers=1)
+    done = threading.Event()
+    scheduler.every('tick', 3600, done.set)
+    scheduler.start()
+    try:
+        assert done.wait(2)
+        deadline = time.time() + 2
+        while scheduler.jobs['tick'].last_run is None and time.time() < deadline:
+            time.sleep(0.01)
+        assert scheduler.status()[0]['last_error'] is None
+    finally:
+        scheduler.stop()
+
+
+def test_analytics_merge_runs_without_the_store_lock(data_manager, monkeypatch):
+    data_manager.add_sale(1, 1, 10.0)
+    merge = data_manager_module.sales_analytics
+    seen = []
+
+    def checked(*args, **kwargs):
+        seen.append(_lock_is_free(data_manager.lock))
+        return merge(*args, **kwargs)
+
+    monkeypatch.setattr(data_manager_module, 'sales_analytics', checked)
+    scheduler = JobScheduler()
+    scheduler.every('analytics_30d', 3600, lambda: data_manager.get_sales_analytics(30))
+    assert scheduler.latest('analytics_30d')['total_sales'] == 1
+    assert seen == [True]
+
+
+def test_archive_writes_segments_without_the_store_lock(data_manager, monkeypatch, tmp_path):
+    data_manager.sales.spill_dir = str(tmp_path)
+    data_manager.import_sales([{'item': data_manager.get_item_by_id(1), 'quantity': 1, 'unit_price': 10.0,
+                                'sale_date': (datetime.now() - timedelta(days=40 + n)).isoformat()}
+                               for n in range(5)])
+    data_manager.add_sale(1, 1, 10.0)
+    write = data_manager.sales.write_segments
+    seen = []
+
+    def checked(sales):
+        seen.append(_lock_is_free(data_manager.lock))
+        return write(sales)
+
+    monkeypatch.setattr(data_manager.sales, 'write_segments', checked)
+    assert data_manager.archive_old_sales(30) == 5
+    assert seen == [True]
+    assert len(data_manager.sales.resident) == 1 and len(data_manager.sales) == 6
+
+
+def test_archive_gives_way_to_a_concurrent_spill(tmp_path, make_sale):
+    from sales_store import SalesStore
+
+    store = SalesStore(spill_dir=str(tmp_path))
+    for n in range(10):
+        store.append(make_sale(datetime(2025, 1, 1) + timedelta(days=n)))
+    old = store.resident_before(datetime(2025, 1, 6).timestamp())
+    footers = store.write_segments(old)
+    # Meanwhile a spill archives two of the same sales
+    store._archive(store.resident[:2])
+    del store.resident[:2]
+
+    assert store.commit_archive(old, footers) == 0
+    assert len(list(store)) == 10
+    assert not any(os.path.exists(footer['path']) for footer in footers)
@@ -0,0 +1,95 @@
+import threading
+
+from search_suggestions import SuggestionCache
+
+NAMES = ['Rice', 'Rice Bran', 'Brown Rice', 'Bread', 'Rice Bags']
+
+
+def _scanner(names=NAMES):
+    calls = []
+
+    def scan(key):
+        calls.append(key)
+        return [(name.lower(), name) for name in names if key in name.lower()]
+
+    return scan, calls
+
+
+class _WatchedEvent(threading.Event):
+    """Event that reports when someone starts waiting on it"""
+
+    def __init__(self):
+        super().__init__()
+        self.waiting = threading.Event()
+
+    def wait(self, timeout=None):
+        self.waiting.set()
+        return super().wait(timeout)
+
+
+def test_longer_query_narrows_a_cached_prefix():
+    cache = SuggestionCache()
+    scan, calls = _scanner()
+    assert cache.lookup('Ri', 1, scan) == ['Rice', 'Rice Bran', 'Brown Rice', 'Rice Bags']
+    assert cache.lookup('rice b', 1, scan) == ['Rice Bran', 'Rice Bags']
+    assert cache.lookup(' RICE B ', 1, scan) == ['Rice Bran', 'Rice Bags']
+    assert calls == ['ri']
+    assert cache.stats()['narrowed'] == 1
+    assert cache.stats()['hits'] == 1
+
+
+def test_limit_applies_after_narrowing():
+    cache = SuggestionCache()
+    scan, _ = _scanner()
+    assert cache.lookup('ri', 1, scan, limit=1) == ['Rice']
+    assert cache.lookup('ric', 1, scan, limit=10) == ['Rice', 'Rice Bran', 'Brown Rice', 'Rice Bags']
+
+
+def test_new_catalog_version_drops_every_entry():
+    cache = SuggestionCache()
+    scan, calls = _scanner()
+    cache.lookup('ri', 1, scan)
+    renamed, renamed_calls = _scanner(['Rice', 'Wild Rice'])
+    assert cache.lookup('ric', 2, renamed) == ['Rice', 'Wild Rice']
+    assert renamed_calls == ['ric']
+    assert cache.stats()['entries'] == 1
+    assert cache.stats()['version'] == 2
+
+
+def test_lru_keeps_the_newest_queries():
+    cache = SuggestionCache(max_entries=2)
+    scan, calls = _scanner()
+    for query in ['br', 'ri', 'ba']:
+        cache.lookup(query, 1, scan)
+    cache.lookup('br', 1, scan)
+    assert calls == ['br', 'ri', 'ba', 'br']
+
+
+def test_concurrent_requests_share_one_scan():
+    cache = SuggestionCache()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow_scan(key):
+        calls.append(key)
+        started.set()
+        release.wait(5)
+        return [(name.lower(), name) for name in NAMES if key in name.lower()]
+
+    results = []
+    first = threading.Thread(target=lambda: results.append(cache.lookup('ri', 1, slow_scan)))
+    first.start()
+    assert started.wait(5)
+    watched = cache._inflight['ri'] = _WatchedEvent()
+    second = threading.Thread(target=lambda: results.append(cache.lookup('ri', 1, slow_scan)))
+    second.start()
+    assert watched.waiting.wait(5)
+
+    release.set()
+    first.join(5)
+    watched.set()  # The first request set the event it created, not this stand-in
+    second.join(5)
+    assert calls == ['ri']
+    assert results[0] == results[1]
+    assert cache.stats()['scans'] == 1
+    assert cache.stats()['hits'] == 1
@@ -0,0 +1,71 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from stock_ledger import StockLedger
+
+
+def _fill(ledger, count=137):
+    generator = random.Random(7)
+    start = datetime(2026, 1, 1)
+    dates = []
+    for n in range(count):
+        date = (start + timedelta(hours=n)).isoformat()
+        dates.append(date)
+        change = generator.randint(-3, 10)
+        ledger.record(generator.randint(1, 4), change, 'receipt' if change > 0 else 'sale', date=date,
+                      location=generator.choice(['main', 'north']))
+    return dates
+
+
+@pytest.fixture
+def ledgers(tmp_path):
+    compacted = StockLedger(checkpoint_interval=10, hot_checkpoints=2, spill_dir=str(tmp_path))
+    reference = StockLedger(checkpoint_interval=10, hot_checkpoints=1000)
+    dates = _fill(compacted)
+    _fill(reference)
+    return compacted, reference, dates
+
+
+def test_adjustments_need_a_reason():
+    ledger = StockLedger()
+    with pytest.raises(ValueError):
+        ledger.record(1, -1, 'adjustment')
+    ledger.record(1, 5, 'receipt')
+    ledger.record(1, -2, 'adjustment', reason='damage')
+    assert ledger.balance(1) == 3
+
+
+def test_old_movements_leave_memory(ledgers):
+    compacted, reference, _ = ledgers
+    assert len(compacted) == len(reference) == 137
+    assert len(compacted.movements) <= 30
+    usage = compacted.usage()
+    assert usage['archived_count'] + usage['resident_count'] == 137
+    assert usage['segments'] == usage['archived_count'] // 10
+    assert all(position >= compacted.archived_count
+               for positions in compacted._item_positions.values() for position in positions)
+
+
+def test_compacted_ledger_answers_like_the_full_one(ledgers):
+    compacted, reference, dates = ledgers
+    assert compacted.history() == reference.history()
+    assert compacted.history(limit=50) == reference.history(limit=50)
+    for item_id in (1, 2, 3, 4):
+        assert compacted.history(item_id) == reference.history(item_id)
+        assert compacted.history(item_id, limit=25, location='north') == \
+            reference.history(item_id, limit=25, location='north')
+    assert compacted.history(location='main', limit=40) == reference.history(location='main', limit=40)
+
+    for date in dates[::7] + ['2025-12-31T00:00:00']:
+        assert compacted.balances_at(date) == reference.balances_at(date)
+        for item_id in (1, 2, 3, 4):
+            assert compacted.item_balance_at(item_id, date) == reference.item_balance_at(item_id, date)
+
+
+def test_ledger_is_counted_in_memory_usage(data_manager):
+    data_manager.add_sale(1, 2, 10.0)
+    usage = data_manager.get_memory_usage()['stock_ledger']
+    assert usage['count'] == 3  # Two opening balances and the sale
+    assert usage['approx_bytes'] > 0
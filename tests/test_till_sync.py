@@ -0,0 +1,85 @@
+import till_sync
+from till_sync import TillState
+
+
+def _sale(seq, client_id=None, item_id=1, quantity=1, sale_price=10.0):
+    return {'seq': seq, 'client_id': client_id or f"c{seq}", 'item_id': item_id, 'quantity': quantity,
+            'sale_price': sale_price}
+
+
+def _statuses(result):
+    return [entry['status'] for entry in result['results']]
+
+
+def test_resent_batch_is_reported_as_duplicates(data_manager):
+    first = data_manager.sync_till('till-1', [_sale(1), _sale(2)])
+    again = data_manager.sync_till('till-1', [_sale(1), _sale(2)])
+    assert _statuses(again) == ['duplicate', 'duplicate']
+    assert [entry['sale_id'] for entry in again['results']] == [entry['sale_id'] for entry in first['results']]
+    assert len(data_manager.sales) == 2
+    assert again['acked_seq'] == 2
+
+
+def test_reused_seq_with_other_client_id_is_rejected(data_manager):
+    data_manager.sync_till('till-1', [_sale(1)])
+    result = data_manager.sync_till('till-1', [_sale(1, client_id='other')])
+    assert _statuses(result) == ['rejected']
+    assert 'already used' in result['results'][0]['message']
+    assert len(data_manager.sales) == 1
+
+
+def test_out_of_order_sales_wait_for_the_gap(data_manager):
+    assert data_manager.sync_till('till-1', [_sale(2)])['acked_seq'] == 0
+    assert data_manager.sync_till('till-1', [_sale(1)])['acked_seq'] == 2
+
+
+def test_invalid_sale_is_acknowledged_and_rejected_again(data_manager):
+    result = data_manager.sync_till('till-1', [_sale(1, quantity=0), _sale(2)])
+    assert sorted(_statuses(result)) == ['applied', 'rejected']
+    assert result['acked_seq'] == 2
+
+    again = data_manager.sync_till('till-1', [_sale(1, quantity=0)])
+    assert _statuses(again) == ['rejected']
+    assert len(data_manager.sales) == 1
+
+
+def test_unknown_item_is_acknowledged(data_manager):
+    result = data_manager.sync_till('till-1', [_sale(1, item_id=99), _sale(2)])
+    assert result['acked_seq'] == 2
+    assert result['results'][0]['message'] == 'Item not found'
+
+
+def test_non_object_sales_are_rejected(data_manager):
+    result = data_manager.sync_till('till-1', ['oops', 7, None, _sale(1)])
+    assert _statuses(result) == ['rejected', 'rejected', 'rejected', 'applied']
+    assert result['results'][0]['message'] == 'Each sale must be an object'
+
+
+def test_oversold_sale_is_applied_as_conflict(data_manager):
+    result = data_manager.sync_till('till-1', [_sale(1, quantity=150)])
+    assert _statuses(result) == ['applied']
+    assert result['conflicts'][0]['type'] == 'oversold'
+
+
+def test_settled_window_is_bounded(monkeypatch):
+    monkeypatch.setattr(till_sync, 'ACKED_KEEP', 3)
+    state = TillState()
+    for seq in range(1, 11):
+        state.record(seq, f"c{seq}", seq)
+    assert state.acked_seq == 10
+    assert list(state.acked) == [8, 9, 10]
+    assert state.find(9, 'c9')['sale_id'] == 9
+    assert state.find(2, 'anything')['sale_id'] is None  # Too old to check the client id
+    assert state.find(11, 'c11') is None
+
+
+def test_out_of_order_backlog_is_capped(data_manager, monkeypatch):
+    monkeypatch.setattr(till_sync, 'MAX_PENDING', 2)
+    result = data_manager.sync_till('till-1', [_sale(2), _sale(3), _sale(4)])
+    assert _statuses(result) == ['applied', 'applied', 'rejected']
+    assert 'send that one first' in result['results'][2]['message']
+    assert len(data_manager.tills['till-1'].pending) == 2
+
+    result = data_manager.sync_till('till-1', [_sale(1), _sale(4)])
+    assert _statuses(result) == ['applied', 'applied']
+    assert result['acked_seq'] == 4
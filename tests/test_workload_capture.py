@@ -0,0 +1,125 @@
+import threading
+
+import pytest
+from flask import Flask
+
+from data_manager import DataManager
+from replay import captured_latencies, compare, main, replay
+from workload_capture import WorkloadRecorder, capture_data_manager, capture_requests, read_workload
+
+
+@pytest.fixture
+def captured(tmp_path, monkeypatch):
+    """A store recording its calls from empty, as WORKLOAD_CAPTURE does at startup"""
+    monkeypatch.delenv('DAY_CLOSE_FILE', raising=False)
+    recorder = WorkloadRecorder(str(tmp_path / 'workload.log'))
+    manager = DataManager()
+    capture_data_manager(manager, recorder)
+    manager.setup_business('Test Shop', 'retail')
+    manager.add_item('Bread', 'Food', 6.0, 10.0, initial_stock=5)
+    manager.add_sale(1, 2, 10.0)
+    with pytest.raises(ValueError):
+        manager.add_sale(1, 50, 10.0)
+    return manager, recorder
+
+
+def test_top_level_calls_are_recorded_once(captured):
+    manager, recorder = captured
+    entries = list(read_workload(recorder.path))
+    assert entries[0]['op'] == 'start'
+    assert [entry['name'] for entry in entries[1:]] == ['setup_business', 'add_item', 'add_sale', 'add_sale']
+    assert entries[-1]['error'].startswith('ValueError')
+    assert recorder.status()['entries'] == 5
+
+
+def test_calls_are_recorded_under_the_store_lock(tmp_path, data_manager):
+    recorder = WorkloadRecorder(str(tmp_path / 'workload.log'))
+    call = recorder.call
+    held = []
+
+    def try_lock():
+        acquired = data_manager.lock.acquire(timeout=0)
+        held.append(not acquired)
+        if acquired:
+            data_manager.lock.release()
+
+    def checked_call(*args):
+        other = threading.Thread(target=try_lock)
+        other.start()
+        other.join()
+        call(*args)
+
+    recorder.call = checked_call
+    capture_data_manager(data_manager, recorder)
+    data_manager.add_sale(1, 1, 10.0)
+    with pytest.raises(ValueError):
+        data_manager.add_sale(1, 500, 10.0)
+    assert held == [True, True]
+
+
+def test_partial_last_line_is_ignored(captured):
+    _, recorder = captured
+    with open(recorder.path, 'a', encoding='utf-8') as f:
+        f.write('{"op": "call", "na')
+    assert len(list(read_workload(recorder.path))) == 5
+
+
+def test_items_are_captured_by_id(tmp_path, data_manager):
+    recorder = WorkloadRecorder(str(tmp_path / 'workload.log'))
+    capture_data_manager(data_manager, recorder)
+    data_manager.import_sales([{'item': data_manager.get_item_by_id(2), 'quantity': 1, 'unit_price': 5.0,
+                                'sale_date': '2026-03-02T10:00:00', 'notes': ''}])
+    entry = list(read_workload(recorder.path))[-1]
+    assert entry['args'][0][0]['item'] == {'$item': 2}
+
+
+def test_replay_rebuilds_the_store(captured):
+    manager, recorder = captured
+    fresh = DataManager()
+    latencies, divergences = replay(recorder.path, Flask(__name__), fresh)
+    assert divergences == []
+    assert len(latencies['add_sale']) == 2
+    assert [sale.quantity for sale in fresh.sales] == [2]
+    assert fresh.inventory[1].quantity == manager.inventory[1].quantity
+
+
+def test_replay_reports_divergences(captured):
+    _, recorder = captured
+    fresh = DataManager()
+    fresh.setup_business('Test Shop', 'retail')
+    fresh.add_item('Bread', 'Food', 6.0, 10.0, initial_stock=500)
+    _, divergences = replay(recorder.path, Flask(__name__), fresh)
+    assert [entry['operation'] for entry in divergences] == ['add_sale']
+    assert divergences[0]['replayed'] is None
+
+
+def test_read_requests_are_captured(tmp_path):
+    app = Flask(__name__)
+    app.add_url_rule('/items/<int:item_id>', 'item', lambda item_id: str(item_id))
+    recorder = WorkloadRecorder(str(tmp_path / 'workload.log'))
+    capture_requests(app, recorder)
+    app.test_client().get('/items/3?full=1')
+    app.test_client().post('/items/3')
+    entries = [entry for entry in read_workload(recorder.path) if entry['op'] == 'get']
+    assert [(entry['path'], entry['route'], entry['status']) for entry in entries] == [
+        ('/items/3?full=1', '/items/<int:item_id>', 200)]
+    assert list(captured_latencies(recorder.path)) == ['GET /items/<int:item_id>']
+
+
+def test_compare_flags_only_real_slowdowns():
+    baseline = {'fast': [0.0001] * 10, 'slow': [0.010] * 10}
+    current = {'fast': [0.0003] * 10, 'slow': [0.020] * 10}
+    rows = {row['operation']: row for row in compare(baseline, current)}
+    assert not rows['fast']['regression']  # 3x, but well under a millisecond
+    assert rows['slow']['regression']
+    assert rows['slow']['ratio'] == pytest.approx(2.0)
+
+
+def test_replay_command_rebuilds_the_app_store(captured, monkeypatch, capsys):
+    _, recorder = captured
+    monkeypatch.setenv('BACKGROUND_JOBS', '0')
+    monkeypatch.setenv('BUILD_ASSETS', '0')
+    main([recorder.path, '--min-ms', '1000'])
+    from data_manager import data_manager
+    assert [sale.quantity for sale in data_manager.sales] == [2]
+    assert 'replay vs captured timings' in capsys.readouterr().out
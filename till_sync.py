@@ -0,0 +1,109 @@
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+# Most sales accepted in one sync request
+MAX_BATCH = 1000
+
+# Acknowledged sales per till whose client id is kept to check resends against
+ACKED_KEEP = 10000
+
+# Out-of-order sales per till held until the gap before them closes; past this, only the gap is accepted
+MAX_PENDING = 10000
+
+
+class TillState:
+    """What the server has applied from one till.
+
+    Tills number their sales with an increasing sequence. Everything up to
+    `acked_seq` has been settled, applied or rejected; sales above it that
+    arrived out of order are remembered until the gap closes. A resend is
+    recognised by its (seq, client id) pair, checked against the newest
+    ACKED_KEEP settled sales rather than every id a till has ever sent.
+    """
+
+    def __init__(self):
+        self.acked_seq = 0
+        self.pending: Dict[int, Dict[str, Any]] = {}  # seq -> {'client_id', 'sale_id', 'message'}
+        self.acked: 'OrderedDict[int, Dict[str, Any]]' = OrderedDict()
+        self.last_sync: Optional[str] = None
+
+    def find(self, seq: int, client_id: str) -> Optional[Dict[str, Any]]:
+        """Get the earlier result for a resent sale, or None if it is new.
+
+        Raises ValueError if the till already used `seq` for a different sale.
+        """
+        entry = self.pending.get(seq) or self.acked.get(seq)
+        if entry is None:
+            if seq <= self.acked_seq:
+                return {'client_id': client_id, 'sale_id': None}  # Settled too long ago to check
+            return None
+        if entry['client_id'] != client_id:
+            raise ValueError(f"seq {seq} was already used by sale {entry['client_id']}")
+        return entry
+
+    def check_room(self, seq: int):
+        """Raise ValueError if a new out-of-order sale would grow `pending` past MAX_PENDING"""
+        if seq > self.acked_seq + 1 and len(self.pending) >= MAX_PENDING:
+            raise ValueError(f"Too many sales waiting for seq {self.acked_seq + 1}; send that one first")
+
+    def record(self, seq: int, client_id: str, sale_id: Optional[int], message: Optional[str] = None):
+        """Settle a sale; rejected ones (sale_id None) count too, so they do not hold up acked_seq"""
+        self.pending[seq] = {'client_id': client_id, 'sale_id': sale_id, 'message': message}
+        while self.acked_seq + 1 in self.pending:
+            self.acked_seq += 1
+            self.acked[self.acked_seq] = self.pending.pop(self.acked_seq)
+        while len(self.acked) > ACKED_KEEP:
+            self.acked.popitem(last=False)
+
+    def reject(self, seq: int, client_id: str, message: str):
+        """Settle a sale that failed validation, unless its seq is already settled or waiting"""
+        if seq > self.acked_seq and seq not in self.pending:
+            try:
+                self.check_room(seq)
+            except ValueError:
+                return  # Rejected again when resent
+            self.record(seq, client_id, None, message)
+
+
+def till_sale_key(raw: Any) -> Optional[Tuple[int, str]]:
+    """The (seq, client id) of a sale that failed validation, if it has usable ones"""
+    if not isinstance(raw, dict):
+        return None
+    client_id = str(raw.get('client_id') or '').strip()
+    try:
+        seq = int(raw.get('seq'))
+    except (TypeError, ValueError):
+        return None
+    return (seq, client_id) if client_id and seq > 0 else None
+
+
+def parse_till_sale(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate one sale delta from a till, raising ValueError for bad input"""
+    if not isinstance(raw, dict):
+        raise ValueError("Each sale must be an object")
+    client_id = str(raw.get('client_id') or '').strip()
+    if not client_id:
+        raise ValueError("client_id is required")
+    try:
+        seq = int(raw['seq'])
+        item_id = int(raw['item_id'])
+        quantity = int(raw['quantity'])
+        sale_price = float(raw['sale_price'])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("seq, item_id, quantity and sale_price are required numbers")
+    if seq <= 0:
+        raise ValueError("seq must be positive")
+    if quantity <= 0:
+        raise ValueError("Quantity must be positive")
+    if sale_price <= 0:
+        raise ValueError("Sale price must be positive")
+
+    return {
+        'client_id': client_id,
+        'seq': seq,
+        'item_id': item_id,
+        'quantity': quantity,
+        'sale_price': sale_price,
+        'sale_date': raw.get('sale_date'),
+        'notes': str(raw.get('notes') or '')
+    }
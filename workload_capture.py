@@ -0,0 +1,164 @@
+import functools
+import json
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional
+
+from records import Item, Record
+
+# DataManager methods that change state; replaying them in order from an empty store rebuilds it
+CAPTURED_METHODS = (
+    'setup_business', 'update_settings', 'add_item', 'update_item_prices', 'add_sale', 'import_sales',
+    'sync_till', 'update_inventory', 'transfer_stock', 'save_location', 'dismiss_alert', 'sweep_alerts',
+    'close_day', 'close_pending_days', 'archive_old_sales'
+)
+
+
+def _encode(value: Any) -> Any:
+    """JSON fallback for call arguments: items by id, other records by their dict view, dates as ISO strings"""
+    if isinstance(value, Item):
+        return {'$item': value.id}
+    if isinstance(value, Record):
+        return value.to_dict()
+    if isinstance(value, datetime):
+        return {'$datetime': value.isoformat()}
+    raise TypeError(f"Cannot capture argument of type {type(value).__name__}")
+
+
+def decode_argument(value: Any, data_manager) -> Any:
+    """Undo _encode against the store being replayed into"""
+    if isinstance(value, dict):
+        if '$item' in value:
+            return data_manager.get_item_by_id(value['$item'])
+        if '$datetime' in value:
+            return datetime.fromisoformat(value['$datetime'])
+        return {key: decode_argument(entry, data_manager) for key, entry in value.items()}
+    if isinstance(value, list):
+        return [decode_argument(entry, data_manager) for entry in value]
+    return value
+
+
+class WorkloadRecorder:
+    """Appends captured operations to a JSON-lines file, one compact entry per line.
+
+    A 'call' entry is a DataManager method with its arguments; a 'get' entry
+    is a read request with its path and route. Both carry 't', seconds since
+    capture started, and 'ms', how long the operation took. Entries are
+    written as operations finish; capture_data_manager writes each call
+    before releasing the store lock, so calls are in the order their
+    changes were applied in.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.started = time.time()
+        self.entries = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._file = open(path, 'w', encoding='utf-8')
+        self._write({'op': 'start', 'date': datetime.now().isoformat()})
+
+    def _write(self, entry: Dict[str, Any]):
+        line = json.dumps(entry, separators=(',', ':'), default=_encode)
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+            self.entries += 1
+
+    def call(self, name: str, args: tuple, kwargs: Dict[str, Any], seconds: float, error: Optional[str]):
+        entry = {'op': 'call', 't': round(time.time() - self.started, 3), 'name': name,
+                 'args': list(args), 'kwargs': kwargs, 'ms': round(seconds * 1000, 3)}
+        if error is not None:
+            entry['error'] = error
+        try:
+            self._write(entry)
+        except TypeError:
+            self.errors += 1  # An argument we cannot serialise; better a gap than a failed request
+
+    def get(self, path: str, route: Optional[str], status: Optional[int], seconds: float):
+        self._write({'op': 'get', 't': round(time.time() - self.started, 3), 'path': path, 'route': route,
+                     'status': status, 'ms': round(seconds * 1000, 3)})
+
+    def status(self) -> Dict[str, Any]:
+        return {'log': self.path, 'entries': self.entries, 'unserialisable': self.errors,
+                'seconds': round(time.time() - self.started, 1)}
+
+
+def read_workload(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.endswith('\n'):  # A partial last line means the capture was still being written
+                yield json.loads(line)
+
+
+def capture_data_manager(data_manager, recorder: WorkloadRecorder):
+    """Wrap the instance's mutating methods so each top-level call is timed and recorded.
+
+    Calls made from inside another captured call are part of it and are not
+    recorded separately, or a replay would apply them twice. Each call holds
+    the store lock until it is recorded, so the log is in apply order; a
+    call that releases the lock part way would otherwise be overtaken.
+    """
+    local = threading.local()
+
+    def wrap(name, method):
+        @functools.wraps(method)
+        def captured(*args, **kwargs):
+            if getattr(local, 'depth', 0):
+                return method(*args, **kwargs)
+            local.depth = 1
+            error = None
+            with data_manager.lock:
+                started = time.perf_counter()
+                try:
+                    return method(*args, **kwargs)
+                except Exception as e:
+                    error = f"{type(e).__name__}: {e}"
+                    raise
+                finally:
+                    seconds = time.perf_counter() - started
+                    local.depth = 0
+                    recorder.call(name, args, kwargs, seconds, error)
+        return captured
+
+    for name in CAPTURED_METHODS:
+        setattr(data_manager, name, wrap(name, getattr(data_manager, name)))
+
+
+def capture_requests(app, recorder: WorkloadRecorder):
+    """Record every GET request with its timing; writes are captured at the DataManager instead"""
+    from flask import g, request
+
+    @app.before_request
+    def _start_capture():
+        if request.method == 'GET' and request.endpoint != 'static':
+            g.capture_started = time.perf_counter()
+
+    @app.after_request
+    def _capture_status(response):
+        if 'capture_started' in g:
+            g.capture_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def _finish_capture(error=None):
+        started = g.pop('capture_started', None)
+        if started is None:
+            return
+        recorder.get(request.full_path.rstrip('?'), request.url_rule.rule if request.url_rule else None,
+                     g.pop('capture_status', None), time.perf_counter() - started)
+
+
+def install_workload_capture(app, data_manager, path: Optional[str]) -> Optional[WorkloadRecorder]:
+    """Start capturing to `path` when set; with no path nothing is wrapped and requests pay nothing.
+
+    Capture must start with the process, while the store is still empty,
+    so that the log alone is enough to rebuild the state it ran against.
+    """
+    if not path:
+        return None
+    recorder = WorkloadRecorder(path)
+    capture_data_manager(data_manager, recorder)
+    capture_requests(app, recorder)
+    return recorder